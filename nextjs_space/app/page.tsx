@@ -4,9 +4,10 @@ import { useEffect, useState, useRef } from 'react';
 import { motion } from 'framer-motion';
 import Link from 'next/link';
 import { Star, Calendar as CalendarIcon, Volume2, VolumeX, Menu, Sparkles, Snowflake } from 'lucide-react';
-import type { AdventData, AdventDay } from '@/lib/types';
+import type { AdventDay, AdventDaySummary, AdventIndex } from '@/lib/types';
 import { isDayUnlocked } from '@/lib/date-utils';
 import { getAssetPath } from '@/lib/paths';
+import { loadDay, loadIndex } from '@/lib/day-loader';
 import { Snowflakes } from '@/components/snowflakes';
 import { AdventDoor } from '@/components/advent-door';
 import { ContentModal } from '@/components/content-modal';
@@ -51,7 +52,7 @@ function getHeaderDecoration(currentDate: Date = new Date()) {
 }
 
 export default function HomePage() {
-  const [adventData, setAdventData] = useState<AdventData | null>(null);
+  const [adventData, setAdventData] = useState<AdventIndex | null>(null);
   const [selectedDay, setSelectedDay] = useState<AdventDay | null>(null);
   const [showLockedMessage, setShowLockedMessage] = useState<string | null>(null);
   const [unlockedDays, setUnlockedDays] = useState<number[]>([]);
@@ -64,9 +65,9 @@ export default function HomePage() {
   const decoration = getHeaderDecoration(new Date());
 
   useEffect(() => {
-    fetch(getAssetPath('/advent_data.json'))
-      .then((res) => res.json())
-      .then((data: AdventData) => {
+    // Only the day summaries; a day's content is fetched when its door opens
+    loadIndex()
+      .then((data) => {
         setAdventData(data);
         
         // Calculate unlocked days
@@ -143,14 +144,23 @@ export default function HomePage() {
     });
   };
 
-  const handleDoorClick = async (day: AdventDay) => {
+  const openDay = async (day: AdventDaySummary) => {
+    try {
+      setSelectedDay(await loadDay(day.day));
+    } catch (error) {
+      console.error(`Failed to load day ${day.day}:`, error);
+    }
+  };
+
+  const handleDoorClick = async (day: AdventDaySummary) => {
     const isUnlocked = isDayUnlocked(day?.date ?? '');
     
     if (isUnlocked) {
-      // Fade out background music first
+      // Fade out background music first (the day's content loads meanwhile)
+      loadDay(day.day).catch(() => undefined);
       await fadeOutMusic();
       // Door sound is now played inside the modal after it opens
-      setSelectedDay(day);
+      await openDay(day);
     } else {
       setShowLockedMessage(day?.date ?? '');
     }
@@ -167,7 +177,7 @@ export default function HomePage() {
       const prevDay = adventData.days[currentIndex - 1];
       if (prevDay && isDayUnlocked(prevDay.date ?? '')) {
         playSound();
-        setSelectedDay(prevDay);
+        openDay(prevDay);
       }
     }
   };
@@ -183,7 +193,7 @@ export default function HomePage() {
       const nextDay = adventData.days[currentIndex + 1];
       if (nextDay && isDayUnlocked(nextDay.date ?? '')) {
         playSound();
-        setSelectedDay(nextDay);
+        openDay(nextDay);
       }
     }
   };
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Content-hashed names for the published files, and the manifest mapping to them.
+
+With hashed names, every file the converter (output_writer.DayShardWriter)
+or the PDF build (build_pdfs.py) publishes below public/ is also written
+under a name carrying a digest of its bytes:
+    public/data/days/day05.json   →  public/data/days/day05.3fa9c1d2.json
+    public/pdfs/advent05.pdf      →  public/pdfs/advent05.8b01e6f4.pdf
+and public/manifest.json maps the one to the other, by path below public/:
+    {"format": 1, "files": {"data/days/day05.json": "data/days/day05.3fa9c1d2.json", ...}}
+
+A hashed file never changes, so browsers may keep it forever; manifest.json
+is the one file they have to revalidate (lib/asset-manifest.ts). The plain
+names are written as before, for readers that do not know the manifest.
+
+The manifest comes from the same pass that writes the files: a writer
+records every name it publishes and merges them into manifest.json when it
+is done, so the converter and the PDF build share one manifest. Hashed
+copies the manifest no longer names are deleted.
+
+A writer without hashed names removes the files it writes from the
+manifest instead, so switching the option off (or a watch-mode edit) never
+leaves the frontend on an older hashed copy; once no names are left,
+manifest.json itself is deleted.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Callable, Dict, Optional, Union
+
+
+MANIFEST_FORMAT = 1
+MANIFEST_FILE = 'manifest.json'
+HASH_LENGTH = 8
+
+# Writers in one process (the pipeline's threads) merge one at a time
+_merge_lock = threading.Lock()
+
+
+def hashed_path(path: str, data: bytes) -> str:
+    """path with the first HASH_LENGTH hex digits of data's SHA-256 before the extension."""
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}"
+
+
+class AssetManifest:
+    """The hashed names of the files one writer publishes below root."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.path = os.path.join(root, MANIFEST_FILE)
+        self._changes: Dict[str, Optional[str]] = {}   # name → hashed name, None if removed
+        self._lock = threading.Lock()
+
+    def name(self, path: str) -> str:
+        """The manifest key of path: relative to root, with '/' separators."""
+        return os.path.relpath(path, self.root).replace(os.sep, '/')
+
+    def add(self, path: str, text: Union[str, bytes]) -> str:
+        """Record the hashed name of path with this content; returns the hashed path."""
+        data = text.encode('utf-8') if isinstance(text, str) else text
+        hashed = hashed_path(path, data)
+        with self._lock:
+            self._changes[self.name(path)] = self.name(hashed)
+        return hashed
+
+    def remove(self, path: str):
+        """Drop path from the manifest (its hashed copy is deleted at save())."""
+        with self._lock:
+            self._changes[self.name(path)] = None
+
+    def read(self) -> Dict[str, str]:
+        """The names in manifest.json on disk."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data['files'] if data.get('format') == MANIFEST_FORMAT else {}
+
+    def save(self, write: Callable[[str, str], bool]) -> Optional[str]:
+        """
+        Merge the recorded names into manifest.json (written with write,
+        e.g. OutputFiles.write) and delete the hashed copies it no longer
+        names; returns its path, or None if nothing was recorded or no
+        names are left (manifest.json is then deleted).
+        """
+        with self._lock:
+            changes, self._changes = self._changes, {}
+        if not changes:
+            return None
+        with _merge_lock:
+            old = self.read()
+            files = dict(old)
+            for name, hashed in changes.items():
+                if hashed is None:
+                    files.pop(name, None)
+                else:
+                    files[name] = hashed
+            if files:
+                os.makedirs(self.root or '.', exist_ok=True)
+                write(self.path, json.dumps({'format': MANIFEST_FORMAT, 'files': dict(sorted(files.items()))},
+                                            ensure_ascii=False, indent=1))
+            elif os.path.exists(self.path):
+                os.remove(self.path)
+            live = set(files.values())
+            for hashed in set(old.values()) - live:
+                stale = os.path.join(self.root, hashed)
+                if os.path.exists(stale):
+                    os.remove(stale)
+        return self.path if files else None
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the three LaTeX → JSON converters on synthetic corpora.
+
+For every corpus preset (see synthetic_corpus.PRESETS) the corpus is
+generated into a temporary directory and converted by
+  - v1   LatexToJsonConverter   (convert_tex_to_json.py)
+  - v2   RobustLatexConverter   (convert_tex_to_json_v2.py)
+  - fixed tex2json_fixed.parse_file (repository root)
+reporting total time, time and call count per stage, and peak memory
+(tracemalloc, in a separate run so it does not distort the timings).
+Each converter runs in its own process and is stopped after --timeout
+seconds, so one that scales badly does not stall the whole run.
+Stages are those of the converters' --profile (see profiling.py); stage
+times are inclusive: 'body' contains the 'inline' calls made for it.
+
+Results are written as JSON (by default .cache/bench/<commit>.json), and
+--compare prints the change against an earlier report.
+
+Usage:
+    python3 benchmark_converters.py
+    python3 benchmark_converters.py --preset long --repeat 3
+    python3 benchmark_converters.py --all-presets
+    python3 benchmark_converters.py --preset many --days 5000 --converter v2
+    python3 benchmark_converters.py --compare .cache/bench/abc1234.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from queue import Empty
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import convert_tex_to_json
+import convert_tex_to_json_v2
+from output_writer import DayShardWriter, dumps
+from profiling import Stage, StageProfiler, file_arg_size
+from synthetic_corpus import CorpusSpec, PRESETS, add_spec_arguments, spec_from_args, write_corpus
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import tex2json_fixed  # noqa: E402
+
+
+REPORT_FORMAT = 1
+DEFAULT_REPORT_DIR = '.cache/bench'
+DEFAULT_TIMEOUT = 300.0
+
+
+# -- converters ------------------------------------------------------------
+
+def write_json(path: str, data: Any):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(dumps(data))
+
+
+def _run_v1(paths: List[str], out_dir: str) -> int:
+    converter = convert_tex_to_json.LatexToJsonConverter()
+    days = [d for d in (converter.parse_tex_file(p) for p in paths) if d]
+    converter.save_json({'days': days}, os.path.join(out_dir, 'v1.json'))
+    return len(days)
+
+
+def _run_v2(paths: List[str], out_dir: str) -> int:
+    converter = convert_tex_to_json_v2.RobustLatexConverter()
+    writer = DayShardWriter(os.path.join(out_dir, 'data'))
+    for path in paths:
+        day_data = converter.parse_tex_file(path)
+        if day_data:
+            writer.write_day(day_data)
+    return writer.day_count
+
+
+def _run_fixed(paths: List[str], out_dir: str) -> int:
+    days = [d for d in (tex2json_fixed.parse_file(Path(p)) for p in paths) if d]
+    write_json(os.path.join(out_dir, 'fixed.json'), days)
+    return len(days)
+
+
+FIXED_STAGES = [
+    Stage('parse', tex2json_fixed, 'parse_file', file_arg_size),
+    Stage('macro', tex2json_fixed, 'find_advent_args'),
+    Stage('inline', tex2json_fixed, 'tex2html'),
+    Stage('refs', tex2json_fixed, 'extract_refs'),
+    Stage('write', sys.modules[__name__], 'write_json',
+          lambda args, result: os.path.getsize(args[0])),
+]
+
+# name -> (runner, stages)
+CONVERTERS: Dict[str, Tuple[Callable[[List[str], str], int], List[Stage]]] = {
+    'v1': (_run_v1, convert_tex_to_json.LatexToJsonConverter.profile_stages()),
+    'v2': (_run_v2, convert_tex_to_json_v2.RobustLatexConverter.profile_stages()),
+    'fixed': (_run_fixed, FIXED_STAGES),
+}
+
+
+def _quiet(func: Callable, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args)
+
+
+def _measure(name: str, paths: List[str], repeat: int) -> Dict[str, Any]:
+    """Best-of-repeat timings with stage breakdown, then one run for peak memory."""
+    runner, stages = CONVERTERS[name]
+    best: Optional[Dict[str, Any]] = None
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as out_dir:
+            profiler = StageProfiler(stages, name)
+            t0 = time.perf_counter()
+            try:
+                with profiler:
+                    days = _quiet(runner, paths, out_dir)
+                error = None
+            except Exception as e:
+                days, error = 0, f"{type(e).__name__}: {e}"
+            seconds = time.perf_counter() - t0
+        if best is None or seconds < best['seconds']:
+            best = {'converter': name, 'seconds': round(seconds, 6), 'days': days,
+                    'error': error, 'stages': profiler.stage_report()}
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        tracemalloc.start()
+        try:
+            _quiet(runner, paths, out_dir)
+        except Exception:
+            pass
+        best['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return best
+
+
+def _measure_in_child(name: str, paths: List[str], repeat: int, queue: multiprocessing.Queue):
+    queue.put(_measure(name, paths, repeat))
+
+
+def bench_converter(name: str, paths: List[str], repeat: int = 1,
+                    timeout: float = DEFAULT_TIMEOUT) -> Dict[str, Any]:
+    """Measure one converter in a fresh process, giving up after timeout seconds."""
+    queue = multiprocessing.Queue()
+    child = multiprocessing.Process(target=_measure_in_child, args=(name, paths, repeat, queue))
+    child.start()
+    try:
+        result = queue.get(timeout=timeout)
+    except Empty:
+        child.terminate()
+        result = {'converter': name, 'seconds': None, 'days': 0, 'stages': {},
+                  'error': f"timed out after {timeout:.0f}s", 'peak_memory_bytes': None}
+    child.join()
+    return result
+
+
+def bench_corpus(preset: str, spec: CorpusSpec, converters: List[str],
+                 repeat: int = 1, timeout: float = DEFAULT_TIMEOUT) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        paths = write_corpus(spec, corpus_dir)
+        corpus_bytes = sum(os.path.getsize(p) for p in paths)
+        print(f"\n{preset}: {len(paths)} files, {corpus_bytes / 1e6:.2f} MB")
+        results = []
+        for name in converters:
+            result = bench_converter(name, paths, repeat, timeout)
+            if result['seconds']:
+                result['mb_per_second'] = round(corpus_bytes / 1e6 / result['seconds'], 3)
+            else:
+                result['mb_per_second'] = None
+            results.append(result)
+            print(format_result(result))
+    return {'preset': preset, 'spec': spec._asdict(), 'files': len(paths),
+            'bytes': corpus_bytes, 'results': results}
+
+
+# -- reporting -------------------------------------------------------------
+
+def format_result(result: Dict[str, Any]) -> str:
+    if result['seconds'] is None:
+        return f"  {result['converter']:<6} ✗ {result['error']}"
+    stages = '  '.join(f"{stage} {info['seconds']:.3f}s/{info['calls']}"
+                       for stage, info in result['stages'].items() if stage != 'parse')
+    line = (f"  {result['converter']:<6} {result['seconds']:>9.3f}s "
+            f"{result['mb_per_second']:>8.2f} MB/s  peak {result['peak_memory_bytes'] / 1e6:>8.1f} MB"
+            f"  {result['days']:>5} days  [{stages}]")
+    if result['error']:
+        line += f"\n         ✗ {result['error']}"
+    return line
+
+
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                             text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]):
+    """Print time and memory of report relative to baseline."""
+    old = {(run['preset'], r['converter']): r for run in baseline['runs'] for r in run['results']}
+    print(f"\nCompared with {baseline.get('commit') or baseline.get('created')}:")
+    print(f"  {'preset':<8} {'conv':<6} {'old s':>9} {'new s':>9} {'time':>7} {'memory':>7}")
+    for run in report['runs']:
+        for r in run['results']:
+            o = old.get((run['preset'], r['converter']))
+            if not o or not o['seconds'] or not r['seconds']:
+                continue
+            time_ratio = r['seconds'] / o['seconds']
+            mem_ratio = (r['peak_memory_bytes'] / o['peak_memory_bytes']
+                         if o['peak_memory_bytes'] else float('inf'))
+            print(f"  {run['preset']:<8} {r['converter']:<6} {o['seconds']:>9.3f} "
+                  f"{r['seconds']:>9.3f} {time_ratio:>6.2f}x {mem_ratio:>6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the LaTeX → JSON converters")
+    add_spec_arguments(parser)
+    parser.set_defaults(preset=None)
+    parser.add_argument('--all-presets', action='store_true', help="run every preset")
+    parser.add_argument('--converter', action='append', choices=sorted(CONVERTERS),
+                        help="converter to run (repeatable, default: all)")
+    parser.add_argument('--repeat', type=int, default=1,
+                        help="timing runs per converter, best one is kept (default: %(default)s)")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help="seconds per converter and corpus before giving up (default: %(default)s)")
+    parser.add_argument('--output', help=f"report path (default: {DEFAULT_REPORT_DIR}/<commit>.json)")
+    parser.add_argument('--compare', help="earlier report to compare against")
+    args = parser.parse_args()
+
+    presets = sorted(PRESETS) if args.all_presets else [args.preset or 'real']
+    converters = args.converter or list(CONVERTERS)
+    commit = git_commit()
+    report = {
+        'format': REPORT_FORMAT,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'runs': [bench_corpus(preset, spec_from_args(args, preset), converters,
+                              args.repeat, args.timeout)
+                 for preset in presets],
+    }
+
+    output = args.output or os.path.join(DEFAULT_REPORT_DIR, f"{commit or 'report'}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✓ Report written to {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(report, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+Content-hash build cache for the LaTeX → JSON converters.
+
+Each converted day is stored under a key derived from
+  - the SHA-256 of the advent*.tex source,
+  - the SHA-256 of every file it \\input s (advent-layout.tex),
+  - the converter version (declared version + hash of the converter code).
+
+The manifest remembers the last size/mtime of every hashed file, so an
+unchanged file is recognised with a single stat() instead of being read and
+hashed again. Entries whose key no longer matches, or whose source is gone,
+are dropped by prune().
+
+Layout (default .cache/tex2json/<converter>/):
+    manifest.json
+    records/<key>.json
+"""
+
+import hashlib
+import json
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+
+MANIFEST_FORMAT = 1
+
+_INPUT_RE = re.compile(rb'^[^%\n]*?\\input\s*\{([^}]+)\}', re.MULTILINE)
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 hex digest of a file's bytes."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def code_fingerprint(*paths: str) -> str:
+    """Short digest of the given source files, used as part of a converter version."""
+    h = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()[:12]
+
+
+class FileDigests:
+    """
+    SHA-256 digests of files, remembered with their size and mtime so an
+    unchanged file costs one stat() instead of a read. `files` is the
+    persisted {path: {'size', 'mtime_ns', 'sha256'}} table; `changed` tells
+    whether it needs saving.
+    """
+
+    def __init__(self, files: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.files = files if files is not None else {}
+        self.changed = False
+
+    def digest(self, path: str, fresh: bool = False) -> str:
+        """Digest of path; fresh=True rehashes (for a file just written)."""
+        path = os.path.normpath(path)
+        st = os.stat(path)
+        known = self.files.get(path)
+        if (not fresh and known and known['size'] == st.st_size
+                and known['mtime_ns'] == st.st_mtime_ns):
+            return known['sha256']
+        digest = file_digest(path)
+        if known is None or known['sha256'] != digest or known['mtime_ns'] != st.st_mtime_ns:
+            self.files[path] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': digest}
+            self.changed = True
+        return digest
+
+    def prune(self):
+        """Forget files that no longer exist."""
+        for path in list(self.files):
+            if not os.path.exists(path):
+                del self.files[path]
+                self.changed = True
+
+
+def tex_inputs(source: bytes, directory: str) -> List[str]:
+    """Paths of the files a .tex source pulls in with \\input{...}."""
+    deps = []
+    for m in _INPUT_RE.finditer(source):
+        name = m.group(1).decode('utf-8').strip()
+        if not name.endswith('.tex'):
+            name += '.tex'
+        deps.append(os.path.normpath(os.path.join(directory, name)))
+    return deps
+
+
+class BuildCache:
+    """Persistent per-file cache of converted day records."""
+
+    def __init__(self, cache_dir: str, version: str):
+        self.cache_dir = cache_dir
+        self.version = version
+        self.records_dir = os.path.join(cache_dir, 'records')
+        self.manifest_path = os.path.join(cache_dir, 'manifest.json')
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._manifest = self._load_manifest()
+        self._entries: Dict[str, Dict[str, Any]] = self._manifest['entries']
+        self._files = FileDigests(self._manifest['files'])
+        self._digests: Dict[str, str] = {}
+        self._keys: Dict[str, str] = {}
+        self._deps: Dict[str, List[str]] = {}
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        empty = {'format': MANIFEST_FORMAT, 'version': self.version, 'entries': {}, 'files': {}}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return empty
+        if manifest.get('format') != MANIFEST_FORMAT:
+            return empty
+        if manifest.get('version') != self.version:
+            # Different converter: every record is stale, but the file
+            # digests are still valid and save re-hashing.
+            empty['files'] = manifest.get('files', {})
+            self._dirty = True
+            return empty
+        return manifest
+
+    # -- hashing -----------------------------------------------------------
+
+    def digest(self, path: str) -> str:
+        """Digest of path, reusing the manifest's value when size and mtime match."""
+        path = os.path.normpath(path)
+        if path not in self._digests:
+            self._digests[path] = self._files.digest(path)
+        return self._digests[path]
+
+    def inputs(self, path: str) -> List[str]:
+        """Files \\input by path, taken from the manifest while the source is unchanged."""
+        path = os.path.normpath(path)
+        if path not in self._deps:
+            entry = self._entries.get(path)
+            if entry and entry.get('source') == self.digest(path):
+                self._deps[path] = entry['deps']
+            else:
+                with open(path, 'rb') as f:
+                    self._deps[path] = tex_inputs(f.read(), os.path.dirname(path))
+        return self._deps[path]
+
+    def key(self, path: str) -> str:
+        """Cache key of a source file: its content, its \\input s and the converter version."""
+        path = os.path.normpath(path)
+        if path in self._keys:
+            return self._keys[path]
+        source_digest = self.digest(path)
+        deps = self.inputs(path)
+        h = hashlib.sha256()
+        h.update(self.version.encode('utf-8'))
+        h.update(source_digest.encode('ascii'))
+        for dep in deps:
+            h.update(dep.encode('utf-8'))
+            h.update(self.digest(dep).encode('ascii') if os.path.exists(dep) else b'missing')
+        self._keys[path] = h.hexdigest()
+        return self._keys[path]
+
+    # -- records -----------------------------------------------------------
+
+    def _record_path(self, key: str) -> str:
+        return os.path.join(self.records_dir, f'{key}.json')
+
+    def lookup(self, path: str) -> Optional[Dict[str, Any]]:
+        """Cached record for path, or None if the source or its inputs changed."""
+        path = os.path.normpath(path)
+        entry = self._entries.get(path)
+        if entry is not None and entry['key'] == self.key(path):
+            try:
+                with open(self._record_path(entry['key']), 'r', encoding='utf-8') as f:
+                    record = json.load(f)
+            except (OSError, ValueError):
+                record = None
+            if record is not None:
+                self.hits += 1
+                return record
+        self.misses += 1
+        return None
+
+    def store(self, path: str, record: Dict[str, Any]):
+        """Remember the converted record for path under its current key."""
+        path = os.path.normpath(path)
+        key = self.key(path)
+        old = self._entries.get(path)
+        if old and old['key'] != key:
+            self._remove_record(old['key'])
+        os.makedirs(self.records_dir, exist_ok=True)
+        record_path = self._record_path(key)
+        tmp_path = record_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(tmp_path, record_path)
+        self._entries[path] = {'key': key, 'source': self.digest(path), 'deps': self.inputs(path)}
+        self._dirty = True
+
+    def _remove_record(self, key: str):
+        self._remove_file(f'{key}.json')
+
+    def _remove_file(self, name: str):
+        try:
+            os.remove(os.path.join(self.records_dir, name))
+        except OSError:
+            pass
+
+    def prune(self, live_paths: Iterable[str]) -> int:
+        """Drop entries for sources that no longer exist or whose key changed."""
+        live = {os.path.normpath(p) for p in live_paths}
+        dropped = 0
+        for path in list(self._entries):
+            entry = self._entries[path]
+            if path not in live or not os.path.exists(path) or entry['key'] != self.key(path):
+                self._remove_record(entry['key'])
+                del self._entries[path]
+                dropped += 1
+        if os.path.isdir(self.records_dir):
+            referenced = {f"{e['key']}.json" for e in self._entries.values()}
+            for name in os.listdir(self.records_dir):
+                if name not in referenced:
+                    self._remove_file(name)
+                    dropped += 1
+        self._files.prune()
+        if dropped:
+            self._dirty = True
+        return dropped
+
+    def save(self):
+        """Write the manifest if anything changed."""
+        if not self._dirty and not self._files.changed:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._manifest['version'] = self.version
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+        self._dirty = False
+        self._files.changed = False
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parallel, hash-tracked PDF build of the advent*.tex files.
+
+Replaces the serial pdflatex loop of update-website.sh:
+  - the sources are found by name (advent*.tex), not listed by hand,
+  - a file is compiled only if it, a file it \\input s (advent-layout.tex)
+    or the engine command changed since its last build (task_graph.py,
+    state in .cache/pdfs/state.json),
+  - compilations run in parallel, each in its own temporary output
+    directory, so the .aux/.log/.out files of two days never collide,
+  - public/pdfs/adventNN.pdf is replaced only if the new PDF's bytes differ,
+  - with --hashed-names, each PDF is also written as adventNN.<hash>.pdf and
+    listed in public/manifest.json (asset_manifest.py); without it, the PDF
+    is dropped from that manifest.
+
+The engine is a command template with {tex} (source file name), {jobname}
+and {outdir} (the temporary directory); it runs `--passes` times in the
+source directory. Any command that leaves {outdir}/{jobname}.pdf behind
+will do, e.g. a stand-in script for tests.
+
+Usage:
+    python3 build_pdfs.py                   # changed days, one job per CPU
+    python3 build_pdfs.py -j 4 --force      # recompile everything
+    python3 build_pdfs.py advent03.tex      # just one day
+    python3 build_pdfs.py --engine 'lualatex -interaction=nonstopmode -output-directory={outdir} {tex}'
+"""
+
+import argparse
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+from functools import partial
+from typing import List
+
+from asset_manifest import AssetManifest
+from build_cache import tex_inputs
+from output_writer import OutputFiles, write_if_changed
+from task_graph import Task, TaskGraph, format_result
+
+
+DEFAULT_ENGINE = 'pdflatex -interaction=nonstopmode -output-directory={outdir} {tex}'
+DEFAULT_PASSES = 2   # the second pass resolves references
+DEFAULT_OUTPUT_DIR = 'public/pdfs'
+DEFAULT_STATE = '.cache/pdfs/state.json'
+SOURCE_RE = re.compile(r'advent\d+\.tex$')
+LOG_TAIL = 15
+
+
+class PdfError(RuntimeError):
+    pass
+
+
+def discover_sources(directory: str = '.') -> List[str]:
+    """The advent*.tex files in directory, sorted."""
+    return sorted(os.path.normpath(os.path.join(directory, name)) for name in os.listdir(directory)
+                  if SOURCE_RE.match(name))
+
+
+def tex_dependencies(path: str) -> List[str]:
+    """Existing files path \\input s, directly or through other inputs."""
+    found: List[str] = []
+    todo = [path]
+    while todo:
+        with open(todo.pop(), 'rb') as f:
+            source = f.read()
+        for dep in tex_inputs(source, os.path.dirname(path)):
+            if dep not in found and os.path.exists(dep):
+                found.append(dep)
+                todo.append(dep)
+    return found
+
+
+class PdfCompiler:
+    """Compiles one .tex file in a private directory and publishes the PDF."""
+
+    def __init__(self, engine: str = DEFAULT_ENGINE, passes: int = DEFAULT_PASSES,
+                 output_dir: str = DEFAULT_OUTPUT_DIR, hashed_names: bool = False):
+        self.engine = engine
+        self.passes = passes
+        self.output_dir = output_dir
+        self.output = OutputFiles()
+        self.hashed_names = hashed_names
+        self.manifest = AssetManifest(os.path.dirname(os.path.normpath(output_dir)))
+
+    @property
+    def signature(self) -> str:
+        return f"{self.engine} (x{self.passes})" + (' hashed' if self.hashed_names else '')
+
+    def available(self) -> bool:
+        return shutil.which(shlex.split(self.engine)[0]) is not None
+
+    def command(self, tex: str, outdir: str) -> List[str]:
+        name = os.path.basename(tex)
+        fields = {'tex': name, 'jobname': os.path.splitext(name)[0], 'outdir': outdir}
+        return [arg.format(**fields) for arg in shlex.split(self.engine)]
+
+    def output_path(self, tex: str) -> str:
+        return os.path.join(self.output_dir, os.path.splitext(os.path.basename(tex))[0] + '.pdf')
+
+    def compile(self, tex: str) -> bytes:
+        """The PDF bytes of tex; PdfError with the end of the log if there is none."""
+        jobname = os.path.splitext(os.path.basename(tex))[0]
+        with tempfile.TemporaryDirectory(prefix=f'{jobname}-') as outdir:
+            for _ in range(self.passes):
+                proc = subprocess.run(self.command(tex, outdir), cwd=os.path.dirname(tex) or '.',
+                                      stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                      stderr=subprocess.STDOUT)
+            pdf_path = os.path.join(outdir, jobname + '.pdf')
+            if not os.path.exists(pdf_path):
+                log_path = os.path.join(outdir, jobname + '.log')
+                if os.path.exists(log_path):
+                    with open(log_path, 'rb') as f:
+                        log = f.read()
+                else:
+                    log = proc.stdout
+                tail = log.decode('utf-8', 'replace').rstrip().splitlines()[-LOG_TAIL:]
+                raise PdfError(f"{tex}: no PDF (exit status {proc.returncode})\n"
+                               + '\n'.join('    ' + line for line in tail))
+            with open(pdf_path, 'rb') as f:
+                return f.read()
+
+    def publish(self, tex: str, pdf: bytes) -> bool:
+        """Copy the PDF to output_dir unless the same bytes are already there."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = self.output_path(tex)
+        if self.hashed_names:
+            self.output.write(self.manifest.add(path, pdf), pdf)
+        else:
+            # A PDF published without a hashed name must not stay behind an older one
+            self.manifest.remove(path)
+        self.manifest.save(write_if_changed)
+        return self.output.write(path, pdf)
+
+    def build(self, tex: str) -> bool:
+        return self.publish(tex, self.compile(tex))
+
+    def task(self, tex: str) -> Task:
+        """The task graph entry for one source."""
+        name = os.path.splitext(os.path.basename(tex))[0]
+        return Task(f"pdf:{name}", partial(self.build, tex),
+                    inputs=[tex] + tex_dependencies(tex), outputs=[self.output_path(tex)],
+                    signature=self.signature)
+
+
+def passes_arg(value: str) -> int:
+    """argparse type of --passes: the engine must run at least once."""
+    passes = int(value)
+    if passes < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {passes}")
+    return passes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the advent*.tex files to PDF, in parallel")
+    parser.add_argument('files', nargs='*', help="sources to build (default: every advent*.tex)")
+    parser.add_argument('--engine', default=DEFAULT_ENGINE,
+                        help="command template with {tex}, {jobname}, {outdir} (default: %(default)s)")
+    parser.add_argument('--passes', type=passes_arg, default=DEFAULT_PASSES,
+                        help="engine runs per file (default: %(default)s)")
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR,
+                        help="where the PDFs go (default: %(default)s)")
+    parser.add_argument('--hashed-names', action='store_true',
+                        help="also write adventNN.<hash>.pdf, listed in manifest.json")
+    parser.add_argument('--state', default=DEFAULT_STATE,
+                        help="build state file (default: %(default)s)")
+    parser.add_argument('--jobs', '-j', type=int, default=0,
+                        help="parallel compilations (default: one per CPU)")
+    parser.add_argument('--force', action='store_true', help="recompile even if nothing changed")
+    parser.add_argument('--dry-run', '-n', action='store_true', help="only list what would be compiled")
+    args = parser.parse_args()
+
+    compiler = PdfCompiler(args.engine, args.passes, args.output_dir, args.hashed_names)
+    if not compiler.available():
+        print(f"⚠ {shlex.split(args.engine)[0]} not found; skipping PDF compilation")
+        return
+    sources = args.files or discover_sources()
+    graph = TaskGraph(args.state)
+    for tex in sources:
+        graph.add(compiler.task(tex))
+
+    results = graph.run(jobs=args.jobs, force=args.force, dry_run=args.dry_run,
+                        report=lambda result: print(format_result(result)))
+    built = sum(r.status == 'built' for r in results)
+    current = sum(r.status == 'up-to-date' for r in results)
+    failed = sum(r.status == 'failed' for r in results)
+    if not args.dry_run:
+        print(f"\n✓ PDFs: {built} compiled ({compiler.output.written} copied, "
+              f"{compiler.output.skipped} unchanged), {current} up to date, {failed} failed")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Build orchestrator for the whole content pipeline.
+
+Models the publishing steps as a task graph (task_graph.py) instead of a
+fixed sequence of scripts:
+
+    json:adventNN   adventNN.tex (+ advent-layout.tex) → converted day record
+                    in .cache/pipeline/days/adventNN.json
+    json:data       all day records → public/data (metadata, index, days,
+                    references, bundle) and public/advent_data.json
+    pdf:adventNN    adventNN.tex (+ advent-layout.tex) → public/pdfs/adventNN.pdf
+                    (build_pdfs.py; skipped if the TeX engine is missing)
+    site            public/ and the frontend sources → out/ (`yarn build`,
+                    only with --site)
+
+Staleness is decided by content hashes, with the state kept in
+.cache/pipeline/state.json: a rebuild with no changes only stat()s the
+files, and editing one day reruns that day's json and pdf tasks plus the
+steps that combine all days. JSON conversion and PDF compilation run side
+by side; the json:adventNN tasks share one converter and take turns.
+
+The old split_json.py and clean_json_files.py steps have no task: the
+converter writes the split files itself.
+
+Usage:
+    python3 build_pipeline.py                 # bring everything up to date
+    python3 build_pipeline.py 'pdf:*'         # only the PDFs
+    python3 build_pipeline.py -n              # what would run, and why
+    python3 build_pipeline.py --site          # including the Next.js build
+    python3 build_pipeline.py --hashed-names  # plus content-hashed copies and
+                                              # public/manifest.json
+    python3 build_pipeline.py --list
+"""
+
+import argparse
+import json
+import os
+import shlex
+import subprocess
+import sys
+import time
+from functools import partial
+from typing import List
+
+from asset_manifest import MANIFEST_FILE
+from build_pdfs import (DEFAULT_ENGINE, DEFAULT_OUTPUT_DIR, DEFAULT_PASSES, PdfCompiler,
+                        discover_sources, passes_arg, tex_dependencies)
+from convert_tex_to_json_v2 import DEFAULT_CACHE_DIR, DEFAULT_DATA_DIR, RobustLatexConverter
+from katex_prerender import CACHE_FILE as KATEX_CACHE_FILE, KatexSettings, KatexUnavailable
+from output_writer import DayShardWriter, dumps, write_if_changed
+from search_index import META_FILE as SEARCH_META_FILE
+from task_graph import Task, TaskGraph, format_result, summarize
+
+
+DEFAULT_STATE = '.cache/pipeline/state.json'
+RECORDS_DIR = '.cache/pipeline/days'
+DEFAULT_SITE_COMMAND = 'yarn build'
+FRONTEND_DIRS = ['app', 'components', 'lib', 'hooks']
+FRONTEND_FILES = ['package.json', 'next.config.js', 'tailwind.config.ts', 'postcss.config.js',
+                  'tsconfig.json']
+
+
+def record_path(tex: str) -> str:
+    return os.path.join(RECORDS_DIR, os.path.splitext(os.path.basename(tex))[0] + '.json')
+
+
+def convert_day(converter: RobustLatexConverter, tex: str):
+    record = converter.parse_tex_file(tex)
+    if not record:
+        raise RuntimeError(f"{tex} could not be converted")
+    os.makedirs(RECORDS_DIR, exist_ok=True)
+    write_if_changed(record_path(tex), dumps(record))
+
+
+def write_data(converter: RobustLatexConverter, sources: List[str], output_path: str,
+               data_dir: str, inline_references: bool, bundle: bool, hashed_names: bool):
+    records = {}
+    for tex in sources:
+        with open(record_path(tex), 'r', encoding='utf-8') as f:
+            records[os.path.basename(tex)] = json.load(f)
+    converter.convert_all(output_path, cache_dir=None, data_dir=data_dir,
+                          inline_references=inline_references, bundle=bundle, records=records,
+                          hashed_names=hashed_names)
+
+
+def run_command(command: str):
+    subprocess.run(shlex.split(command), check=True)
+
+
+def frontend_sources() -> List[str]:
+    found = [path for path in FRONTEND_FILES if os.path.exists(path)]
+    for directory in FRONTEND_DIRS:
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            found.extend(os.path.join(root, name) for name in sorted(files))
+    return found
+
+
+def pipeline_converter(args) -> RobustLatexConverter:
+    """The converter the json tasks share, with the options of args."""
+    converter = RobustLatexConverter()
+    converter.chunk_sections = args.chunk_sections
+    converter.search_index = args.search_index
+    converter.sqlite_path = args.sqlite
+    if args.katex:
+        # The converter's own KaTeX cache: the pipeline has no build cache directory
+        converter.katex = KatexSettings(os.path.join(DEFAULT_CACHE_DIR, KATEX_CACHE_FILE),
+                                        args.katex_options, args.katex_fallback)
+    return converter
+
+
+def content_pipeline(args, converter: RobustLatexConverter) -> TaskGraph:
+    """The task graph for the .tex files in the current directory."""
+    graph = TaskGraph(args.state)
+    sources = discover_sources()
+    version = converter.cache_version()
+
+    for tex in sources:
+        graph.add(Task(f"json:{os.path.splitext(tex)[0]}", partial(convert_day, converter, tex),
+                       inputs=[tex] + tex_dependencies(tex), outputs=[record_path(tex)],
+                       signature=version, resource='converter'))
+
+    writer = DayShardWriter(args.data_dir, bundle=not args.no_bundle)
+    outputs = [writer.metadata_path, writer.index_path]
+    outputs += [writer.day_path(converter.get_day_number(tex)) for tex in sources]
+    if not args.inline_references:
+        outputs.append(writer.references_path)
+    if writer.bundle_path:
+        outputs.append(writer.bundle_path)
+    if args.search_index:
+        outputs.append(os.path.join(writer.search_dir, SEARCH_META_FILE))
+    if args.sqlite:
+        outputs.append(args.sqlite)
+    if args.output:
+        outputs.append(args.output)
+    options = f"references={'inline' if args.inline_references else 'shared'}"
+    if args.hashed_names:
+        options += ' hashed'
+    graph.add(Task('json:data', partial(write_data, converter, sources, args.output or None,
+                                        args.data_dir, args.inline_references, not args.no_bundle,
+                                        args.hashed_names),
+                   inputs=[record_path(tex) for tex in sources], outputs=outputs,
+                   signature=f"{version} {options}", resource='converter'))
+
+    compiler = PdfCompiler(args.engine, args.passes, args.pdf_dir, args.hashed_names)
+    if not args.no_pdf and not compiler.available():
+        print(f"⚠ {shlex.split(args.engine)[0]} not found; no PDF tasks")
+    elif not args.no_pdf:
+        for tex in sources:
+            graph.add(compiler.task(tex))
+
+    if args.site:
+        published = [path for task in graph.tasks.values() for path in task.outputs
+                     if not path.startswith(RECORDS_DIR)]
+        if args.hashed_names:
+            # Written by json:data and the pdf tasks together, so no task's declared output
+            published.append(os.path.join(os.path.dirname(os.path.normpath(args.data_dir)),
+                                          MANIFEST_FILE))
+        graph.add(Task('site', partial(run_command, args.site_command),
+                       inputs=published + frontend_sources(),
+                       outputs=[os.path.join('out', 'index.html')], signature=args.site_command))
+    return graph
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild what changed in the content pipeline")
+    parser.add_argument('targets', nargs='*',
+                        help="tasks to bring up to date, shell patterns allowed (default: all)")
+    parser.add_argument('--jobs', '-j', type=int, default=0,
+                        help="tasks running at the same time (default: one per CPU)")
+    parser.add_argument('--force', action='store_true', help="rerun the selected tasks")
+    parser.add_argument('--dry-run', '-n', action='store_true', help="only show what would run")
+    parser.add_argument('--list', action='store_true', help="list the tasks and their dependencies")
+    parser.add_argument('--verbose', '-v', action='store_true', help="also list up-to-date tasks")
+    parser.add_argument('--state', default=DEFAULT_STATE,
+                        help="build state file (default: %(default)s)")
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR,
+                        help="per-day JSON output (default: %(default)s)")
+    parser.add_argument('--output', default='public/advent_data.json',
+                        help="combined JSON output, '' for none (default: %(default)s)")
+    parser.add_argument('--inline-references', action='store_true',
+                        help="copy reference texts into every day instead of references.json")
+    parser.add_argument('--no-bundle', action='store_true', help="do not write days.bundle")
+    parser.add_argument('--chunk-sections', action='store_true',
+                        help="split day contents at their sections for progressive loading")
+    parser.add_argument('--search-index', action='store_true',
+                        help="also write the full-text search index (search_index.py)")
+    parser.add_argument('--sqlite', metavar='FILE',
+                        help="also load the days into this SQLite database (sqlite_export.py)")
+    parser.add_argument('--katex', action='store_true',
+                        help="pre-render math with the KaTeX from node_modules")
+    parser.add_argument('--katex-fallback', action='store_true',
+                        help="with --katex, keep the LaTeX source if node or KaTeX is missing")
+    parser.add_argument('--katex-options', type=json.loads, default={},
+                        help="KaTeX options as JSON, e.g. '{\"output\": \"html\"}'")
+    parser.add_argument('--no-pdf', action='store_true', help="leave out the PDF tasks")
+    parser.add_argument('--engine', default=DEFAULT_ENGINE,
+                        help="TeX command template, see build_pdfs.py (default: %(default)s)")
+    parser.add_argument('--passes', type=passes_arg, default=DEFAULT_PASSES,
+                        help="TeX runs per file (default: %(default)s)")
+    parser.add_argument('--pdf-dir', default=DEFAULT_OUTPUT_DIR,
+                        help="where the PDFs go (default: %(default)s)")
+    parser.add_argument('--hashed-names', action='store_true',
+                        help="also write content-hashed copies and public/manifest.json")
+    parser.add_argument('--site', action='store_true', help="add the Next.js build (out/)")
+    parser.add_argument('--site-command', default=DEFAULT_SITE_COMMAND,
+                        help="command that builds the site (default: %(default)s)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    converter = pipeline_converter(args)
+    try:
+        graph = content_pipeline(args, converter)
+    except KatexUnavailable as e:
+        raise SystemExit(f"✗ {e} (run yarn install, or add --katex-fallback)")
+    targets = graph.select(args.targets) if args.targets else None
+    if args.list:
+        converter.close()
+        for name in graph.order(targets):
+            deps = sorted(graph.dependencies(name))
+            print(f"  {name}" + (f"  ← {', '.join(deps)}" if deps else ''))
+        return
+
+    def report(result):
+        if args.verbose or result.status != 'up-to-date':
+            print(format_result(result))
+
+    try:
+        results = graph.run(targets, jobs=args.jobs, force=args.force, dry_run=args.dry_run,
+                            report=report)
+    finally:
+        # Once for the whole run, also when json:data was not among the targets
+        converter.close()
+    failed = [r for r in results if r.status == 'failed']
+    mark = '✗' if failed else '✓'
+    print(f"\n{mark} {summarize(results)} in {time.perf_counter() - started:.2f} s")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,10 +3,10 @@
 import { motion } from 'framer-motion';
 import { Lock, Star } from 'lucide-react';
 import { useState } from 'react';
-import type { AdventDay } from '@/lib/types';
+import type { AdventDaySummary } from '@/lib/types';
 
 interface AdventDoorProps {
-  day: AdventDay;
+  day: AdventDaySummary;
   isUnlocked: boolean;
   onClick: () => void;
 }
@@ -5,9 +5,11 @@ import { X, ChevronLeft, ChevronRight, Calendar, Download } from 'lucide-react';
 import { useEffect, useState, useRef } from 'react';
 import type { AdventDay } from '@/lib/types';
 import { getAssetPath } from '@/lib/paths';
+import { resolveAsset } from '@/lib/asset-manifest';
 import { MathRenderer } from './math-renderer';
 import { FallingText } from './falling-text';
 import { formatDate } from '@/lib/date-utils';
+import { loadDayChunks } from '@/lib/day-loader';
 
 interface ContentModalProps {
   day: AdventDay | null;
@@ -27,6 +29,7 @@ export function ContentModal({
   hasNext,
 }: ContentModalProps) {
   const [isAnimating, setIsAnimating] = useState(false);
+  const [chunks, setChunks] = useState<string[]>([]);
   const audioRef = useRef<HTMLAudioElement | null>(null);
   const ANIMATION_DURATION = 3500; // 3.5 seconds for the full opening animation
 
@@ -86,6 +89,28 @@ export function ContentModal({
     };
   }, [day, onClose]);
 
+  // Sections of a chunked day stream in after the first one is shown
+  useEffect(() => {
+    setChunks([]);
+    if (!day?.contentChunks) return;
+
+    let cancelled = false;
+    const load = async () => {
+      for (const pending of loadDayChunks(day)) {
+        const html = await pending;
+        if (cancelled) return;
+        setChunks((previous) => [...previous, html]);
+      }
+    };
+    load().catch((error) => {
+      console.error('Failed to load section:', error);
+    });
+
+    return () => {
+      cancelled = true;
+    };
+  }, [day]);
+
   return (
     <AnimatePresence>
       {day && (
@@ -121,10 +146,11 @@ export function ContentModal({
                 onClick={() => {
                   // Map day 30 to advent00.pdf, all others to adventXX.pdf
                   const dayNumber = day?.day === 30 ? 0 : (day?.day ?? 0);
-                  const pdfPath = getAssetPath(`/pdfs/advent${String(dayNumber).padStart(2, '0')}.pdf`);
+                  const pdfUrl = resolveAsset(`/pdfs/advent${String(dayNumber).padStart(2, '0')}.pdf`);
                   
                   // Download with obfuscated filename via fetch + blob
-                  fetch(pdfPath)
+                  pdfUrl
+                    .then(pdfPath => fetch(pdfPath))
                     .then(response => {
                       if (!response.ok) throw new Error('PDF not found');
                       return response.blob();
@@ -143,7 +169,7 @@ export function ContentModal({
                     .catch(error => {
                       console.error('Download failed:', error);
                       // Fallback: direct link (will open in browser)
-                      window.open(pdfPath, '_blank');
+                      pdfUrl.then(pdfPath => window.open(pdfPath, '_blank'));
                     });
                 }}
                 className="p-2 hover:bg-gray-200 rounded-lg transition-colors"
@@ -336,6 +362,9 @@ export function ContentModal({
                 }}
               >
                 <MathRenderer content={day?.content ?? ''} />
+                {chunks.map((html, idx) => (
+                  <MathRenderer key={idx} content={html} />
+                ))}
                 
                 {/* References integrated into content */}
                 {day?.references && day.references.length > 0 && (
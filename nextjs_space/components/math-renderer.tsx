@@ -22,6 +22,13 @@ export function MathRenderer({ content }: MathRendererProps) {
     if (!containerRef.current || !content) return;
 
     const renderMath = async () => {
+      // Math pre-rendered at build time (convert_tex_to_json_v2.py --katex)
+      // leaves no delimiters behind, and nothing to typeset here
+      if (!/\\\[|\$/.test(content)) {
+        containerRef.current!.innerHTML = content;
+        return;
+      }
+
       if (!katex) {
         const module = await import('katex');
         katex = module.default;
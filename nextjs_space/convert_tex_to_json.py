@@ -7,25 +7,42 @@ Automatically converts advent*.tex files to advent_data.json
 for the Next.js Advent Calendar project.
 
 Usage:
-    python3 convert_tex_to_json.py
+    python3 convert_tex_to_json.py              # incremental (cached) build
+    python3 convert_tex_to_json.py --no-cache   # reparse every file
+    python3 convert_tex_to_json.py --jobs 8     # convert in 8 processes
+    python3 convert_tex_to_json.py --profile --no-cache   # time each stage
 
 This script:
 1. Reads all advent*.tex files in the current directory
 2. Extracts content from \AdventSheetTwoCol macro
 3. Converts LaTeX markup to HTML
 4. Generates public/advent_data.json
+
+Unchanged files are taken from the build cache in .cache/tex2json/v1.
 """
 
 import os
 import re
 import json
+import argparse
+import contextlib
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 
+from build_cache import BuildCache, code_fingerprint
+from parallel_convert import parse_files
+from profiling import (Stage, add_profile_arguments, file_arg_size, finish_profile,
+                       profiler_from_args)
+
+
+DEFAULT_CACHE_DIR = '.cache/tex2json/v1'
+
 
 class LatexToJsonConverter:
     """Converts LaTeX Advent files to JSON format."""
     
+    VERSION = '1.0'
+    
     def __init__(self):
         self.metadata = {
             "year": 2025,
@@ -319,9 +336,33 @@ class LatexToJsonConverter:
         
         return day_data
     
-    def convert_all(self, directory: str = '.') -> Dict[str, Any]:
+    @classmethod
+    def profile_stages(cls) -> List[Stage]:
+        """
+        Functions timed by --profile, one entry per conversion stage.
+        """
+        return [
+            Stage('parse', cls, 'parse_tex_file', file_arg_size),
+            Stage('macro', cls, 'extract_macro_params'),
+            Stage('inline', cls, 'convert_latex_to_html'),
+            Stage('refs', cls, 'extract_references'),
+            Stage('write', cls, 'save_json',
+                  lambda args, result: os.path.getsize(args[2]) if os.path.exists(args[2]) else 0),
+        ]
+    
+    def cache_version(self) -> str:
+        """
+        Converter version for the build cache: declared version + code digest.
+        """
+        return f"{type(self).__name__}-{self.VERSION}+{code_fingerprint(__file__)}"
+    
+    def convert_all(self, directory: str = '.',
+                    cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                    jobs: int = 1) -> Dict[str, Any]:
         """
         Converts all advent*.tex files in the directory.
+        Unchanged files are loaded from the build cache (cache_dir=None disables it);
+        the rest are converted in `jobs` processes (0 = one per CPU).
         """
         # Find all advent*.tex files
         tex_files = []
@@ -333,13 +374,41 @@ class LatexToJsonConverter:
         tex_files.sort()
         print(f"Found {len(tex_files)} advent*.tex files")
         
+        cache = BuildCache(cache_dir, self.cache_version()) if cache_dir else None
+        
+        cached = {}
+        if cache:
+            for filepath in tex_files:
+                day_data = cache.lookup(filepath)
+                if day_data:
+                    cached[filepath] = day_data
+        pending = [f for f in tex_files if f not in cached]
+        converted = {}
+        if jobs != 1 and pending:
+            converted = {r.path: r for r in parse_files(self, pending, jobs)}
+        
         # Parse all files
         days = []
         for filepath in tex_files:
+            if filepath in cached:
+                days.append(cached[filepath])
+                continue
             print(f"Processing {os.path.basename(filepath)}...")
-            day_data = self.parse_tex_file(filepath)
+            result = converted.get(filepath) or parse_files(self, [filepath])[0]
+            if result.output:
+                print(result.output, end='')
+            if result.error:
+                print(f"❌ Error parsing {os.path.basename(filepath)}:\n{result.error}")
+            day_data = result.record
             if day_data:
                 days.append(day_data)
+                if cache:
+                    cache.store(filepath, day_data)
+        
+        if cache:
+            cache.prune(tex_files)
+            cache.save()
+            print(f"Build cache: {cache.hits} cached, {cache.misses} converted")
         
         # Sort by day number
         days.sort(key=lambda d: d['day'])
@@ -370,19 +439,38 @@ def main():
     """
     Main entry point.
     """
+    parser = argparse.ArgumentParser(description="Convert advent*.tex files to JSON")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help="build cache directory (default: %(default)s)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="reparse every file and leave the cache untouched")
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help="worker processes for conversion (0 = one per CPU)")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("LaTeX to JSON Converter for Advent Calendar")
     print("=" * 60)
     print()
     
     converter = LatexToJsonConverter()
+    profiler = profiler_from_args(args, converter)
+    jobs = args.jobs
+    if profiler and jobs != 1:
+        print("Profiling runs in a single process; ignoring --jobs")
+        jobs = 1
     
-    # Convert all files
-    data = converter.convert_all('.')
-    
-    # Save to public/advent_data.json
-    output_path = 'public/advent_data.json'
-    converter.save_json(data, output_path)
+    with profiler or contextlib.nullcontext():
+        # Convert all files
+        data = converter.convert_all('.', cache_dir=None if args.no_cache else args.cache_dir,
+                                     jobs=jobs)
+        
+        # Save to public/advent_data.json
+        output_path = 'public/advent_data.json'
+        converter.save_json(data, output_path)
+    if profiler:
+        finish_profile(profiler, args.profile_output)
     
     print()
     print("=" * 60)
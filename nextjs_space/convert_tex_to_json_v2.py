@@ -9,18 +9,83 @@ Fixes:
 - Complete section title parsing
 - Full LaTeX→HTML conversion
 - Quote environment handling
+- HTML cleanup of content and intro in the same run (html_cleanup.py)
+
+Usage:
+    python3 convert_tex_to_json_v2.py              # incremental (cached) build
+    python3 convert_tex_to_json_v2.py --no-cache   # reparse every file
+    python3 convert_tex_to_json_v2.py --jobs 8     # convert in 8 processes
+    python3 convert_tex_to_json_v2.py --profile --no-cache   # time each stage
+    python3 convert_tex_to_json_v2.py --precompress   # also write .gz/.br siblings
+    python3 convert_tex_to_json_v2.py --katex      # pre-render math (needs node + katex)
+
+Output: public/data/metadata.json, public/data/days/dayNN.json,
+public/data/references.json (or references inlined in every day with
+--inline-references), all of them packed into public/data/days.bundle
+for single-request or Range loading (skip it with --no-bundle) and the
+combined public/advent_data.json (skip it with --no-combined). With
+--chunk-sections a day's content holds only its first section; the
+others go to days/dayNN-K.html, listed in the day's contentChunks.
+With --katex the math is rendered to KaTeX HTML at build time
+(katex_prerender.py) instead of in the browser.
 """
 
 import os
 import re
 import json
-from typing import Dict, List, Any, Optional, Tuple
+import argparse
+import contextlib
+from typing import Dict, List, Any, Optional, Tuple, Union
 from datetime import datetime
 
+import latex_ast
+import latex_inline
+import latex_tokens
+import latex_document
+import katex_prerender
+import html_cleanup
+from build_cache import BuildCache, code_fingerprint
+from fragment_cache import CACHE_FILE, DEFAULT_MAX_BYTES, FragmentCache
+from html_cleanup import clean_html
+from katex_prerender import KatexHtmlRenderer, KatexRenderer, KatexSettings, KatexUnavailable
+from katex_prerender import CACHE_FILE as KATEX_CACHE_FILE
+from latex_document import LatexDocument
+from output_writer import DayShardWriter
+from reference_store import ReferenceStore
+from search_index import SearchIndexBuilder
+from sqlite_export import SqliteExport
+from parallel_convert import iter_parse_files
+from precompress_outputs import precompress
+from profiling import (Stage, add_profile_arguments, file_arg_size, finish_profile,
+                       last_arg_size, profiler_from_args, result_size, written_size)
+from latex_ast import (DayTree, DisplayMath, HtmlRenderer, InlineMath, ItemList, ListItem, Node,
+                       Paragraph, PlainTextRenderer, Quote, Reference, Section, walk)
+from latex_inline import parse_inline
+from latex_tokens import TokenStream, BEGIN, CONTROL, DISPLAY_OPEN, MATH_DISPLAY
+
+DEFAULT_CACHE_DIR = '.cache/tex2json/v2'
+DEFAULT_DATA_DIR = 'public/data'
+# DayTree fields whose HTML the site typesets (title and centralFormula are shown as text)
+MATH_FIELDS = ('subtitle', 'key_insight', 'intro', 'body', 'closing', 'references')
+
+
+def section_groups(blocks: List[Node]) -> List[List[Node]]:
+    """blocks split before every top-level section."""
+    groups: List[List[Node]] = []
+    for block in blocks:
+        if isinstance(block, Section) or not groups:
+            groups.append([])
+        groups[-1].append(block)
+    return groups
+
 
 class RobustLatexConverter:
     """Production-ready LaTeX to JSON converter."""
     
+    VERSION = '2.1'
+    # Attributes that worker processes (--jobs) must share
+    WORKER_OPTIONS = ('chunk_sections', 'katex', 'search_index', 'sqlite_path')
+    
     def __init__(self):
         self.metadata = {
             "year": 2025,
@@ -39,377 +104,287 @@ class RobustLatexConverter:
             "background": "#FEFEFE",
             "text": "#1A1A1A"
         }
+        
+        self.html = HtmlRenderer()
+        self.plain = PlainTextRenderer(math=False)
+        self.fragments = FragmentCache()
+        # Split day bodies at their sections (see section_chunks)
+        self.chunk_sections = False
+        # Pre-render math with KaTeX (see math_html)
+        self.katex: Optional[KatexSettings] = None
+        self._math_html: Optional[KatexHtmlRenderer] = None
+        # Add the plain text of the sections for the search index (see search_sections)
+        self.search_index = False
+        # ... and for the SQLite export to this file (sqlite_export.py)
+        self.sqlite_path: Optional[str] = None
+
+    @property
+    def math_html(self) -> HtmlRenderer:
+        """Renderer for the MATH_FIELDS: KaTeX output if self.katex is set."""
+        if self.katex is None:
+            return self.html
+        if self._math_html is None:
+            self._math_html = KatexHtmlRenderer(KatexRenderer(*self.katex))
+        return self._math_html
+
+    def close(self):
+        """Save the KaTeX cache and stop the KaTeX process (end of a run, worker exit)."""
+        if self._math_html is not None:
+            self._math_html.katex.save()
+            self._math_html.katex.close()
 
     def remove_comments(self, text: str) -> str:
         """Remove LaTeX comments (% lines) BEFORE any other processing."""
-        lines = text.split('\n')
-        cleaned_lines = []
-        for line in lines:
-            # Find the first unescaped %
-            idx = 0
-            while idx < len(line):
-                if line[idx] == '%':
-                    # Check if it's escaped
-                    if idx == 0 or line[idx-1] != '\\':
-                        # This is a comment, truncate the line here
-                        line = line[:idx]
-                        break
-                idx += 1
-            # Only add non-empty lines
-            if line.strip():
-                cleaned_lines.append(line)
-        return '\n'.join(cleaned_lines)
-
-    def extract_macro_params(self, content: str) -> Optional[Dict[str, str]]:
+        return self.as_stream(text).text
+
+    def as_stream(self, source: Union[str, TokenStream]) -> TokenStream:
+        """Comment-free token stream for a string or an already scanned stream."""
+        if isinstance(source, TokenStream):
+            return source.without_comments()
+        return TokenStream(source).without_comments()
+
+    def extract_macro_params(self, content: Union[str, LatexDocument]) -> Optional[Dict[str, str]]:
         """
         Extract parameters from \AdventSheetTwoCol{...}{...}{...}{...}{...}{...}{...}
         Handles nested braces correctly.
         """
-        # First remove all comments
-        content = self.remove_comments(content)
-        
-        # Find the macro
-        macro_pattern = r'\\AdventSheetTwoCol'
-        match = re.search(macro_pattern, content)
-        if not match:
-            return None
-        
-        start_pos = match.end()
-        params = []
-        
-        # Extract 7 parameters
-        for i in range(7):
-            # Skip whitespace
-            while start_pos < len(content) and content[start_pos].isspace():
-                start_pos += 1
-            
-            if start_pos >= len(content) or content[start_pos] != '{':
-                return None
-            
-            # Find matching closing brace
-            brace_count = 0
-            param_start = start_pos + 1
-            pos = start_pos
-            
-            while pos < len(content):
-                if content[pos] == '{':
-                    brace_count += 1
-                elif content[pos] == '}':
-                    brace_count -= 1
-                    if brace_count == 0:
-                        params.append(content[param_start:pos].strip())
-                        start_pos = pos + 1
-                        break
-                pos += 1
-        
-        if len(params) != 7:
+        params = LatexDocument.of(content).macro_params
+        if params is None:
             return None
-        
-        return {
-            'intro': params[0],
-            'day_type': params[1],
-            'day_special': params[2],
-            'central_formula': params[3],
-            'dependencies': params[4],
-            'body': params[5],
-            'closing': params[6]
-        }
+        return {name: stream.text for name, stream in params.items()}
 
-    def parse_section_title(self, text: str) -> Tuple[str, str]:
+    def parse_section_title(self, text: Union[str, TokenStream]) -> Tuple[str, str]:
         """
         Parse \section*{...} and return (title, remaining_text).
-        Handles complex titles with $...$, subscripts, etc.
+        Handles complex titles with $...$, subscripts, nested groups, etc.
         """
-        pattern = r'\\section\*\{([^}]+(?:\{[^}]*\}[^}]*)*)\}'
-        match = re.search(pattern, text)
-        if match:
-            title = match.group(1).strip()
-            remaining = text[match.end():].strip()
-            return title, remaining
-        return "", text
+        stream = text if isinstance(text, TokenStream) else TokenStream(text)
+        span = self.section_title_span(stream)
+        if span is None:
+            return "", stream.text
+        start, end = span
+        return stream.text[start:end].strip(), stream.text[end+1:].strip()
+
+    def section_title_span(self, stream: TokenStream) -> Optional[Tuple[int, int]]:
+        """Span of the title of the first complete \section*{...} in stream."""
+        tok = stream.next_token(0, (CONTROL,), ('section*',))
+        while tok is not None:
+            brace_pos = stream.skip_space(tok.end)
+            close_brace = stream.matching_brace(brace_pos)
+            if close_brace > 0:
+                return brace_pos + 1, close_brace
+            tok = stream.next_token(tok.end, (CONTROL,), ('section*',))
+        return None
 
     def latex_to_html(self, text: str) -> str:
         """
         Convert LaTeX markup to HTML.
         Comprehensive conversion including all common commands.
         """
-        if not text:
-            return ""
-        
-        # Remove leading/trailing whitespace
-        text = text.strip()
-        
-        # Convert simple math expressions with subscripts to Unicode
-        # Handles: G$_2$, F$_4$, $G_2$, $F_4$, etc.
-        subscript_map = {'0': '₀', '1': '₁', '2': '₂', '3': '₃', '4': '₄',
-                        '5': '₅', '6': '₆', '7': '₇', '8': '₈', '9': '₉'}
-        
-        # Pattern 1: G$_2$ or F$_4$ (letter outside math mode)
-        def replace_math_subscript_1(match):
-            letter = match.group(1)
-            num = match.group(2)
-            return letter + subscript_map.get(num, num)
-        text = re.sub(r'([A-Za-z])\$_\{?(\d+)\}?\$', replace_math_subscript_1, text)
-        
-        # Pattern 2: $G_2$ or $F_4$ (letter inside math mode)
-        def replace_math_subscript_2(match):
-            letter = match.group(1)
-            num = match.group(2)
-            return letter + subscript_map.get(num, num)
-        text = re.sub(r'\$([A-Za-z])_\{?(\d+)\}?\$', replace_math_subscript_2, text)
-        
-        # Pattern 3: Just $_2$ (subscript only)
-        def replace_math_subscript_3(match):
-            num = match.group(1)
-            return subscript_map.get(num, num)
-        text = re.sub(r'\$_\{?(\d+)\}?\$', replace_math_subscript_3, text)
-        
-        # Convert $^N$ (inline math superscripts) to Unicode
-        superscript_map = {'0': '⁰', '1': '¹', '2': '²', '3': '³', '4': '⁴',
-                          '5': '⁵', '6': '⁶', '7': '⁷', '8': '⁸', '9': '⁹',
-                          '+': '⁺', '-': '⁻'}
-        def replace_math_superscript(match):
-            content = match.group(1)
-            return ''.join(superscript_map.get(c, c) for c in content)
-        text = re.sub(r'\$\^\{?(\d+)\}?\$', replace_math_superscript, text)
-        
-        # Convert \textbf{} to <strong>
-        text = re.sub(r'\\textbf\{([^}]+)\}', r'<strong>\1</strong>', text)
-        
-        # Convert \emph{} to <em>
-        text = re.sub(r'\\emph\{([^}]+)\}', r'<em>\1</em>', text)
-        
-        # Convert \textit{} to <em>
-        text = re.sub(r'\\textit\{([^}]+)\}', r'<em>\1</em>', text)
-        
-        # Convert \textsubscript{} to Unicode subscripts
-        def replace_subscript(match):
-            content = match.group(1)
-            return ''.join(subscript_map.get(c, c) for c in content)
-        text = re.sub(r'\\textsubscript\{([^}]+)\}', replace_subscript, text)
-        
-        # Convert \textsuperscript{} to Unicode superscripts
-        def replace_superscript(match):
-            content = match.group(1)
-            return ''.join(superscript_map.get(c, c) for c in content)
-        text = re.sub(r'\\textsuperscript\{([^}]+)\}', replace_superscript, text)
-        
-        # Convert LaTeX quotes
-        text = text.replace('``', '"').replace("''", '"')
-        
-        # Convert -- and --- to proper dashes
-        text = text.replace('---', '—').replace('--', '–')
-        
-        # Convert \\ to <br>
-        text = text.replace('\\\\', '<br>')
-        
-        # Handle escaped characters
-        text = text.replace('\\_', '_')
-        text = text.replace('\\&', '&')
-        text = text.replace('\\%', '%')
-        text = text.replace('\\$', '$')
-        
-        # Handle special characters with backslash
-        text = re.sub(r'\\"([a-zA-Z])', lambda m: {'a': 'ä', 'o': 'ö', 'u': 'ü', 'A': 'Ä', 'O': 'Ö', 'U': 'Ü'}.get(m.group(1), m.group(0)), text)
-        
-        return text
+        return self.html.render(self.parse_inline(text))
+
+    def parse_inline(self, text: str) -> List[Node]:
+        """Inline LaTeX → inline nodes (see latex_ast), memoized per fragment."""
+        return self.fragments.get(text, parse_inline)
 
-    def find_matching_brace(self, text: str, start_pos: int) -> int:
+    def find_matching_brace(self, text: Union[str, TokenStream], start_pos: int) -> int:
         """Find the position of the matching closing brace."""
-        if start_pos >= len(text) or text[start_pos] != '{':
-            return -1
-        
-        count = 0
-        pos = start_pos
-        while pos < len(text):
-            if text[pos] == '{':
-                count += 1
-            elif text[pos] == '}':
-                count -= 1
-                if count == 0:
-                    return pos
-            pos += 1
-        return -1
-
-    def process_body_content(self, body: str) -> str:
+        if not isinstance(text, TokenStream):
+            text = TokenStream(text)
+        return text.matching_brace(start_pos)
+
+    def process_body_content(self, body: Union[str, TokenStream]) -> str:
         """
-        Process the main body content - OPTIMIZED VERSION.
-        Handles sections, lists, quotes, and paragraphs.
+        Process the main body content.
+        Handles sections, lists, quotes, display math and paragraphs in a
+        single linear pass over the token stream.
         """
         if not body:
             return ""
         
+        return self.html.render_blocks(self.parse_body_content(body))
+
+    def parse_body_content(self, body: Union[str, TokenStream]) -> List[Node]:
+        """Block nodes of a body or intro argument."""
+        if not body:
+            return []
+        
         # Remove comments first
-        body = self.remove_comments(body)
+        stream = self.as_stream(body)
+        return self.parse_blocks(stream, 0, len(stream.text))
+
+    def parse_blocks(self, stream: TokenStream, start: int, end: int) -> List[Node]:
+        """
+        Block nodes for stream.text[start:end].
+
+        Every token is visited a bounded number of times: block closers come
+        from the precomputed stream.block_pairs(), and the paragraph scan
+        resumes where the previous block ended.
+        """
+        body = stream.text
+        tokens = stream.tokens
+        n_tokens = len(tokens)
+        pairs = stream.block_pairs()
         
-        html_parts = []
-        pos = 0
-        max_iterations = 1000  # Safety limit
-        iterations = 0
+        blocks = []
+        pos = start
+        ti = stream.index_from(start)
         
-        while pos < len(body) and iterations < max_iterations:
-            iterations += 1
-            
+        while True:
             # Skip whitespace
-            while pos < len(body) and body[pos].isspace():
-                pos += 1
-            
-            if pos >= len(body):
+            pos = stream.skip_space(pos)
+            if pos >= end:
                 break
+            while ti < n_tokens and tokens[ti].start < pos:
+                ti += 1
+            tok = tokens[ti] if ti < n_tokens and tokens[ti].start == pos else None
+            closer = pairs.get(ti) if tok is not None else None
+            if closer is not None and tokens[closer].end > end:
+                closer = None
             
-            # Check for \section*{
-            if body[pos:pos+9] == '\\section*':
-                # Find the opening brace
-                brace_pos = body.find('{', pos)
-                if brace_pos > pos:
-                    # Find matching closing brace
-                    close_brace = self.find_matching_brace(body, brace_pos)
-                    if close_brace > 0:
-                        title = body[brace_pos+1:close_brace]
-                        title_html = self.latex_to_html(title)
-                        html_parts.append(f'<h3>{title_html}</h3>')
-                        pos = close_brace + 1
-                        continue
-            
-            # Check for \begin{quote}
-            if body[pos:pos+13] == '\\begin{quote}':
-                end_pos = body.find('\\end{quote}', pos)
-                if end_pos > pos:
-                    quote_content = body[pos+13:end_pos].strip()
-                    quote_html = self.latex_to_html(quote_content)
-                    html_parts.append(f'<blockquote>{quote_html}</blockquote>')
-                    pos = end_pos + 11
+            # \section*{...}
+            if tok is not None and tok.kind == CONTROL and tok.name == 'section*':
+                brace_pos = stream.skip_space(tok.end)
+                close_brace = stream.matching_brace(brace_pos)
+                if 0 < close_brace < end:
+                    title = body[brace_pos+1:close_brace]
+                    blocks.append(Section(self.parse_inline(title)))
+                    pos = close_brace + 1
                     continue
             
-            # Check for \begin{enumerate}
-            if body[pos:pos+17] == '\\begin{enumerate}':
-                end_pos = body.find('\\end{enumerate}', pos)
-                if end_pos > pos:
-                    items_content = body[pos+17:end_pos]
-                    # Split by \item
-                    items = []
-                    item_pos = 0
-                    while True:
-                        item_start = items_content.find('\\item', item_pos)
-                        if item_start < 0:
-                            break
-                        next_item = items_content.find('\\item', item_start + 5)
-                        if next_item < 0:
-                            items.append(items_content[item_start+5:].strip())
-                            break
-                        else:
-                            items.append(items_content[item_start+5:next_item].strip())
-                            item_pos = next_item
-                    
-                    html_parts.append('<ol>')
-                    for item in items:
-                        item_html = self.latex_to_html(item)
-                        html_parts.append(f'  <li>{item_html}</li>')
-                    html_parts.append('</ol>')
-                    pos = end_pos + 15
+            elif tok is not None and tok.kind == BEGIN and closer is not None:
+                end_tok = tokens[closer]
+                
+                # \begin{quote}
+                if tok.name == 'quote':
+                    quote_content = body[tok.end:end_tok.start].strip()
+                    blocks.append(Quote(self.parse_inline(quote_content)))
+                    pos = end_tok.end
                     continue
-            
-            # Check for \begin{itemize}
-            if body[pos:pos+15] == '\\begin{itemize}':
-                end_pos = body.find('\\end{itemize}', pos)
-                if end_pos > pos:
-                    items_content = body[pos+15:end_pos]
-                    # Split by \item
-                    items = []
-                    item_pos = 0
-                    while True:
-                        item_start = items_content.find('\\item', item_pos)
-                        if item_start < 0:
-                            break
-                        next_item = items_content.find('\\item', item_start + 5)
-                        if next_item < 0:
-                            items.append(items_content[item_start+5:].strip())
-                            break
-                        else:
-                            items.append(items_content[item_start+5:next_item].strip())
-                            item_pos = next_item
-                    
-                    html_parts.append('<ul>')
-                    for item in items:
-                        item_html = self.latex_to_html(item)
-                        html_parts.append(f'  <li>{item_html}</li>')
-                    html_parts.append('</ul>')
-                    pos = end_pos + 13
+                
+                # \begin{enumerate} / \begin{itemize}
+                if tok.name in ('enumerate', 'itemize'):
+                    items = self.parse_list_items(stream, ti, closer)
+                    blocks.append(ItemList(tok.name == 'enumerate', items))
+                    pos = end_tok.end
                     continue
             
-            # Check for display math \[ ... \]
-            if body[pos:pos+2] == '\\[':
-                end_pos = body.find('\\]', pos + 2)
-                if end_pos > pos:
-                    math_content = body[pos+2:end_pos].strip()
-                    html_parts.append(f'<p>\\[{math_content}\\]</p>')
-                    pos = end_pos + 2
-                    continue
+            # Display math \[ ... \] and $$ ... $$
+            elif tok is not None and tok.kind in (DISPLAY_OPEN, MATH_DISPLAY) and closer is not None:
+                end_tok = tokens[closer]
+                math_content = body[tok.end:end_tok.start].strip()
+                blocks.append(DisplayMath(math_content))
+                pos = end_tok.end
+                continue
             
-            # Check for display math $$ ... $$
-            if body[pos:pos+2] == '$$':
-                end_pos = body.find('$$', pos + 2)
-                if end_pos > pos:
-                    math_content = body[pos+2:end_pos].strip()
-                    html_parts.append(f'<p>\\[{math_content}\\]</p>')
-                    pos = end_pos + 2
-                    continue
-            
-            # Regular paragraph - find next structural element
-            # Look for next structure within reasonable distance
-            search_end = min(pos + 5000, len(body))
-            next_section = body.find('\\section*', pos + 1, search_end)
-            next_begin = body.find('\\begin{', pos + 1, search_end)
-            next_math1 = body.find('\\[', pos + 1, search_end)
-            next_math2 = body.find('$$', pos + 1, search_end)
-            
-            # Find the nearest
-            next_positions = [p for p in [next_section, next_begin, next_math1, next_math2] if p > 0]
-            if next_positions:
-                next_pos = min(next_positions)
-            else:
-                next_pos = len(body)
+            # Regular paragraph - runs to the next structural element. An
+            # environment we do not render (eqnarray*, ...) stays in one piece.
+            k = ti + 1 if tok is not None else ti
+            if tok is not None and tok.kind == BEGIN and closer is not None:
+                k = closer + 1
+            next_pos = end
+            while k < n_tokens and tokens[k].start < end:
+                t = tokens[k]
+                if t.kind in (BEGIN, DISPLAY_OPEN, MATH_DISPLAY) or \
+                        (t.kind == CONTROL and t.name == 'section*'):
+                    next_pos = t.start
+                    break
+                k += 1
             
             para = body[pos:next_pos].strip()
             if para:
-                para_html = self.latex_to_html(para)
-                html_parts.append(f'<p>{para_html}</p>')
+                blocks.append(Paragraph(self.parse_inline(para)))
             
             pos = next_pos
+            ti = k
         
-        if iterations >= max_iterations:
-            print(f"Warning: Reached max iterations in process_body_content")
-        
-        return '\n'.join(html_parts)
+        return blocks
+
+    def parse_list_items(self, stream: TokenStream, begin: int, end: int) -> List[ListItem]:
+        """
+        ListItem nodes for the \item entries of the list environment whose
+        \begin/\end tokens are at indices begin and end. Items of nested
+        environments belong to their own list, which is parsed into the
+        enclosing item.
+        """
+        tokens = stream.tokens
+        pairs = stream.block_pairs()
+        items = []
+        nested = set()
+        k = begin + 1
+        while k < end:
+            t = tokens[k]
+            if t.kind == CONTROL and t.name == 'item':
+                items.append(k)
+            elif t.kind == BEGIN and k in pairs and pairs[k] < end:
+                if t.name in ('quote', 'enumerate', 'itemize') and items:
+                    nested.add(items[-1])
+                k = pairs[k]
+            k += 1
+        
+        parsed = []
+        for i, k in enumerate(items):
+            item_start = tokens[k].end
+            item_end = tokens[items[i + 1]].start if i + 1 < len(items) else tokens[end].start
+            if k in nested:
+                parsed.append(ListItem(self.parse_blocks(stream, item_start, item_end)))
+            else:
+                text = stream.text[item_start:item_end].strip()
+                parsed.append(ListItem([Paragraph(self.parse_inline(text))]))
+        return parsed
 
-    def extract_references(self, content: str) -> List[Dict[str, str]]:
+    def extract_references(self, content: Union[str, LatexDocument]) -> List[Dict[str, str]]:
         """
         Extract bibliography items from \begin{thebibliography}...\end{thebibliography}
         """
-        # Remove comments first
-        content = self.remove_comments(content)
+        return self.render_references(self.parse_references(content))
+
+    def render_references(self, references: List[Reference],
+                          html: Optional[HtmlRenderer] = None) -> List[Dict[str, str]]:
+        """Reference nodes → the {'key', 'text'} entries of the day JSON."""
+        html = html or self.html
+        rendered = []
+        for ref in references:
+            text = html.render(ref.children)
+            # Remove any trailing thebibliography commands
+            text = re.sub(r'\s*\\end\{thebibliography\}.*$', '', text)
+            text = re.sub(r'\s*thebibliography.*$', '', text)
+            rendered.append({
+                'key': ref.key,
+                'text': text.strip()
+            })
+        return rendered
+
+    def parse_references(self, content: Union[str, LatexDocument]) -> List[Reference]:
+        """Reference nodes for the \bibitem entries of the bibliography."""
+        doc = LatexDocument.of(content)
+        stream = doc.stream
         
         # Find bibliography section
-        bib_match = re.search(r'\\begin\{thebibliography\}.*?\\end\{thebibliography\}', content, re.DOTALL)
-        if not bib_match:
+        span = doc.bibliography_span
+        if span is None:
             return []
+        text_of = stream.text
+        bib_start, bib_end = span
         
-        bib_content = bib_match.group(0)
-        
-        # Extract individual items
-        items = re.findall(r'\\bibitem\{([^}]+)\}\s*([^\\]+(?:\\[^b][^\\]*)*)', bib_content)
+        # An entry runs from its key to the next \b... command (usually the
+        # next \bibitem) or to the end of the environment.
+        bounds = [t for t in stream.tokens[stream.index_from(bib_start):stream.index_from(bib_end)]
+                  if t.kind == BEGIN or (t.kind == CONTROL and t.name.startswith('b'))]
         
         references = []
-        for key, text in items:
-            # Clean up the text
-            text = self.latex_to_html(text.strip())
-            # Remove any trailing thebibliography commands
-            text = re.sub(r'\s*\\end\{thebibliography\}.*$', '', text)
-            text = re.sub(r'\s*thebibliography.*$', '', text)
-            references.append({
-                'key': key.strip(),
-                'text': text.strip()
-            })
+        for i, tok in enumerate(bounds):
+            if tok.kind != CONTROL or tok.name != 'bibitem' or text_of[tok.end:tok.end+1] != '{':
+                continue
+            key_end = text_of.find('}', tok.end + 1, bib_end)
+            if key_end <= tok.end + 1:
+                continue
+            key = text_of[tok.end+1:key_end]
+            text_end = bounds[i + 1].start if i + 1 < len(bounds) else bib_end
+            if text_end <= key_end + 1 or text_of[key_end+1] == '\\':
+                continue
+            text = text_of[key_end+1:text_end].strip()
+            references.append(Reference(key.strip(), self.parse_inline(text)))
         
         return references
 
@@ -446,29 +421,56 @@ class RobustLatexConverter:
         Parse a single .tex file and return day data.
         """
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
+            doc = LatexDocument.from_file(filepath)
         except Exception as e:
             print(f"Error reading {filepath}: {e}")
             return None
         
-        # Extract macro parameters
-        params = self.extract_macro_params(content)
-        if not params:
+        tree = self.build_day_tree(doc, self.get_day_number(os.path.basename(filepath)))
+        if tree is None:
             print(f"Warning: Could not extract macro from {filepath}")
             return None
-        
-        # Get day number
-        day_num = self.get_day_number(os.path.basename(filepath))
+        return self.render_day(tree)
+
+    def build_day_tree(self, doc: LatexDocument, day_num: int) -> Optional[DayTree]:
+        """
+        Parse every field of one day once; all outputs are rendered from
+        the returned tree.
+        """
+        # Extract macro parameters
+        streams = doc.macro_params
+        if not streams:
+            return None
+        params = {name: param.text for name, param in streams.items()}
+        
+        # Title of the day: the title of the first section
+        title = None
+        span = self.section_title_span(streams['body'])
+        if span is not None:
+            title = self.parse_inline(streams['body'].text[span[0]:span[1]])
+        
+        return DayTree(
+            day=day_num,
+            params=params,
+            title=title,
+            subtitle=self.parse_inline(params['day_type']),
+            key_insight=self.parse_inline(params['dependencies']),
+            central_formula=self.parse_inline(params['central_formula']),
+            closing=self.parse_inline(params['closing']),
+            intro=self.parse_body_content(streams['intro']),
+            body=self.parse_body_content(streams['body']),
+            references=self.parse_references(doc),
+        )
+
+    def render_day(self, tree: DayTree) -> Dict[str, Any]:
+        """The day JSON record for a parsed day."""
+        day_num = tree.day
+        params = tree.params
         iso_date, display_date = self.get_date_for_day(day_num)
-        
-        # Extract title from body (first line after comments)
-        body_clean = self.remove_comments(params['body'])
-        title = ""
-        # Try to find title in first section
-        title_match = re.search(r'\\section\*\{([^}]+)\}', body_clean)
-        if title_match:
-            title = self.latex_to_html(title_match.group(1))
+        title = self.html.render(tree.title) if tree.title is not None else ""
+        html = self.math_html
+        if isinstance(html, KatexHtmlRenderer):
+            html.prepare_day(tree, MATH_FIELDS)
         
         # Build day data
         day_data = {
@@ -476,60 +478,284 @@ class RobustLatexConverter:
             'date': iso_date,
             'dateDisplay': display_date,
             'title': title or f"Day {day_num}",
-            'subtitle': self.latex_to_html(params['day_type']),
-            'keyInsight': self.latex_to_html(params['dependencies']),
-            'content': self.process_body_content(params['body']),
-            'closing': self.latex_to_html(params['closing']),
+            'subtitle': html.render(tree.subtitle),
+            'keyInsight': html.render(tree.key_insight),
+        }
+        if self.chunk_sections:
+            chunks = self.section_chunks(tree.body, html)
+            day_data['content'] = chunks[0]['html'] if chunks else ''
+            day_data['contentChunks'] = chunks
+        else:
+            day_data['content'] = clean_html(html.render_blocks(tree.body))
+        day_data.update({
+            'closing': html.render(tree.closing).strip(),
             'type': params['day_type'],
             'special': params['day_special'],
-            'centralFormula': self.latex_to_html(params['central_formula']),
+            'centralFormula': self.html.render(tree.central_formula),
             'dependencies': params['dependencies'],
             'isLocked': day_num > 3,  # Days after today are locked
-            'references': self.extract_references(content),
-            'intro': self.process_body_content(params['intro'])
-        }
-        
+            'references': self.render_references(tree.references, html),
+            'intro': clean_html(html.render_blocks(tree.intro))
+        })
+        if self.search_index or self.sqlite_path:
+            day_data['searchText'] = self.search_sections(tree)
         return day_data
 
-    def convert_all(self, output_path: str = 'public/advent_data.json'):
+    def section_chunks(self, blocks: List[Node],
+                       html: Optional[HtmlRenderer] = None) -> List[Dict[str, Any]]:
+        """
+        The body split before every top-level section: one {'title', 'size',
+        'html'} per chunk, title and size (UTF-8 bytes) of the HTML for the
+        table of contents. Joined with '\n' the chunks give the full content.
+        """
+        html_renderer = html or self.html
+        chunks = []
+        for group in section_groups(blocks):
+            html = clean_html(html_renderer.render_blocks(group))
+            title = self.html.render(group[0].title) if isinstance(group[0], Section) else ''
+            chunks.append({'title': title, 'size': len(html.encode('utf-8')), 'html': html})
+        return chunks
+
+    def search_sections(self, tree: DayTree) -> List[Dict[str, Any]]:
+        """
+        Plain text of the day for search_index.py and sqlite_export.py, one
+        {'title', 'text', 'formulas'} per section: the heading part (title,
+        subtitle, key insight, intro), the body groups of section_chunks,
+        then the closing. formulas are the [source, display] of its math.
+        """
+        plain = self.plain
+        heading = [tree.title or [], tree.subtitle, tree.key_insight]
+        text = [plain.render(nodes) for nodes in heading] + [plain.render_blocks(tree.intro)]
+        sections = [{'title': '', 'text': '\n\n'.join(text),
+                     'formulas': self.formulas(sum(heading, []) + tree.intro)}]
+        for group in section_groups(tree.body):
+            title = plain.render(group[0].title) if isinstance(group[0], Section) else ''
+            sections.append({'title': title, 'text': plain.render_blocks(group),
+                             'formulas': self.formulas(group)})
+        sections.append({'title': '', 'text': plain.render(tree.closing),
+                         'formulas': self.formulas(tree.closing)})
+        return sections
+
+    def formulas(self, nodes: List[Node]) -> List[List[Any]]:
+        """[source, display] of every formula in nodes, in order."""
+        found = []
+        for node in walk(nodes):
+            if isinstance(node, InlineMath):
+                found.append([self.html.render(node.children), node.display])
+            elif isinstance(node, DisplayMath):
+                found.append([node.source, True])
+        return found
+
+    @classmethod
+    def profile_stages(cls) -> List[Stage]:
+        """Functions timed by --profile, one entry per conversion stage."""
+        return [
+            Stage('parse', cls, 'parse_tex_file', file_arg_size),
+            Stage('read', LatexDocument, 'from_file', result_size),
+            Stage('strip', TokenStream, 'without_comments'),
+            Stage('macro', TokenStream, 'macro_arguments'),
+            Stage('body', cls, 'parse_blocks'),
+            Stage('inline', cls, 'parse_inline'),
+            Stage('refs', cls, 'parse_references'),
+            Stage('render', cls, 'render_day'),
+            Stage('write', DayShardWriter, 'write_text', last_arg_size),
+            # close() writes the shared files through write_text; its self time
+            # is the combined file, so it is a stage of its own, not more 'write'
+            Stage('combine', DayShardWriter, 'close', written_size),
+        ]
+
+    def cache_version(self) -> str:
+        """Converter version for the build cache: declared version + code digest."""
+        code = code_fingerprint(__file__, latex_tokens.__file__, latex_inline.__file__,
+                                latex_document.__file__, latex_ast.__file__,
+                                html_cleanup.__file__)
+        chunked = '+chunked' if self.chunk_sections else ''
+        search = '+search' if self.search_index or self.sqlite_path else ''
+        katex = self.math_html.katex.marker() if self.katex else ''
+        if katex:
+            katex += '-' + code_fingerprint(katex_prerender.__file__)
+        return f"{type(self).__name__}-{self.VERSION}+{code}{chunked}{search}{katex}"
+
+    def convert_all(self, output_path: Optional[str] = 'public/advent_data.json',
+                    cache_dir: Optional[str] = DEFAULT_CACHE_DIR, jobs: int = 1,
+                    data_dir: str = DEFAULT_DATA_DIR, inline_references: bool = False,
+                    bundle: bool = True, records: Optional[Dict[str, Dict[str, Any]]] = None,
+                    hashed_names: bool = False):
         """
         Convert all advent*.tex files to JSON.
+        
+        Writes data_dir/metadata.json and one data_dir/days/dayNN.json per day
+        as soon as that day is converted; output_path (the combined
+        advent_data.json) is optional. Unchanged files are loaded from the
+        build cache (cache_dir=None disables it); the rest are converted in
+        `jobs` processes (0 = one per CPU). With a cache_dir, parsed inline
+        fragments are also kept there between runs (fragment_cache.py).
+        Bibliography entries are written once to data_dir/references.json
+        and referenced by key from the days, unless inline_references;
+        with bundle, everything is also packed into data_dir/days.bundle.
+        KaTeX output is cached in cache_dir as well. records holds days
+        already converted elsewhere (build_pipeline.py), by .tex file name.
+        With hashed_names, the files are also written under content-hashed
+        names listed in manifest.json next to data_dir (asset_manifest.py).
+        With self.search_index, data_dir/search holds the full-text index
+        of all days (search_index.py); with self.sqlite_path, the days are
+        also loaded into that SQLite database (sqlite_export.py).
         """
         # Find all advent*.tex files
         tex_files = [f for f in os.listdir('.') if re.match(r'advent\d+\.tex', f)]
         tex_files.sort()
+        order = {tex_file: i for i, tex_file in enumerate(tex_files)}
         
         print(f"Found {len(tex_files)} .tex files")
         
-        days = []
+        if self.katex and cache_dir and not self.katex.cache_path:
+            self.katex = self.katex._replace(cache_path=os.path.join(cache_dir, KATEX_CACHE_FILE))
+            self._math_html = None
+        if self.katex:
+            # Fails here, before any output, if KaTeX is missing and there is no fallback
+            self.math_html.katex.start()
+        cache = BuildCache(cache_dir, self.cache_version()) if cache_dir else None
+        if cache_dir:
+            self.fragments = FragmentCache(self.fragments.max_bytes,
+                                           os.path.join(cache_dir, CACHE_FILE),
+                                           self.cache_version())
+        references = None if inline_references else ReferenceStore()
+        search = SearchIndexBuilder() if self.search_index else None
+        sqlite = SqliteExport(self.sqlite_path, self.metadata['year']) if self.sqlite_path else None
+        writer = DayShardWriter(data_dir, combined_path=output_path, references=references,
+                                bundle=bundle, hashed_names=hashed_names, search=search,
+                                sqlite=sqlite)
+        writer.write_metadata(self.metadata, self.color_scheme)
+        
+        pending = []
         for tex_file in tex_files:
-            print(f"Processing {tex_file}...")
-            day_data = self.parse_tex_file(tex_file)
+            if records and tex_file in records:
+                day_data = records[tex_file]
+            else:
+                day_data = cache.lookup(tex_file) if cache else None
+            if day_data:
+                writer.write_day(day_data, order[tex_file])
+                print(f"  ✓ Day {day_data['day']}: {day_data['title']} (cached)")
+            else:
+                pending.append(tex_file)
+        
+        if jobs != 1 and len(pending) > 1:
+            print(f"Converting {len(pending)} files in parallel...")
+        for result in iter_parse_files(self, pending, jobs):
+            print(f"Processing {result.path}...")
+            if result.output:
+                print(result.output, end='')
+            day_data = result.record
             if day_data:
-                days.append(day_data)
+                writer.write_day(day_data, order[result.path])
+                if cache:
+                    cache.store(result.path, day_data)
                 print(f"  ✓ Day {day_data['day']}: {day_data['title']}")
+            elif result.error:
+                print(f"  ✗ Failed to parse {result.path}:\n{result.error}")
             else:
-                print(f"  ✗ Failed to parse {tex_file}")
-        
-        # Sort by day number
-        days.sort(key=lambda x: x['day'])
-        
-        # Build final JSON structure
-        output_data = {
-            'metadata': self.metadata,
-            'colorScheme': self.color_scheme,
-            'days': days
-        }
-        
-        # Write to file
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, indent=2, ensure_ascii=False)
-        
-        print(f"\n✓ Successfully wrote {len(days)} days to {output_path}")
-        print(f"  File size: {os.path.getsize(output_path)} bytes")
+                print(f"  ✗ Failed to parse {result.path}")
+        
+        if cache:
+            cache.prune(tex_files)
+            cache.save()
+            print(f"Build cache: {cache.hits} cached, {cache.misses} converted")
+        self.fragments.save()
+        if jobs == 1 and self.fragments.hits + self.fragments.misses:
+            print(self.fragments.summary())
+        if self._math_html is not None:
+            self.close()
+            katex = self._math_html.katex
+            if katex.version is None or (jobs == 1 and katex.rendered + katex.cached):
+                print(katex.summary())
+        
+        print(f"\n✓ Successfully wrote {writer.day_count} days to {writer.days_dir}")
+        combined = writer.close()
+        if references is not None:
+            print(f"✓ {references.count} references in {writer.references_path}")
+            for key, days in references.conflicts().items():
+                print(f"  ⚠ Reference {key} has {len(days)} different texts "
+                      f"(days {'; '.join(', '.join(map(str, d)) for d in days)})")
+        if sqlite is not None:
+            print(f"✓ {sqlite.days} days in {sqlite.close()}")
+        if search is not None:
+            print(f"✓ Search index in {writer.search_dir} ({search.section_count} sections)")
+        if writer.bundle_path:
+            print(f"✓ Bundle {writer.bundle_path} ({os.path.getsize(writer.bundle_path)} bytes)")
+        if combined:
+            print(f"✓ Combined file {output_path}")
+            print(f"  File size: {os.path.getsize(output_path)} bytes")
+        if writer.hashed_names:
+            print(f"✓ Hashed names in {writer.manifest.path}")
+        print(f"✓ Output: {writer.output.summary()}")
 
 
-if __name__ == '__main__':
+def main():
+    parser = argparse.ArgumentParser(description="Convert advent*.tex files to JSON")
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR,
+                        help="metadata.json and days/dayNN.json go here (default: %(default)s)")
+    parser.add_argument('--output', default='public/advent_data.json',
+                        help="combined JSON output (default: %(default)s)")
+    parser.add_argument('--no-combined', action='store_true',
+                        help="only write the per-day files, not the combined JSON")
+    parser.add_argument('--no-bundle', action='store_true',
+                        help="do not write the packed days.bundle")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help="build cache directory (default: %(default)s)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="reparse every file and leave the cache untouched")
+    parser.add_argument('--fragment-cache-mb', type=float, default=DEFAULT_MAX_BYTES / (1 << 20),
+                        help="size limit of the inline fragment cache in MB (default: %(default)s)")
+    parser.add_argument('--inline-references', action='store_true',
+                        help="copy reference texts into every day instead of references.json")
+    parser.add_argument('--chunk-sections', action='store_true',
+                        help="split day contents at their sections for progressive loading")
+    parser.add_argument('--search-index', action='store_true',
+                        help="write the full-text search index to DATA_DIR/search (search_index.py)")
+    parser.add_argument('--sqlite', metavar='FILE',
+                        help="also load the days into this SQLite database (sqlite_export.py)")
+    parser.add_argument('--katex', action='store_true',
+                        help="pre-render math with the KaTeX from node_modules")
+    parser.add_argument('--katex-fallback', action='store_true',
+                        help="with --katex, keep the LaTeX source if node or KaTeX is missing")
+    parser.add_argument('--katex-options', type=json.loads, default={},
+                        help="KaTeX options as JSON, e.g. '{\"output\": \"html\"}'")
+    parser.add_argument('--hashed-names', action='store_true',
+                        help="also write the files under content-hashed names, with manifest.json")
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help="worker processes for conversion (0 = one per CPU)")
+    parser.add_argument('--precompress', action='store_true',
+                        help="write precompressed siblings of the outputs (precompress_outputs.py)")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    
     converter = RobustLatexConverter()
-    converter.convert_all()
+    converter.fragments = FragmentCache(int(args.fragment_cache_mb * (1 << 20)))
+    converter.chunk_sections = args.chunk_sections
+    converter.search_index = args.search_index
+    converter.sqlite_path = args.sqlite
+    if args.katex:
+        converter.katex = KatexSettings(options=args.katex_options, fallback=args.katex_fallback)
+    profiler = profiler_from_args(args, converter)
+    jobs = args.jobs
+    if profiler and jobs != 1:
+        print("Profiling runs in a single process; ignoring --jobs")
+        jobs = 1
+    with profiler or contextlib.nullcontext():
+        try:
+            converter.convert_all(None if args.no_combined else args.output,
+                                  cache_dir=None if args.no_cache else args.cache_dir,
+                                  jobs=jobs, data_dir=args.data_dir,
+                                  inline_references=args.inline_references,
+                                  bundle=not args.no_bundle, hashed_names=args.hashed_names)
+        except KatexUnavailable as e:
+            raise SystemExit(f"✗ {e} (run yarn install, or add --katex-fallback)")
+    if profiler:
+        finish_profile(profiler, args.profile_output)
+    if args.precompress:
+        print()
+        precompress([args.data_dir] + ([] if args.no_combined else [args.output]))
+
+
+if __name__ == '__main__':
+    main()
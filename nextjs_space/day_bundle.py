@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Packed bundle of all day files with a byte-offset index.
+
+public/data/days.bundle holds metadata.json, references.json (if any) and
+every days/dayNN.json back to back, so a client can fetch everything in
+one request, or a single day with an HTTP Range request:
+
+    bytes 0-7     magic b'ADVBNDL1'
+    bytes 8-15    length of the header, 8 ASCII decimal digits
+    header        UTF-8 JSON:
+                  {"format": 1,
+                   "metadata": [offset, length],
+                   "references": [offset, length],      (optional)
+                   "days": {"0": [offset, length], ...}}
+    data          the files' bytes, unchanged, each followed by '\\n'
+
+Offsets count from the start of the data section, i.e. from byte
+16 + header length. Each part decodes to exactly the JSON of the file it
+was packed from.
+
+DayShardWriter.write_bundle() packs the files it wrote (pack_bundle);
+DayBundle reads a bundle through mmap, so looking up one day touches only
+the header and that day's bytes.
+
+Usage:
+    python3 day_bundle.py public/data/days.bundle        # list the index
+    python3 day_bundle.py public/data/days.bundle 12     # print day 12
+"""
+
+import argparse
+import json
+import mmap
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+
+MAGIC = b'ADVBNDL1'
+BUNDLE_FORMAT = 1
+PREFIX_SIZE = 16
+
+
+def pack_bundle(metadata: bytes, days: List[Tuple[int, bytes]],
+                references: Optional[bytes] = None) -> bytes:
+    """Bundle bytes for the given file contents; days in output order."""
+    header: Dict[str, Any] = {'format': BUNDLE_FORMAT}
+    parts = []
+    offset = 0
+
+    def add(data: bytes) -> List[int]:
+        nonlocal offset
+        span = [offset, len(data)]
+        parts.append(data)
+        parts.append(b'\n')
+        offset += len(data) + 1
+        return span
+
+    header['metadata'] = add(metadata)
+    if references is not None:
+        header['references'] = add(references)
+    header['days'] = {str(day): add(data) for day, data in days}
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    prefix = MAGIC + f"{len(header_bytes):08d}".encode('ascii')
+    return prefix + header_bytes + b''.join(parts)
+
+
+class DayBundle:
+    """Random access to a bundle by day number, via mmap."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a day bundle")
+        header_size = int(self._map[len(MAGIC):PREFIX_SIZE])
+        self.header = json.loads(self._map[PREFIX_SIZE:PREFIX_SIZE + header_size])
+        if self.header.get('format') != BUNDLE_FORMAT:
+            self.close()
+            raise ValueError(f"{path}: unsupported bundle format {self.header.get('format')}")
+        self.data_start = PREFIX_SIZE + header_size
+        self._days = {int(day): span for day, span in self.header['days'].items()}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __contains__(self, day: int) -> bool:
+        return day in self._days
+
+    def __len__(self) -> int:
+        return len(self._days)
+
+    def days(self) -> List[int]:
+        """Day numbers in bundle order."""
+        return list(self._days)
+
+    def _slice(self, span: List[int]) -> bytes:
+        start = self.data_start + span[0]
+        return self._map[start:start + span[1]]
+
+    def day_bytes(self, day: int) -> bytes:
+        """The dayNN.json bytes of one day; KeyError if it is not in the bundle."""
+        return self._slice(self._days[day])
+
+    def day(self, day: int) -> Dict[str, Any]:
+        return json.loads(self.day_bytes(day))
+
+    def byte_range(self, day: int) -> Tuple[int, int]:
+        """First and last byte of a day in the file, as for an HTTP Range header."""
+        offset, length = self._days[day]
+        start = self.data_start + offset
+        return start, start + length - 1
+
+    def metadata(self) -> Dict[str, Any]:
+        return json.loads(self._slice(self.header['metadata']))
+
+    def references(self) -> Optional[Dict[str, Any]]:
+        span = self.header.get('references')
+        return json.loads(self._slice(span)) if span else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect a packed day bundle")
+    parser.add_argument('bundle', help="bundle file (e.g. public/data/days.bundle)")
+    parser.add_argument('day', type=int, nargs='?', help="print this day's JSON")
+    args = parser.parse_args()
+
+    with DayBundle(args.bundle) as bundle:
+        if args.day is not None:
+            print(bundle.day_bytes(args.day).decode('utf-8'))
+            return
+        print(f"{args.bundle}: {len(bundle)} days, {os.path.getsize(args.bundle)} bytes, "
+              f"data at byte {bundle.data_start}")
+        for day in bundle.days():
+            start, end = bundle.byte_range(day)
+            print(f"  day {day:>3}  bytes={start}-{end}  ({end - start + 1} bytes)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Memoization cache for inline LaTeX fragments.
+
+Parsing an inline fragment is a pure function of its text, and the same
+fragments come back again and again: subtitles, closing lines, list items
+and above all bibliography entries shared by many days. FragmentCache maps
+the SHA-1 of a fragment to its parsed node list (see latex_ast), so a
+repeated fragment costs one hash and one dictionary lookup.
+
+The cache is an LRU bounded by the total UTF-8 size of the cached source
+text (max_bytes); the least recently used fragments are evicted first. It can be
+saved to and loaded from disk between runs. The file carries the converter
+version (RobustLatexConverter.cache_version(), which includes a digest of
+the parser code), so a changed parser starts from an empty cache. Cached
+node lists are shared and must not be modified.
+"""
+
+import hashlib
+import os
+import pickle
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+
+CACHE_FORMAT = 2   # 2: sizes in UTF-8 bytes
+DEFAULT_MAX_BYTES = 32 << 20
+CACHE_FILE = 'fragments.pickle'
+
+
+class FragmentCache:
+    """Size-bounded LRU of text fragment → parsed value, optionally persisted."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, path: Optional[str] = None,
+                 version: str = ''):
+        self.max_bytes = max_bytes
+        self.path = path
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size = 0
+        self._entries: OrderedDict = OrderedDict()   # key -> (size in bytes, value)
+        self._dirty = False
+        if path:
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        return hashlib.sha1(text.encode('utf-8')).digest()
+
+    def get(self, text: str, compute: Callable[[str], Any]) -> Any:
+        """Cached value for text, computing (and caching) it on a miss."""
+        data = text.encode('utf-8')
+        key = hashlib.sha1(data).digest()
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[1]
+        self.misses += 1
+        value = compute(text)
+        size = len(data)
+        if size <= self.max_bytes:
+            self._entries[key] = (size, value)
+            self.size += size
+            self._dirty = True
+            self._evict()
+        return value
+
+    def _evict(self):
+        entries = self._entries
+        while self.size > self.max_bytes:
+            _, (size, _) = entries.popitem(last=False)
+            self.size -= size
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+        self._dirty = True
+
+    # -- persistence ---------------------------------------------------------
+
+    def load(self) -> int:
+        """Read the cache file; a missing, damaged or outdated file gives an empty cache."""
+        try:
+            with open(self.path, 'rb') as f:
+                data = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return 0
+        if (not isinstance(data, dict) or data.get('format') != CACHE_FORMAT
+                or data.get('version') != self.version):
+            self._dirty = True
+            return 0
+        for key, size, value in data['entries']:
+            self._entries[key] = (size, value)
+            self.size += size
+        self._evict()
+        return len(self._entries)
+
+    def save(self):
+        """Write the cache file (least recently used first) if anything changed."""
+        if not self.path or not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        data = {
+            'format': CACHE_FORMAT,
+            'version': self.version,
+            'entries': [(key, size, value) for key, (size, value) in self._entries.items()],
+        }
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = 100.0 * self.hits / total if total else 0.0
+        return (f"Fragment cache: {self.hits} hits, {self.misses} misses ({rate:.0f}%), "
+                f"{len(self._entries)} entries, {self.size / 1e6:.1f} MB"
+                + (f", {self.evictions} evicted" if self.evictions else ""))
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Single-pass cleanup of the HTML the converter renders.
+
+Does what dumpster/clean_json_files.py (clean_html_content) did to every
+written day file, but on the rendered strings before they are serialized,
+and with one scan of one combined regex instead of twenty substitutions:
+  - %--- comment remnants are dropped (a separate scan, only if there are any),
+  - <p> right before a block element (<h3>, <ul>, <ol>, <dl>, <dt>, <li>,
+    <blockquote>) and </p> right after one are removed, </p></p> collapsed,
+  - a "Name1925" key at the end of a line becomes a <strong> label,
+  - ``quotes'' become "quotes", the word thebibliography is removed,
+  - three or more newlines become one blank line, and the result is
+    stripped.
+The alternatives are written so that each match sees the text as the
+sequential substitutions would have left it, so the results are the same
+as clean_html_content's.
+"""
+
+import re
+import string
+from typing import List
+
+
+_BLOCK_OPEN = r'h\d|ul|ol|dl|dt|li|blockquote'
+_BLOCK_CLOSE = r'h\d|ul|ol|dl|dd|li|blockquote'
+
+_TAGS = (rf'<p>\s*(?=<(?:{_BLOCK_OPEN})>)|</(?:{_BLOCK_CLOSE})>\s*</p>|</p>\s*(?:</p>)+')
+# A quote ends on its line, where the tags it contains are already unwrapped
+# (each position has one way to match, so failing matches stay linear)
+_QUOTED = rf'(?:(?=(?P<tags>{_TAGS}))(?P=tags)|(?!{_TAGS})[^\n])*?'
+
+_COMMENT_RE = re.compile(r'%-+(?:.*?%-+)?')
+
+# Every alternative starts with a fixed character, so the scan can skip
+# ahead to the next '<', '`', newline, 't' or capital letter; a match is
+# told apart by its last group (none for a key).
+_CLEANUP_RE = re.compile('|'.join([
+    rf'<(?:p>(?P<open>\s*)(?=<(?:{_BLOCK_OPEN})>)'
+    rf'|/(?P<close>(?:{_BLOCK_CLOSE})>)\s*</p>'
+    r'|/p>(?P<paragraphs>)\s*(?:</p>)+)',
+    rf"``(?P<quote>{_QUOTED})''",
+    # The whitespace in front is taken back from the output
+    r'thebibliography(?P<bibliography>\s*)',
+    r'\n\n(?P<blank>\n+)',
+] + [
+    # The newline is left for the thebibliography and blank line rules
+    rf'{letter}[a-z]+\d{{4}}(?=\n)' for letter in string.ascii_uppercase
+]))
+
+
+def _clean(html: str) -> str:
+    out: List[str] = []
+    pos = 0
+    for m in _CLEANUP_RE.finditer(html):
+        if m.start() > pos:
+            out.append(html[pos:m.start()])
+        pos = m.end()
+        rule = m.lastgroup
+        if rule == 'close':
+            out.append('</' + m.group('close'))
+        elif rule == 'paragraphs':
+            out.append('</p>')
+        elif rule == 'bibliography':
+            while out and out[-1][-1:].isspace():
+                out[-1] = out[-1].rstrip()
+                if not out[-1]:
+                    out.pop()
+        elif rule == 'blank':
+            out.append('\n\n')
+        # Later rules (thebibliography, unwrapped tags) still apply inside keys and quotes
+        elif rule == 'quote':
+            out.append('"' + _clean(m.group('quote')) + '"')
+        elif rule is None:
+            out.append(f"<p><strong>{_clean(m.group())}</strong><br>")
+    out.append(html[pos:])
+    return ''.join(out)
+
+
+def clean_html(html: str) -> str:
+    """The cleaned-up HTML of one rendered field (content, intro)."""
+    if '%-' in html:
+        # Comment remnants can join tags, so they go first (the converter strips
+        # comments itself; this scan is for hand-edited input)
+        html = _COMMENT_RE.sub('', html)
+    return _clean(html).strip()
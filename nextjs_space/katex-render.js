@@ -0,0 +1,38 @@
+#!/usr/bin/env node
+/**
+ * Batch KaTeX renderer used by katex_prerender.py.
+ *
+ * Started once per conversion run; reads one JSON request per line
+ *   {"formulas": [{"tex": "...", "display": false}, ...], "options": {...}}
+ * and answers each with one line
+ *   {"results": [{"html": "..."} or {"error": "..."}, ...]}
+ * The first line it writes is {"katex": "<version>"}, or {"error": ...}
+ * if KaTeX is not installed (run `yarn install`).
+ */
+const readline = require('readline');
+
+let katex;
+try {
+  katex = require('katex');
+} catch (error) {
+  process.stdout.write(JSON.stringify({ error: `KaTeX not available: ${error.message.split('\n')[0]}` }) + '\n');
+  process.exit(1);
+}
+
+process.stdout.write(JSON.stringify({ katex: katex.version }) + '\n');
+
+const lines = readline.createInterface({ input: process.stdin, terminal: false });
+
+lines.on('line', (line) => {
+  if (!line.trim()) return;
+  const request = JSON.parse(line);
+  const results = request.formulas.map(({ tex, display }) => {
+    try {
+      const options = { ...request.options, displayMode: display, throwOnError: true };
+      return { html: katex.renderToString(tex, options) };
+    } catch (error) {
+      return { error: String((error && error.message) || error) };
+    }
+  });
+  process.stdout.write(JSON.stringify({ results }) + '\n');
+});
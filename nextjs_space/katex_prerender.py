@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Build-time KaTeX rendering of the math in the converted days.
+
+KatexRenderer talks to one long-running Node process (katex-render.js,
+using the KaTeX from node_modules) and sends it all formulas of a day in
+one batch. Results are kept in a persistent cache keyed by KaTeX version,
+render options, display mode and formula source, so a formula is rendered
+once and then only looked up.
+
+KatexHtmlRenderer is the HtmlRenderer the converter uses for the fields
+the site typesets (subtitle, key insight, intro, content, closing,
+references): \\[...\\], $$...$$ and $...$ become KaTeX HTML. A formula KaTeX
+rejects keeps its raw source, so the browser typesets it as before; with
+fallback=True the same applies to every formula when Node or KaTeX is not
+available, instead of failing the build.
+"""
+
+import hashlib
+import json
+import os
+import subprocess
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from latex_ast import DayTree, DisplayMath, HtmlRenderer, InlineMath, Node, walk
+
+
+CACHE_FORMAT = 1
+CACHE_FILE = 'katex.json'
+RENDER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'katex-render.js')
+
+
+class KatexUnavailable(RuntimeError):
+    pass
+
+
+class KatexSettings(NamedTuple):
+    """How a converter (and each of its worker processes) builds its KatexRenderer."""
+    cache_path: Optional[str] = None
+    options: Optional[Dict[str, Any]] = None
+    fallback: bool = False
+
+
+class KatexRenderer:
+    """Batched KaTeX rendering through a Node process, with a persistent cache."""
+
+    def __init__(self, cache_path: Optional[str] = None, options: Optional[Dict[str, Any]] = None,
+                 fallback: bool = False, node: str = 'node', script: str = RENDER_SCRIPT):
+        self.cache_path = cache_path
+        self.options = options or {}
+        self.fallback = fallback
+        self.command = [node, script]
+        self.version: Optional[str] = None
+        self.rendered = 0
+        self.cached = 0
+        self.failed = 0
+        self._process: Optional[subprocess.Popen] = None
+        self._unavailable: Optional[str] = None
+        self._entries: Dict[str, Optional[str]] = {}
+        self._dirty = False
+
+    # -- Node process --------------------------------------------------------
+
+    def start(self) -> bool:
+        """Start the renderer process (once); False if it is not available."""
+        if self._process is not None:
+            return True
+        if self._unavailable is not None:
+            if not self.fallback:
+                raise KatexUnavailable(self._unavailable)
+            return False
+        cwd = os.path.dirname(self.command[1])
+        try:
+            process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                       cwd=cwd, text=True, encoding='utf-8')
+            hello = json.loads(process.stdout.readline() or '{"error": "no answer"}')
+        except (OSError, ValueError) as e:
+            hello = {'error': str(e)}
+            process = None
+        if 'katex' not in hello:
+            self._unavailable = f"{' '.join(self.command)}: {hello.get('error')}"
+            if process is not None:
+                process.wait()
+            if not self.fallback:
+                raise KatexUnavailable(self._unavailable)
+            print(f"  ⚠ {self._unavailable}; math is left for the browser")
+            return False
+        self._process = process
+        self.version = hello['katex']
+        self._load()
+        return True
+
+    def close(self):
+        if self._process is not None:
+            self._process.stdin.close()
+            self._process.wait()
+            self._process = None
+
+    def _batch(self, formulas: List[Tuple[str, bool]]) -> List[Dict[str, str]]:
+        request = {'formulas': [{'tex': tex, 'display': display} for tex, display in formulas],
+                   'options': self.options}
+        self._process.stdin.write(json.dumps(request, ensure_ascii=False) + '\n')
+        self._process.stdin.flush()
+        return json.loads(self._process.stdout.readline())['results']
+
+    # -- cache ---------------------------------------------------------------
+
+    def key(self, tex: str, display: bool) -> str:
+        spec = json.dumps([self.options, display, tex], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(spec.encode('utf-8')).hexdigest()
+
+    def marker(self) -> str:
+        """Build cache version suffix: KaTeX version and options, '' if not available."""
+        if not self.start():
+            return ''
+        options = json.dumps(self.options, sort_keys=True).encode('utf-8')
+        return f"+katex-{self.version}-{hashlib.sha256(options).hexdigest()[:8]}"
+
+    def _read_cache(self) -> Dict[str, Optional[str]]:
+        """Cached entries on disk for the running KaTeX version."""
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('format') != CACHE_FORMAT or data.get('katex') != self.version:
+            return {}
+        return data['entries']
+
+    def _load(self):
+        if self.cache_path:
+            self._entries = self._read_cache()
+
+    def save(self):
+        """Write the cache if formulas were rendered since the last save."""
+        if not self.cache_path or not self._dirty:
+            return
+        # Worker processes share the file: keep what the others added meanwhile
+        entries = self._read_cache()
+        entries.update(self._entries)
+        self._entries = entries
+        os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'format': CACHE_FORMAT, 'katex': self.version, 'entries': entries}, f,
+                      ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+        self._dirty = False
+
+    # -- rendering -----------------------------------------------------------
+
+    def prepare(self, formulas: Iterable[Tuple[str, bool]]):
+        """Render every (source, display) pair that is not cached yet, in one batch."""
+        if not self.start():
+            return
+        missing = []
+        seen = set()
+        for formula in formulas:
+            key = self.key(*formula)
+            if key in self._entries or key in seen:
+                continue
+            seen.add(key)
+            missing.append(formula)
+        if not missing:
+            return
+        for (tex, display), result in zip(missing, self._batch(missing)):
+            self._entries[self.key(tex, display)] = result.get('html')
+            self.rendered += 1
+        self._dirty = True
+
+    def get(self, tex: str, display: bool) -> Optional[str]:
+        """KaTeX HTML of a formula, or None to keep its source."""
+        if not self.start():
+            return None
+        key = self.key(tex, display)
+        if key not in self._entries:
+            self.prepare([(tex, display)])
+        else:
+            self.cached += 1
+        html = self._entries.get(key)
+        if html is None:
+            self.failed += 1
+        return html
+
+    def summary(self) -> str:
+        if self._unavailable:
+            return f"KaTeX: not available ({self._unavailable})"
+        return (f"KaTeX {self.version}: {self.rendered} formulas rendered, {self.cached} cached, "
+                f"{self.failed} left as source")
+
+
+class KatexHtmlRenderer(HtmlRenderer):
+    """HtmlRenderer that writes math as KaTeX HTML."""
+
+    def __init__(self, katex: KatexRenderer):
+        super().__init__()
+        self.katex = katex
+        self.handlers[InlineMath] = self._inline_math
+        self.handlers[DisplayMath] = self._display_math
+
+    def _inline_source(self, node: InlineMath) -> str:
+        # What the browser would have found between the $ signs
+        return HtmlRenderer.render(self, node.children)
+
+    def _inline_math(self, node: InlineMath) -> str:
+        source = self._inline_source(node)
+        html = self.katex.get(source, node.display)
+        return html if html is not None else node.delimiter + source + node.delimiter
+
+    def _display_math(self, node: DisplayMath) -> str:
+        html = self.katex.get(node.source, True)
+        if html is None:
+            return f'<p>\\[{node.source}\\]</p>'
+        return f'<p>{html}</p>'
+
+    def formulas(self, nodes: List[Node]) -> List[Tuple[str, bool]]:
+        """(source, display) of every formula in the given trees."""
+        found = []
+        for node in walk(nodes):
+            if isinstance(node, InlineMath):
+                found.append((self._inline_source(node), node.display))
+            elif isinstance(node, DisplayMath):
+                found.append((node.source, True))
+        return found
+
+    def prepare_day(self, tree: DayTree, fields: Iterable[str]):
+        """Render the formulas of the given DayTree fields in one batch."""
+        nodes: List[Node] = []
+        for field in fields:
+            nodes.extend(getattr(tree, field))
+        self.katex.prepare(self.formulas(nodes))
@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+"""
+Document tree for converted advent days.
+
+The converter parses every piece of LaTeX once into a small tree of
+__slots__ nodes and renders the outputs from it:
+
+    blocks   Section, Paragraph, ItemList (of ListItem), Quote, DisplayMath
+    inline   Text, Format (\\textbf, \\emph, ...), Group ({...}),
+             InlineMath ($...$ or $$...$$), LineBreak (\\\\)
+
+Text holds already-converted characters (escapes, umlauts, quotes and
+dashes are resolved by the parser). A DayTree holds the trees of all fields
+of one day. HtmlRenderer produces exactly the HTML the converter has always
+written; PlainTextRenderer gives the text without markup, e.g. for search.
+"""
+
+from typing import Callable, Dict, List, NamedTuple, Optional, Union
+
+
+SUBSCRIPTS = str.maketrans('0123456789', '₀₁₂₃₄₅₆₇₈₉')
+SUPERSCRIPTS = str.maketrans('0123456789+-', '⁰¹²³⁴⁵⁶⁷⁸⁹⁺⁻')
+
+# Brace commands: name -> (opening tag, closing tag, translation of contents)
+BRACE_COMMANDS = {
+    'textbf': ('<strong>', '</strong>', None),
+    'emph': ('<em>', '</em>', None),
+    'textit': ('<em>', '</em>', None),
+    'textsubscript': ('', '', SUBSCRIPTS),
+    'textsuperscript': ('', '', SUPERSCRIPTS),
+}
+
+
+
+class Node:
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+# -- inline nodes -------------------------------------------------------------
+
+class Text(Node):
+    __slots__ = ('text',)
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class LineBreak(Node):
+    __slots__ = ()
+
+
+class Format(Node):
+    """A closed brace command such as \\textbf{...}."""
+    __slots__ = ('command', 'children')
+
+    def __init__(self, command: str, children: List[Node]):
+        self.command = command
+        self.children = children
+
+
+class Group(Node):
+    """A plain {...} group, kept with its braces."""
+    __slots__ = ('children',)
+
+    def __init__(self, children: List[Node]):
+        self.children = children
+
+
+class InlineMath(Node):
+    """$...$, or $$...$$ with display set; the contents are parsed like the surrounding text."""
+    __slots__ = ('children', 'display')
+
+    def __init__(self, children: List[Node], display: bool = False):
+        self.children = children
+        self.display = display
+
+    @property
+    def delimiter(self) -> str:
+        return '$$' if self.display else '$'
+
+
+# -- block nodes --------------------------------------------------------------
+
+class Section(Node):
+    __slots__ = ('title',)
+
+    def __init__(self, title: List[Node]):
+        self.title = title
+
+
+class Paragraph(Node):
+    __slots__ = ('children',)
+
+    def __init__(self, children: List[Node]):
+        self.children = children
+
+
+class Quote(Node):
+    __slots__ = ('children',)
+
+    def __init__(self, children: List[Node]):
+        self.children = children
+
+
+class DisplayMath(Node):
+    """\\[...\\] or $$...$$; source is the LaTeX between the delimiters."""
+    __slots__ = ('source',)
+
+    def __init__(self, source: str):
+        self.source = source
+
+
+class ListItem(Node):
+    __slots__ = ('blocks',)
+
+    def __init__(self, blocks: List[Node]):
+        self.blocks = blocks
+
+
+class ItemList(Node):
+    __slots__ = ('ordered', 'items')
+
+    def __init__(self, ordered: bool, items: List[ListItem]):
+        self.ordered = ordered
+        self.items = items
+
+
+class Reference(Node):
+    __slots__ = ('key', 'children')
+
+    def __init__(self, key: str, children: List[Node]):
+        self.key = key
+        self.children = children
+
+
+class DayTree:
+    """Parsed fields of one day; inline fields are node lists, intro/body block lists."""
+    __slots__ = ('day', 'params', 'title', 'subtitle', 'key_insight', 'central_formula',
+                 'closing', 'intro', 'body', 'references')
+
+    def __init__(self, day: int, params: Dict[str, str], title: Optional[List[Node]],
+                 subtitle: List[Node], key_insight: List[Node], central_formula: List[Node],
+                 closing: List[Node], intro: List[Node], body: List[Node],
+                 references: List[Reference]):
+        self.day = day
+        self.params = params    # comment-stripped macro arguments, by name
+        self.title = title
+        self.subtitle = subtitle
+        self.key_insight = key_insight
+        self.central_formula = central_formula
+        self.closing = closing
+        self.intro = intro
+        self.body = body
+        self.references = references
+
+
+# -- renderers ----------------------------------------------------------------
+
+class Branch(NamedTuple):
+    """What a renderer handler returns for a node with children: the children,
+    rendered in turn, and the function that joins their strings into the node's."""
+    children: List[Node]
+    join: Callable[[List[str]], str]
+
+
+Handler = Callable[[Node], Union[str, Branch]]
+
+
+def render_tree(handlers: Dict[type, Handler], nodes: List[Node],
+                join: Callable[[List[str]], str]) -> str:
+    """
+    Render nodes through a handler table with an explicit stack, so deeply
+    nested groups cannot exhaust the interpreter's recursion limit.
+    """
+    # (remaining children, their rendered strings, join) per open node
+    stack = [(iter(nodes), [], join)]
+    while True:
+        children, parts, join = stack[-1]
+        for node in children:
+            result = handlers[type(node)](node)
+            if type(result) is str:
+                parts.append(result)
+            else:
+                stack.append((iter(result.children), [], result.join))
+                break
+        else:
+            stack.pop()
+            text = join(parts)
+            if not stack:
+                return text
+            stack[-1][1].append(text)
+
+
+def _wrap(opening: str, closing: str) -> Callable[[List[str]], str]:
+    return lambda parts: opening + ''.join(parts) + closing
+
+
+_concat = ''.join
+
+
+class HtmlRenderer:
+    """Tree → the HTML strings stored in the day JSON."""
+
+    def __init__(self):
+        self.handlers: Dict[type, Handler] = {
+            Text: lambda node: node.text,
+            LineBreak: lambda node: '<br>',
+            Format: self._format,
+            Group: lambda node: Branch(node.children, _wrap('{', '}')),
+            InlineMath: lambda node: Branch(node.children, _wrap(node.delimiter, node.delimiter)),
+            Section: lambda node: Branch(node.title, _wrap('<h3>', '</h3>')),
+            Paragraph: lambda node: Branch(node.children, _wrap('<p>', '</p>')),
+            Quote: lambda node: Branch(node.children, _wrap('<blockquote>', '</blockquote>')),
+            DisplayMath: lambda node: f'<p>\\[{node.source}\\]</p>',
+            ItemList: self._item_list,
+            ListItem: self._list_item,
+        }
+
+    def render(self, nodes: List[Node]) -> str:
+        """HTML of a list of inline nodes."""
+        return render_tree(self.handlers, nodes, _concat)
+
+    def render_blocks(self, blocks: List[Node]) -> str:
+        """HTML of a list of block nodes, one per line."""
+        return render_tree(self.handlers, blocks, '\n'.join)
+
+    @staticmethod
+    def _format(node: Format) -> Branch:
+        opening, closing, table = BRACE_COMMANDS[node.command]
+        if table is not None:
+            return Branch(node.children, lambda parts: ''.join(parts).translate(table))
+        return Branch(node.children, _wrap(opening, closing))
+
+    @staticmethod
+    def _item_list(node: ItemList) -> Branch:
+        tag = 'ol' if node.ordered else 'ul'
+        return Branch(node.items, lambda parts: '\n'.join([f'<{tag}>'] + parts + [f'</{tag}>']))
+
+    @staticmethod
+    def _list_item(node: ListItem) -> Branch:
+        def join(parts: List[str]) -> str:
+            # The item's lead-in text stays inline
+            if parts and isinstance(node.blocks[0], (Paragraph, DisplayMath)):
+                parts[0] = parts[0][3:-4]
+            return '  <li>' + '\n'.join(parts) + '</li>'
+        return Branch(node.blocks, join)
+
+
+class PlainTextRenderer:
+    """Tree → text without markup; math is kept as LaTeX source unless math=False."""
+
+    def __init__(self, math: bool = True):
+        self.math = math
+        children = lambda node: Branch(node.children, _concat)
+        self.handlers: Dict[type, Handler] = {
+            Text: lambda node: node.text,
+            LineBreak: lambda node: '\n',
+            Format: children,
+            Group: children,
+            InlineMath: lambda node: (Branch(node.children, _wrap(node.delimiter, node.delimiter))
+                                      if self.math else ' '),
+            Section: lambda node: Branch(node.title, _concat),
+            Paragraph: children,
+            Quote: children,
+            DisplayMath: lambda node: node.source if self.math else '',
+            ItemList: lambda node: Branch(node.items, '\n'.join),
+            ListItem: lambda node: Branch(node.blocks, '\n\n'.join),
+            Reference: children,
+        }
+
+    def render(self, nodes: List[Node]) -> str:
+        return render_tree(self.handlers, nodes, _concat)
+
+    def render_blocks(self, blocks: List[Node]) -> str:
+        return render_tree(self.handlers, blocks, '\n\n'.join)
+
+
+def walk(nodes: List[Node]):
+    """Every node of the given trees, depth first."""
+    stack = [iter(nodes)]
+    while stack:
+        for node in stack[-1]:
+            yield node
+            if isinstance(node, Section):
+                stack.append(iter(node.title))
+            elif isinstance(node, ItemList):
+                stack.append(iter(node.items))
+            elif isinstance(node, ListItem):
+                stack.append(iter(node.blocks))
+            elif hasattr(node, 'children'):
+                stack.append(iter(node.children))
+            else:
+                continue
+            break
+        else:
+            stack.pop()
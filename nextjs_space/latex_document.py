@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Parsed view of one advent*.tex file.
+
+A LatexDocument is created once per file and handed to every extraction
+step of the converter. Everything derived from the source — the token
+stream, the comment-stripped text, the offset map between the two, the
+\\AdventSheetTwoCol argument spans and the bibliography span — is computed
+on first use and then kept, so no step re-strips or re-scans the file.
+"""
+
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple, Union
+
+from latex_tokens import TokenStream
+
+
+MACRO_NAME = 'AdventSheetTwoCol'
+MACRO_PARAM_NAMES = ('intro', 'day_type', 'day_special', 'central_formula',
+                     'dependencies', 'body', 'closing')
+
+_UNSET = object()
+
+
+class LatexDocument:
+    """Raw and comment-stripped views of one LaTeX source, computed lazily."""
+
+    def __init__(self, raw: str, path: Optional[str] = None):
+        self.raw = raw
+        self.path = path
+        self._raw_stream = None
+        self._stream = None
+        self._macro_spans = _UNSET
+        self._macro_params = _UNSET
+        self._bibliography_span = _UNSET
+
+    @classmethod
+    def from_file(cls, path: str) -> 'LatexDocument':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(f.read(), path)
+
+    @classmethod
+    def of(cls, source: Union[str, 'LatexDocument']) -> 'LatexDocument':
+        """Return source itself if it is a document, else wrap the string."""
+        return source if isinstance(source, LatexDocument) else cls(source)
+
+    # -- views -------------------------------------------------------------
+
+    @property
+    def raw_stream(self) -> TokenStream:
+        """Tokens of the raw source (one scan)."""
+        if self._raw_stream is None:
+            self._raw_stream = TokenStream(self.raw)
+        return self._raw_stream
+
+    @property
+    def stream(self) -> TokenStream:
+        """Comment-stripped stream; its tokens are reused from raw_stream."""
+        if self._stream is None:
+            self._stream = self.raw_stream.without_comments()
+        return self._stream
+
+    @property
+    def text(self) -> str:
+        """Comment-stripped text."""
+        return self.stream.text
+
+    def raw_offset(self, offset: int) -> int:
+        """Offset in raw of the character at offset in the stripped text."""
+        kept_starts, source_starts = self.stream.line_map
+        line = bisect_right(kept_starts, offset) - 1
+        if line < 0:
+            return 0
+        return source_starts[line] + offset - kept_starts[line]
+
+    # -- structure ---------------------------------------------------------
+
+    @property
+    def macro_spans(self) -> Optional[List[Tuple[int, int]]]:
+        """Stripped-text spans of the seven \\AdventSheetTwoCol arguments."""
+        if self._macro_spans is _UNSET:
+            self._macro_spans = self.stream.macro_arguments(MACRO_NAME, len(MACRO_PARAM_NAMES))
+        return self._macro_spans
+
+    @property
+    def macro_params(self) -> Optional[Dict[str, TokenStream]]:
+        """The macro arguments by name, whitespace-stripped, with their tokens."""
+        if self._macro_params is _UNSET:
+            spans = self.macro_spans
+            if spans is None:
+                self._macro_params = None
+            else:
+                self._macro_params = {
+                    name: self.stream.slice(start, end, strip=True)
+                    for name, (start, end) in zip(MACRO_PARAM_NAMES, spans)
+                }
+        return self._macro_params
+
+    @property
+    def bibliography_span(self) -> Optional[Tuple[int, int]]:
+        """Stripped-text span of the thebibliography environment, if any."""
+        if self._bibliography_span is _UNSET:
+            self._bibliography_span = self.stream.environment_span('thebibliography')
+        return self._bibliography_span
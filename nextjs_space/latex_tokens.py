@@ -0,0 +1,336 @@
+# -*- coding: utf-8 -*-
+"""
+Single-pass LaTeX tokenizer shared by the converter stages.
+
+The source is scanned once with one compiled pattern. Plain text is not
+tokenized; only the characters that carry structure are: comments, escaped
+characters, control sequences, braces, math delimiters and environment
+boundaries. Every later stage (comment stripping, macro arguments, body
+blocks, bibliography) works on the resulting TokenStream instead of walking
+the text character by character. Brace groups are matched once per stream
+(brace_index), so every later {...} lookup is a dictionary access.
+"""
+
+import re
+from bisect import bisect_left
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+# Token kinds
+COMMENT = 'comment'          # % ... up to (not including) the newline
+ESCAPE = 'escape'            # \% \{ \} \$ \& \_ \# and other control symbols
+CONTROL = 'control'          # \name or \name*  (name stored without backslash)
+BEGIN = 'begin'              # \begin{env}      (name = env)
+END = 'end'                  # \end{env}        (name = env)
+BGROUP = 'bgroup'            # {
+EGROUP = 'egroup'            # }
+MATH_INLINE = 'math'         # $
+MATH_DISPLAY = 'display'     # $$
+DISPLAY_OPEN = 'display_open'    # \[
+DISPLAY_CLOSE = 'display_close'  # \]
+
+
+class Token(NamedTuple):
+    kind: str
+    start: int
+    end: int
+    name: str = ''
+
+
+class BraceIndex(NamedTuple):
+    """Brace structure of a stream, from one stack pass over its tokens."""
+    close: Dict[int, int]   # offset of every '{' -> offset of its '}' (-1 if unclosed)
+    depth: Dict[int, int]   # offset of every '{' -> nesting depth (0 = outermost)
+
+
+# Plain text is consumed by the leading character class, so the alternation
+# is only tried where a token can actually start. The run is possessive and
+# the last alternative (text) matches what is left where no token starts (a
+# lone backslash, or the end of the input), so every match ends where the
+# next one begins and no character is scanned twice.
+_TOKEN_RE = re.compile(r'''
+    [^%\\{}$]*+
+    (?:
+          (?P<comment>%[^\n]*)
+        | (?P<env>\\(?P<env_kind>begin|end)[ \t]*\{(?P<env_name>[^{}\n]*)\})
+        | (?P<control>\\(?P<control_name>[A-Za-z@]+\*?))
+        | (?P<symbol>\\(?P<symbol_name>[^A-Za-z@\n]))
+        | (?P<brace>[{}])
+        | (?P<dollar>\$\$?)
+        | (?P<text>\\?)
+    )
+''', re.VERBOSE)
+
+_SYMBOL_KINDS = {'[': DISPLAY_OPEN, ']': DISPLAY_CLOSE}
+
+_new_token = tuple.__new__
+
+
+def tokenize(text: str) -> List[Token]:
+    """Scan text once and return its structural tokens in source order."""
+    tokens = []
+    append = tokens.append
+    for m in _TOKEN_RE.finditer(text):
+        group = m.lastgroup
+        start = m.start(group)
+        end = m.end()
+        if group == 'control':
+            append(_new_token(Token, (CONTROL, start, end, m.group('control_name'))))
+        elif group == 'brace':
+            kind = BGROUP if text[start] == '{' else EGROUP
+            append(_new_token(Token, (kind, start, end, '')))
+        elif group == 'comment':
+            append(_new_token(Token, (COMMENT, start, end, '')))
+        elif group == 'symbol':
+            name = m.group('symbol_name')
+            append(_new_token(Token, (_SYMBOL_KINDS.get(name, ESCAPE), start, end, name)))
+        elif group == 'env':
+            kind = BEGIN if m.group('env_kind') == 'begin' else END
+            append(_new_token(Token, (kind, start, end, m.group('env_name'))))
+        elif group == 'dollar':
+            kind = MATH_DISPLAY if end - start == 2 else MATH_INLINE
+            append(_new_token(Token, (kind, start, end, '')))
+    return tokens
+
+
+_NON_SPACE = re.compile(r'\S')
+
+
+class TokenStream:
+    """
+    A LaTeX text together with its token list.
+
+    Streams are cheap to slice: a slice shares no state with its parent but
+    reuses the parent's tokens (shifted), so the characters of a file are
+    only ever scanned once.
+    """
+
+    def __init__(self, text: str, tokens: Optional[List[Token]] = None,
+                 comments_stripped: bool = False):
+        self.text = text
+        self.tokens = tokenize(text) if tokens is None else tokens
+        self.comments_stripped = comments_stripped
+        self._starts = None
+        self._by_offset = None
+        self._block_pairs = None
+        self._brace_index = None
+        self.line_map: Optional[Tuple[List[int], List[int]]] = None
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    # -- lookups -----------------------------------------------------------
+
+    @property
+    def starts(self) -> List[int]:
+        if self._starts is None:
+            self._starts = [t.start for t in self.tokens]
+        return self._starts
+
+    def token_at(self, offset: int) -> Optional[Token]:
+        """Return the token starting exactly at offset, if any."""
+        if self._by_offset is None:
+            self._by_offset = {t.start: i for i, t in enumerate(self.tokens)}
+        i = self._by_offset.get(offset)
+        return None if i is None else self.tokens[i]
+
+    def index_from(self, offset: int) -> int:
+        """Index of the first token starting at or after offset."""
+        return bisect_left(self.starts, offset)
+
+    def next_token(self, offset: int, kinds: Tuple[str, ...],
+                   names: Optional[Tuple[str, ...]] = None,
+                   limit: Optional[int] = None) -> Optional[Token]:
+        """First token at or after offset (and before limit) of the given kinds/names."""
+        tokens = self.tokens
+        for i in range(self.index_from(offset), len(tokens)):
+            tok = tokens[i]
+            if limit is not None and tok.start >= limit:
+                return None
+            if tok.kind in kinds and (names is None or tok.name in names):
+                return tok
+        return None
+
+    def brace_index(self) -> BraceIndex:
+        """
+        Matching '}' and nesting depth of every '{', built on first use.
+
+        A '}' without an open group is ignored, as is an escaped \\{ or \\}.
+        """
+        if self._brace_index is not None:
+            return self._brace_index
+        close = {}
+        depth = {}
+        stack = []
+        for tok in self.tokens:
+            kind = tok.kind
+            if kind == BGROUP:
+                depth[tok.start] = len(stack)
+                close[tok.start] = -1
+                stack.append(tok.start)
+            elif kind == EGROUP and stack:
+                close[stack.pop()] = tok.start
+        self._brace_index = BraceIndex(close, depth)
+        return self._brace_index
+
+    def matching_brace(self, offset: int) -> int:
+        """Offset of the '}' closing the group opened at offset, or -1."""
+        return self.brace_index().close.get(offset, -1)
+
+    def brace_depth(self, offset: int) -> int:
+        """Nesting depth of the group opened at offset, or -1 if there is no '{' there."""
+        return self.brace_index().depth.get(offset, -1)
+
+    def skip_space(self, offset: int) -> int:
+        """First non-whitespace offset at or after offset (len(text) if none)."""
+        m = _NON_SPACE.search(self.text, offset)
+        return m.start() if m else len(self.text)
+
+    # -- derived streams ---------------------------------------------------
+
+    def slice(self, start: int, end: int, strip: bool = False) -> 'TokenStream':
+        """Sub-stream for text[start:end], optionally whitespace-stripped."""
+        text = self.text[start:end]
+        if strip:
+            stripped = text.lstrip()
+            start += len(text) - len(stripped)
+            text = stripped.rstrip()
+            end = start + len(text)
+        tokens = self.tokens
+        lo = self.index_from(start)
+        hi = self.index_from(end)
+        shifted = [Token(t.kind, t.start - start, t.end - start, t.name)
+                   for t in tokens[lo:hi] if t.end <= end]
+        return TokenStream(text, shifted, self.comments_stripped)
+
+    def without_comments(self) -> 'TokenStream':
+        """
+        Stream of the text with comments removed.
+
+        Matches the historical remove_comments(): everything from an
+        unescaped % to the end of its line is dropped, and lines that are
+        left blank are removed entirely.
+
+        The result carries a line map (kept_starts, source_starts): line i
+        of the result starts at kept_starts[i] and came from
+        source_starts[i] in this stream's text.
+        """
+        if self.comments_stripped:
+            return self
+        text = self.text
+        tokens = self.tokens
+        n_tokens = len(tokens)
+        parts = []
+        new_tokens = []
+        kept_starts = []
+        source_starts = []
+        out_len = 0
+        ti = 0
+        line_start = 0
+        n = len(text)
+        while line_start <= n:
+            line_end = text.find('\n', line_start)
+            if line_end < 0:
+                line_end = n
+            cut = line_end
+            first = ti
+            while ti < n_tokens and tokens[ti].start < line_end:
+                if tokens[ti].kind == COMMENT and cut == line_end:
+                    cut = tokens[ti].start
+                ti += 1
+            line = text[line_start:cut]
+            if line.strip():
+                if parts:
+                    out_len += 1
+                shift = out_len - line_start
+                for t in tokens[first:ti]:
+                    if t.start >= cut:
+                        break
+                    new_tokens.append(Token(t.kind, t.start + shift, t.end + shift, t.name))
+                kept_starts.append(out_len)
+                source_starts.append(line_start)
+                parts.append(line)
+                out_len += len(line)
+            line_start = line_end + 1
+        stripped = TokenStream('\n'.join(parts), new_tokens, comments_stripped=True)
+        stripped.line_map = (kept_starts, source_starts)
+        return stripped
+
+    # -- structure ---------------------------------------------------------
+
+    def macro_arguments(self, name: str, count: int) -> Optional[List[Tuple[int, int]]]:
+        """
+        Spans (start, end) of the first `count` brace arguments of the first
+        \\name in the stream, or None if the macro or an argument is missing.
+        """
+        macro = self.next_token(0, (CONTROL,), (name,))
+        if macro is None:
+            return None
+        spans = []
+        pos = macro.end
+        for _ in range(count):
+            pos = self.skip_space(pos)
+            close = self.matching_brace(pos)
+            if close < 0:
+                return None
+            spans.append((pos + 1, close))
+            pos = close + 1
+        return spans
+
+    def block_pairs(self) -> Dict[int, int]:
+        """
+        Token index of every block opener -> token index of its closer.
+
+        Computed in one pass: \\begin/\\end pairs are matched by name with
+        proper nesting, \\[ is closed by the next \\], and $$ tokens pair up
+        in order. Unclosed openers are absent from the mapping.
+        """
+        if self._block_pairs is not None:
+            return self._block_pairs
+        pairs = {}
+        envs = []        # token indices of the open \begin tokens, innermost last
+        open_by_name: Dict[str, List[int]] = {}   # name -> its open \begin tokens, innermost last
+        display_open = []
+        dollars = None
+        tokens = self.tokens
+        for i, tok in enumerate(tokens):
+            kind = tok.kind
+            if kind == BEGIN:
+                envs.append(i)
+                open_by_name.setdefault(tok.name, []).append(i)
+            elif kind == END:
+                opened = open_by_name.get(tok.name)
+                if opened:
+                    begin = opened[-1]
+                    pairs[begin] = i
+                    # Environments opened inside it and not closed stay unclosed;
+                    # every \begin is pushed and popped once
+                    while True:
+                        j = envs.pop()
+                        open_by_name[tokens[j].name].pop()
+                        if j == begin:
+                            break
+            elif kind == DISPLAY_OPEN:
+                display_open.append(i)
+            elif kind == DISPLAY_CLOSE:
+                for j in display_open:
+                    pairs[j] = i
+                display_open = []
+            elif kind == MATH_DISPLAY:
+                if dollars is None:
+                    dollars = i
+                else:
+                    pairs[dollars] = i
+                    dollars = None
+        self._block_pairs = pairs
+        return pairs
+
+    def environment_span(self, name: str, start: int = 0) -> Optional[Tuple[int, int]]:
+        """Span from \\begin{name} to the end of the first matching \\end{name}."""
+        begin = self.next_token(start, (BEGIN,), (name,))
+        if begin is None:
+            return None
+        end = self.next_token(begin.end, (END,), (name,))
+        if end is None:
+            return None
+        return begin.start, end.end
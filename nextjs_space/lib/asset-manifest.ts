@@ -0,0 +1,29 @@
+import { getAssetPath } from './paths';
+
+// manifest.json written by asset_manifest.py: paths below public/ mapped
+// to their content-hashed copies, which can be cached forever.
+interface AssetManifest {
+  format: number;
+  files: Record<string, string>;
+}
+
+let manifest: Promise<Record<string, string>> | null = null;
+
+function loadManifest(): Promise<Record<string, string>> {
+  if (!manifest) {
+    // The one file that is always revalidated; a site built without hashed
+    // names has none, and every path stays as it is
+    manifest = fetch(getAssetPath('/manifest.json'), { cache: 'no-cache' })
+      .then((res) => (res.ok ? (res.json() as Promise<AssetManifest>) : null))
+      .then((data) => data?.files ?? {})
+      .catch(() => ({}));
+  }
+  return manifest;
+}
+
+/** URL of a file below public/ (e.g. '/data/days/day05.json'), by its hashed name if it has one. */
+export async function resolveAsset(path: string): Promise<string> {
+  const files = await loadManifest();
+  const hashed = files[path.replace(/^\//, '')];
+  return getAssetPath(hashed ? `/${hashed}` : path);
+}
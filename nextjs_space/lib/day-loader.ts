@@ -0,0 +1,79 @@
+import type { AdventData, AdventDay, AdventIndex } from './types';
+import { resolveAsset } from './asset-manifest';
+import { resolveDayReferences, resolveReferences } from './references';
+
+type ReferenceStore = NonNullable<AdventData['references']>;
+
+const dayCache = new Map<number, Promise<AdventDay>>();
+let referenceStore: Promise<ReferenceStore> | null = null;
+let legacyDays: Map<number, AdventDay> | null = null;
+
+async function fetchJson<T>(path: string): Promise<T> {
+  const res = await fetch(await resolveAsset(path));
+  if (!res.ok) {
+    throw new Error(`${path}: HTTP ${res.status}`);
+  }
+  return res.json();
+}
+
+/**
+ * Metadata and day summaries for the calendar grid (data/index.json).
+ * Falls back to the combined advent_data.json if the index was not built.
+ */
+export async function loadIndex(): Promise<AdventIndex> {
+  try {
+    return await fetchJson<AdventIndex>('/data/index.json');
+  } catch {
+    const data = resolveReferences(await fetchJson<AdventData>('/advent_data.json'));
+    legacyDays = new Map(data.days.map((day) => [day.day, day]));
+    return data;
+  }
+}
+
+/** Full content of one day, fetched when its door is first opened. */
+export function loadDay(day: number): Promise<AdventDay> {
+  const legacy = legacyDays?.get(day);
+  if (legacy) {
+    return Promise.resolve(legacy);
+  }
+
+  let pending = dayCache.get(day);
+  if (!pending) {
+    pending = fetchJson<AdventDay>(`/data/days/day${String(day).padStart(2, '0')}.json`).then(
+      async (data) => {
+        const refs = (data.references ?? []) as unknown[];
+        if (!refs.some((ref) => typeof ref === 'string')) {
+          return data;
+        }
+        if (!referenceStore) {
+          referenceStore = fetchJson<ReferenceStore>('/data/references.json');
+          referenceStore.catch(() => {
+            referenceStore = null;
+          });
+        }
+        return resolveDayReferences(data, await referenceStore);
+      }
+    );
+    // Let a failed fetch be retried on the next click
+    pending.catch(() => dayCache.delete(day));
+    dayCache.set(day, pending);
+  }
+  return pending;
+}
+
+/**
+ * The later sections of a chunked day, in order; all requests start at
+ * once, so each section can be shown as soon as it and its predecessors
+ * have arrived.
+ */
+export function loadDayChunks(day: AdventDay): Promise<string>[] {
+  return (day.contentChunks ?? [])
+    .filter((chunk) => chunk.file)
+    .map(async (chunk) => {
+      const res = await fetch(await resolveAsset(`/data/${chunk.file}`));
+      if (!res.ok) {
+        throw new Error(`${chunk.file}: HTTP ${res.status}`);
+      }
+      return res.text();
+    });
+}
@@ -0,0 +1,32 @@
+import type { AdventData, AdventDay, AdventReference } from './types';
+
+type ReferenceStore = NonNullable<AdventData['references']>;
+
+/** One day's "key#hash" reference ids replaced by key and text. */
+export function resolveDayReferences(day: AdventDay, store: ReferenceStore): AdventDay {
+  const refs = (day.references ?? []) as Array<AdventReference | string>;
+  return {
+    ...day,
+    references: refs.map((ref) => {
+      if (typeof ref !== 'string') {
+        return ref;
+      }
+      const cut = ref.lastIndexOf('#');
+      const key = ref.slice(0, cut);
+      return { key, text: store[key]?.[ref.slice(cut + 1)] ?? '' };
+    }),
+  };
+}
+
+/**
+ * Fills in the reference texts of days that only list "key#hash" ids
+ * into the shared `references` object (the converter's default output).
+ * Data with inlined references is returned unchanged.
+ */
+export function resolveReferences(data: AdventData): AdventData {
+  const store = data.references;
+  if (!store) {
+    return data;
+  }
+  return { ...data, days: data.days.map((day) => resolveDayReferences(day, store)) };
+}
@@ -13,10 +13,26 @@ export interface AdventDay {
   centralFormula?: string;
   dependencies?: string;
   isLocked: boolean;
-  references?: Array<{
-    key: string;
-    text: string;
-  }>;
+  references?: AdventReference[];
+  // With section chunking: content is the first chunk, the rest load later
+  contentChunks?: AdventContentChunk[];
+}
+
+export interface AdventContentChunk {
+  title: string;
+  size: number;
+  file?: string; // relative to data/, absent for the inlined first chunk
+}
+
+// The fields of a day in data/index.json: all the calendar grid needs
+export type AdventDaySummary = Pick<
+  AdventDay,
+  'day' | 'date' | 'dateDisplay' | 'title' | 'subtitle' | 'type' | 'special' | 'isLocked'
+>;
+
+export interface AdventReference {
+  key: string;
+  text: string;
 }
 
 export interface AdventData {
@@ -37,4 +53,10 @@ export interface AdventData {
     text: string;
   };
   days: AdventDay[];
+  // Shared reference texts (key -> hash -> text); days then list "key#hash" ids
+  references?: Record<string, Record<string, string>>;
+}
+
+export interface AdventIndex extends Omit<AdventData, 'days' | 'references'> {
+  days: AdventDaySummary[];
 }
@@ -0,0 +1,433 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming writer for the converter output.
+
+Writes the layout app/page.tsx fetches:
+    public/data/index.json           metadata plus the summary fields of every
+                                     day (SUMMARY_FIELDS): all the calendar
+                                     grid needs, compact JSON
+    public/data/metadata.json        {"metadata": ..., "colorScheme": ...}
+    public/data/days/dayNN.json      one converted day each, fetched when
+                                     its door is opened
+    public/data/days/dayNN-K.html    section K of the day's content, if the
+                                     converter split it (contentChunks)
+    public/data/references.json      bibliography entries of all days, unless
+                                     they are inlined (see reference_store.py)
+    public/data/days.bundle          all of the above in one file with a byte
+                                     offset index (optional, see day_bundle.py)
+    public/data/search/              inverted index of the days' text (optional,
+                                     see search_index.py)
+    public/advent.sqlite             days, sections, formulas and references
+                                     with a full-text index (optional, see
+                                     sqlite_export.py)
+    public/manifest.json             content-hashed names of all these files
+                                     (optional, see asset_manifest.py)
+
+Each day is serialized and written as soon as it is handed over, so the
+converter never holds more than one day in memory. The combined
+advent_data.json (the old single-file output) is optional; it is assembled
+at close() by streaming the day files back in day order, one at a time,
+with the section chunks of a day joined back into its content.
+All files but index.json are byte-identical to json.dump(..., indent=2, ensure_ascii=False)
+of the same data, as previously produced by split_json.py, and are replaced
+atomically (temp file + rename), so a running dev server never reads a
+half-written day.
+
+Every file goes through OutputFiles: it is serialized first and only
+replaced if its SHA-256 differs from the file on disk. Unchanged files
+keep their bytes and mtimes, so next build, rsync and the precompressed
+siblings see only the days that really changed.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple, Union
+
+from asset_manifest import AssetManifest
+from build_cache import file_digest
+from day_bundle import pack_bundle
+from reference_store import ReferenceStore
+from search_index import META_FILE as SEARCH_META_FILE, SEARCH_DIR, SearchIndexBuilder
+from sqlite_export import SqliteExport
+
+
+def dumps(data: Any) -> str:
+    """Serialization used for every output file."""
+    return json.dumps(data, indent=2, ensure_ascii=False)
+
+
+def write_atomic(path: str, text: Union[str, bytes]):
+    """Replace path with text (or bytes) in one rename."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    if isinstance(text, bytes):
+        with open(tmp_path, 'wb') as f:
+            f.write(text)
+    else:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+    os.replace(tmp_path, path)
+
+
+def same_content(path: str, data: bytes) -> bool:
+    """Whether path exists and holds exactly data (sizes first, then SHA-256)."""
+    try:
+        if os.path.getsize(path) != len(data):
+            return False
+        return file_digest(path) == hashlib.sha256(data).hexdigest()
+    except OSError:
+        return False
+
+
+def write_if_changed(path: str, text: Union[str, bytes]) -> bool:
+    """write_atomic, unless path already has these bytes; True if it was written."""
+    data = text.encode('utf-8') if isinstance(text, str) else text
+    if same_content(path, data):
+        return False
+    write_atomic(path, data)
+    return True
+
+
+class OutputFiles:
+    """Counts the files a run writes and the ones it leaves unchanged."""
+
+    def __init__(self):
+        self.written = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def _count(self, written: bool) -> bool:
+        with self._lock:
+            if written:
+                self.written += 1
+            else:
+                self.skipped += 1
+        return written
+
+    def write(self, path: str, text: Union[str, bytes]) -> bool:
+        """Replace path with text unless it already holds it; True if written."""
+        return self._count(write_if_changed(path, text))
+
+    @contextmanager
+    def open(self, path: str) -> Iterator[TextIO]:
+        """
+        A text file to stream path's new content into; on exit it replaces
+        path if the content differs and is dropped otherwise.
+        """
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                yield f
+            changed = not os.path.exists(path) or file_digest(tmp_path) != file_digest(path)
+            if changed:
+                os.replace(tmp_path, path)
+            self._count(changed)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def summary(self) -> str:
+        return f"{self.written} files written, {self.skipped} unchanged"
+
+
+_DAY_FILE_RE = re.compile(r'day(\d+)\.json$')
+_CHUNK_FILE_RE = re.compile(r'day(\d+)-(\d+)\.html$')
+_SEARCH_FILE_RE = re.compile(r'[a-z0-9]+\.json$')
+
+# Fields of a day in index.json
+SUMMARY_FIELDS = ('day', 'date', 'dateDisplay', 'title', 'subtitle', 'type', 'special', 'isLocked')
+
+
+def day_summary(day_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: day_data[field] for field in SUMMARY_FIELDS if field in day_data}
+
+
+def _nested(text: str, indent: str) -> str:
+    """Re-indent serialized JSON for embedding one level deeper."""
+    return text.replace('\n', '\n' + indent)
+
+
+class DayShardWriter:
+    """
+    Writes metadata.json and dayNN.json files, optionally a combined file.
+
+    With a ReferenceStore, day files carry only the keys of their references
+    and the texts go to references.json (and to a top-level "references"
+    object of the combined file); without one they are inlined. With a
+    SearchIndexBuilder, the "searchText" of the days goes into the search
+    index instead of the day files; with a SqliteExport, every day is also
+    loaded into the database. With hashed_names, every file but the combined one is also written under
+    its content-hashed name, listed in manifest.json next to data_dir;
+    without, the files written are dropped from that manifest.
+    """
+
+    def __init__(self, data_dir: str = 'public/data',
+                 combined_path: Optional[str] = None,
+                 references: Optional[ReferenceStore] = None, bundle: bool = False,
+                 hashed_names: bool = False, search: Optional[SearchIndexBuilder] = None,
+                 sqlite: Optional[SqliteExport] = None):
+        self.data_dir = data_dir
+        self.days_dir = os.path.join(data_dir, 'days')
+        self.combined_path = combined_path
+        self.references = references
+        self.references_path = os.path.join(data_dir, 'references.json')
+        self.metadata_path = os.path.join(data_dir, 'metadata.json')
+        self.index_path = os.path.join(data_dir, 'index.json')
+        self.bundle_path = os.path.join(data_dir, 'days.bundle') if bundle else None
+        self.search = search
+        self.sqlite = sqlite
+        self.search_dir = os.path.join(data_dir, SEARCH_DIR)
+        self.metadata: Dict[str, Any] = {}
+        self.color_scheme: Dict[str, Any] = {}
+        self._days: Dict[str, Tuple[int, int]] = {}   # path -> (day, order)
+        self._chunk_files: Optional[Dict[int, List[str]]] = None   # day -> its chunk files on disk
+        self._summaries: Optional[Dict[int, Dict[str, Any]]] = {}
+        self.output = OutputFiles()
+        self.hashed_names = hashed_names
+        self.manifest = AssetManifest(os.path.dirname(os.path.normpath(data_dir)))
+        os.makedirs(self.days_dir, exist_ok=True)
+
+    def day_path(self, day: int) -> str:
+        return os.path.join(self.days_dir, f"day{day:02d}.json")
+
+    def write_text(self, path: str, text: Union[str, bytes]) -> bool:
+        """Write via a temp file and rename if the bytes changed; True if written."""
+        if self.hashed_names:
+            self.output.write(self.manifest.add(path, text), text)
+        else:
+            self.manifest.remove(path)
+        return self.output.write(path, text)
+
+    def write_manifest(self) -> Optional[str]:
+        return self.manifest.save(self.output.write)
+
+    def write_metadata(self, metadata: Dict[str, Any], color_scheme: Dict[str, Any]) -> str:
+        self.metadata = metadata
+        self.color_scheme = color_scheme
+        self.write_text(self.metadata_path,
+                        dumps({'metadata': metadata, 'colorScheme': color_scheme}))
+        return self.metadata_path
+
+    def write_day(self, day_data: Dict[str, Any], order: int = 0) -> str:
+        """Write one day's file now; order breaks ties between equal day numbers."""
+        path = self.day_path(day_data['day'])
+        if path in self._days:
+            print(f"  ⚠ Day {day_data['day']} written twice; {path} keeps the last one")
+            del self._days[path]
+        day_data = self._write_day_files(day_data)
+        self._days[path] = (day_data['day'], order)
+        self._summaries[day_data['day']] = day_summary(day_data)
+        return path
+
+    def replace_day(self, day_data: Dict[str, Any], flush: bool = True) -> str:
+        """
+        Rewrite one day outside a full run (watch mode). The files of all
+        days (references.json, index.json, ...) follow at flush(), right
+        away unless several days are replaced in a row.
+        """
+        path = self.day_path(day_data['day'])
+        day_data = self._write_day_files(day_data)
+        self._known_summaries()[day_data['day']] = day_summary(day_data)
+        if flush:
+            self.flush()
+        return path
+
+    def flush(self):
+        """Bring the files of all days up to date after replace_day/remove_day."""
+        self.write_references()
+        self.write_bundle()
+        self.write_index()
+        self.write_search()
+        self.write_manifest()
+        if self.sqlite is not None:
+            self.sqlite.commit()
+
+    def _write_day_files(self, day_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Write dayNN.json (and its section chunks); returns the data as written."""
+        day = day_data['day']
+        if self.sqlite is not None:
+            self.sqlite.add_day(day_data)
+        if self.references is not None:
+            day_data = self.references.detach(day_data)
+        if 'searchText' in day_data:
+            day_data = dict(day_data)
+            sections = day_data.pop('searchText')
+            if self.search is not None:
+                self.search.add_day(day, sections)
+        chunk_paths = []
+        if 'contentChunks' in day_data:
+            day_data = dict(day_data)
+            toc = []
+            for k, chunk in enumerate(day_data['contentChunks']):
+                entry = {'title': chunk['title'], 'size': chunk['size']}
+                if k:
+                    # The first chunk is the day's content itself
+                    chunk_path = os.path.join(self.days_dir, f"day{day:02d}-{k}.html")
+                    self.write_text(chunk_path, chunk['html'])
+                    chunk_paths.append(chunk_path)
+                    entry['file'] = os.path.relpath(chunk_path, self.data_dir).replace(os.sep, '/')
+                toc.append(entry)
+            day_data['contentChunks'] = toc
+        self._remove_chunks(day, keep=chunk_paths)
+        self.write_text(self.day_path(day), dumps(day_data))
+        return day_data
+
+    def _remove_chunks(self, day: int, keep: List[str] = ()):
+        """Delete section chunk files of day left over from an earlier run."""
+        if self._chunk_files is None:
+            # The days directory is listed once; afterwards the writer tracks
+            # the chunk files itself
+            self._chunk_files = {}
+            for name in os.listdir(self.days_dir):
+                m = _CHUNK_FILE_RE.match(name)
+                if m:
+                    self._chunk_files.setdefault(int(m.group(1)), []).append(
+                        os.path.join(self.days_dir, name))
+        for path in self._chunk_files.pop(day, ()):
+            if path not in keep and os.path.exists(path):
+                os.remove(path)
+                self.manifest.remove(path)
+        if keep:
+            self._chunk_files[day] = list(keep)
+
+    def remove_day(self, day: int, flush: bool = True) -> str:
+        """Delete one day's files outside a full run (watch mode); see replace_day."""
+        path = self.day_path(day)
+        if os.path.exists(path):
+            os.remove(path)
+        self.manifest.remove(path)
+        self._remove_chunks(day)
+        if self.references is not None:
+            self.references.forget_day(day)
+        self._known_summaries().pop(day, None)
+        if self.search is not None:
+            self.search.remove_day(day)
+        if self.sqlite is not None:
+            self.sqlite.remove_day(day)
+        if flush:
+            self.flush()
+        return path
+
+    def _known_summaries(self) -> Dict[int, Dict[str, Any]]:
+        """Summaries of this run, or (watch mode) of the day files on disk."""
+        if not self._summaries:
+            self._summaries = {}
+            for name in os.listdir(self.days_dir):
+                if _DAY_FILE_RE.match(name):
+                    with open(os.path.join(self.days_dir, name), 'r', encoding='utf-8') as f:
+                        day_data = json.load(f)
+                    self._summaries[day_data['day']] = day_summary(day_data)
+        return self._summaries
+
+    def write_index(self) -> Optional[str]:
+        """index.json: metadata and the summary of every day, in day order."""
+        if self.metadata:
+            meta = {'metadata': self.metadata, 'colorScheme': self.color_scheme}
+        elif os.path.exists(self.metadata_path):
+            with open(self.metadata_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        else:
+            return None
+        summaries = self._summaries
+        index = dict(meta, days=[summaries[day] for day in sorted(summaries)])
+        self.write_text(self.index_path,
+                        json.dumps(index, ensure_ascii=False, separators=(',', ':')))
+        return self.index_path
+
+    def write_references(self) -> Optional[str]:
+        if self.references is None:
+            return None
+        self.write_text(self.references_path, dumps(self.references.as_dict()))
+        return self.references_path
+
+    def write_bundle(self) -> Optional[str]:
+        """Pack metadata, references and the day files into days.bundle, in day order."""
+        if not self.bundle_path or not os.path.exists(self.metadata_path):
+            return None
+        if self._days:
+            day_paths = [(day, path) for day, _, path in self._day_order()]
+        else:
+            # Outside a full run (watch mode): every day file on disk
+            day_paths = sorted((int(m.group(1)), os.path.join(self.days_dir, m.group()))
+                               for m in map(_DAY_FILE_RE.match, os.listdir(self.days_dir)) if m)
+
+        def read(path: str) -> bytes:
+            with open(path, 'rb') as f:
+                return f.read()
+
+        references = read(self.references_path) if self.references is not None else None
+        self.write_text(self.bundle_path, pack_bundle(
+            read(self.metadata_path), [(day, read(path)) for day, path in day_paths], references))
+        return self.bundle_path
+
+    def write_search(self) -> Optional[str]:
+        """The search index shards and their meta.json; shards no term uses any more are deleted."""
+        if self.search is None:
+            return None
+        os.makedirs(self.search_dir, exist_ok=True)
+        files = self.search.files()
+        for name, text in files.items():
+            self.write_text(os.path.join(self.search_dir, name), text)
+        for name in os.listdir(self.search_dir):
+            path = os.path.join(self.search_dir, name)
+            if _SEARCH_FILE_RE.match(name) and name not in files:
+                os.remove(path)
+                self.manifest.remove(path)
+        return os.path.join(self.search_dir, SEARCH_META_FILE)
+
+    def _day_order(self) -> List[Tuple[int, int, str]]:
+        """(day, order, path) of the days of this run, in day order."""
+        return sorted((day, order, path) for path, (day, order) in self._days.items())
+
+    def _combined_day_text(self, path: str) -> str:
+        """A day file as the combined file holds it: with its whole content, not chunked."""
+        with open(path, 'r', encoding='utf-8') as f:
+            day_text = f.read()
+        if '"contentChunks":' not in day_text:
+            return day_text
+        day_data = json.loads(day_text)
+        parts = [day_data['content']]
+        for entry in day_data.pop('contentChunks'):
+            if 'file' in entry:
+                with open(os.path.join(self.data_dir, entry['file']), 'r', encoding='utf-8') as f:
+                    parts.append(f.read())
+        day_data['content'] = '\n'.join(parts)
+        return dumps(day_data)
+
+    @property
+    def day_count(self) -> int:
+        return len(self._days)
+
+    def close(self) -> Optional[str]:
+        """Write index.json, references.json, the bundle, the search index, the manifest and the combined file, if requested; returns its path."""
+        self.write_index()
+        self.write_references()
+        self.write_bundle()
+        self.write_search()
+        self.write_manifest()
+        if not self.combined_path:
+            return None
+        parent = os.path.dirname(self.combined_path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        with self.output.open(self.combined_path) as out:
+            out.write('{\n')
+            out.write('  "metadata": ' + _nested(dumps(self.metadata), '  ') + ',\n')
+            out.write('  "colorScheme": ' + _nested(dumps(self.color_scheme), '  ') + ',\n')
+            if not self._days:
+                out.write('  "days": []')
+            else:
+                out.write('  "days": [\n')
+                for i, (_, _, path) in enumerate(self._day_order()):
+                    day_text = self._combined_day_text(path)
+                    if i:
+                        out.write(',\n')
+                    out.write('    ' + _nested(day_text, '    '))
+                out.write('\n  ]')
+            if self.references is not None:
+                out.write(',\n  "references": ' + _nested(dumps(self.references.as_dict()), '  '))
+            out.write('\n}')
+        return self.combined_path
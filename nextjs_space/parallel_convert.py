@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Process-pool conversion of advent*.tex files.
+
+iter_parse_files() runs converter.parse_tex_file() over a list of files,
+either in-process (jobs == 1) or in a pool of worker processes, and yields
+each result as soon as it is ready. Workers get the largest files first so
+the pool is not left waiting on one big file at the end. parse_files()
+returns the same results in the order of the input list, so merged output
+is byte-identical to a serial run.
+
+A failure in one file (exception or crashed worker) is reported for that
+file only; the other files are still converted. Files that were queued on
+a worker when it died are retried one by one, each in a fresh worker. Workers build their own
+converter; the attributes a converter lists in WORKER_OPTIONS are copied
+to it, and its close() method, if it has one, runs when the worker exits
+(e.g. to save a cache once instead of after every file).
+"""
+
+import io
+import os
+import traceback
+from multiprocessing.util import Finalize
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+
+class FileResult(NamedTuple):
+    path: str
+    record: Optional[Dict[str, Any]]
+    output: str = ''              # what parse_tex_file printed
+    error: Optional[str] = None   # formatted exception, if the file failed
+
+
+def default_jobs() -> int:
+    return os.cpu_count() or 1
+
+
+def _parse_captured(converter, path: str) -> FileResult:
+    buffer = io.StringIO()
+    try:
+        with redirect_stdout(buffer):
+            record = converter.parse_tex_file(path)
+    except Exception:
+        return FileResult(path, None, buffer.getvalue(), traceback.format_exc())
+    return FileResult(path, record, buffer.getvalue())
+
+
+_worker_converter = None
+
+
+def _worker_options(converter) -> Dict[str, Any]:
+    return {name: getattr(converter, name) for name in getattr(converter, 'WORKER_OPTIONS', ())}
+
+
+def _init_worker(converter_cls, options: Dict[str, Any]):
+    global _worker_converter
+    _worker_converter = converter_cls()
+    for name, value in options.items():
+        setattr(_worker_converter, name, value)
+    if hasattr(_worker_converter, 'close'):
+        Finalize(_worker_converter, _worker_converter.close, exitpriority=10)
+
+
+def _parse_in_worker(path: str) -> FileResult:
+    return _parse_captured(_worker_converter, path)
+
+
+def iter_parse_files(converter, paths: List[str], jobs: int = 1) -> Iterator[FileResult]:
+    """Parse every path with converter, yielding results as they complete."""
+    if jobs <= 0:
+        jobs = default_jobs()
+    if jobs == 1 or len(paths) <= 1:
+        for path in paths:
+            yield _parse_captured(converter, path)
+        return
+
+    # Largest first: the longest conversions start immediately
+    by_size = sorted(paths, key=lambda p: os.path.getsize(p), reverse=True)
+    lost = []
+    with ProcessPoolExecutor(max_workers=min(jobs, len(paths)),
+                             initializer=_init_worker,
+                             initargs=(type(converter), _worker_options(converter))) as pool:
+        futures = {pool.submit(_parse_in_worker, path): path for path in by_size}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception:
+                # A worker died (BrokenProcessPool) and took its queue with it
+                lost.append(futures[future])
+                continue
+            yield result
+    # Files lost with a dead worker get one more attempt, each in a fresh
+    # worker of its own: a file that crashes its worker cannot take the
+    # main process or the other lost files with it
+    order = {path: i for i, path in enumerate(paths)}
+    for path in sorted(lost, key=order.__getitem__):
+        yield _parse_isolated(converter, path)
+
+
+def _parse_isolated(converter, path: str) -> FileResult:
+    with ProcessPoolExecutor(max_workers=1, initializer=_init_worker,
+                             initargs=(type(converter), _worker_options(converter))) as pool:
+        try:
+            return pool.submit(_parse_in_worker, path).result()
+        except Exception:
+            return FileResult(path, None, error=traceback.format_exc())
+
+
+def parse_files(converter, paths: List[str], jobs: int = 1) -> List[FileResult]:
+    """Parse every path with converter; results in the order of paths."""
+    results = {r.path: r for r in iter_parse_files(converter, paths, jobs)}
+    return [results[path] for path in paths]
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Precompressed siblings of the generated JSON, HTML and bundle files.
+
+For every artifact (by default *.json, *.html and *.bundle under the given
+paths) writes
+    <file>.gz   gzip, level 9, no timestamp (same input → same bytes)
+    <file>.br   brotli, if the brotli module is installed, otherwise
+    <file>.zz   zlib/deflate, level 9
+so a reverse proxy can serve them directly (e.g. nginx gzip_static /
+brotli_static) without compressing on every request.
+
+The manifest (.cache/precompress/manifest.json) remembers size, mtime and
+SHA-256 of every input: an artifact whose content did not change is not
+compressed again. Siblings of artifacts that disappeared are removed. A
+report with raw, minified (JSON only) and compressed sizes per artifact is
+written to .cache/precompress/report.json; it carries no timestamp, so a
+run that changed nothing leaves it (and its mtime) alone.
+
+Usage:
+    python3 precompress_outputs.py                    # public/ and out/
+    python3 precompress_outputs.py public/data --ext .json
+"""
+
+import argparse
+import gzip
+import json
+import os
+import zlib
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from build_cache import file_digest
+from output_writer import write_if_changed
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+MANIFEST_FORMAT = 1
+DEFAULT_CACHE_DIR = '.cache/precompress'
+DEFAULT_PATHS = ['public', 'out']
+DEFAULT_EXTENSIONS = ('.json', '.html', '.bundle')
+
+
+class Encoding(NamedTuple):
+    name: str
+    suffix: str
+    compress: Callable[[bytes], bytes]
+
+
+ENCODINGS: List[Encoding] = [Encoding('gzip', '.gz', lambda data: gzip.compress(data, 9, mtime=0))]
+if brotli is not None:
+    ENCODINGS.append(Encoding('br', '.br', lambda data: brotli.compress(data, quality=11)))
+else:
+    ENCODINGS.append(Encoding('deflate', '.zz', lambda data: zlib.compress(data, 9)))
+
+
+def minified_size(path: str, data: bytes) -> Optional[int]:
+    """Size of the file without formatting whitespace (JSON only)."""
+    if not path.endswith('.json'):
+        return None
+    try:
+        value = json.loads(data)
+    except ValueError:
+        return None
+    return len(json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+class Precompressor:
+    """Writes and tracks the compressed siblings of a set of artifacts."""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR,
+                 extensions: tuple = DEFAULT_EXTENSIONS):
+        self.cache_dir = cache_dir
+        self.extensions = extensions
+        self.manifest_path = os.path.join(cache_dir, 'manifest.json')
+        self.report_path = os.path.join(cache_dir, 'report.json')
+        self.entries: Dict[str, Dict[str, Any]] = self._load()
+        self.compressed = 0
+        self.skipped = 0
+        self.removed = 0
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if manifest.get('format') != MANIFEST_FORMAT:
+            return {}
+        if manifest.get('encodings') != [e.name for e in ENCODINGS]:
+            return {}
+        return manifest['entries']
+
+    def artifacts(self, paths: List[str]) -> List[str]:
+        """Files below paths (or the paths themselves) with a matching extension."""
+        found = []
+        for path in paths:
+            if os.path.isfile(path):
+                found.append(os.path.normpath(path))
+                continue
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                found.extend(os.path.normpath(os.path.join(root, name))
+                             for name in sorted(files) if name.endswith(self.extensions))
+        return found
+
+    def _up_to_date(self, path: str, st: os.stat_result) -> bool:
+        entry = self.entries.get(path)
+        if entry is None:
+            return False
+        if not all(os.path.exists(path + e.suffix) for e in ENCODINGS):
+            return False
+        if entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+            return True
+        if entry['sha256'] == file_digest(path):
+            entry['mtime_ns'] = st.st_mtime_ns
+            return True
+        return False
+
+    def compress(self, path: str) -> Dict[str, Any]:
+        """Bring the siblings of one artifact up to date; returns its manifest entry."""
+        st = os.stat(path)
+        if self._up_to_date(path, st):
+            self.skipped += 1
+            return self.entries[path]
+        with open(path, 'rb') as f:
+            data = f.read()
+        sizes = {}
+        for encoding in ENCODINGS:
+            packed = encoding.compress(data)
+            write_if_changed(path + encoding.suffix, packed)
+            sizes[encoding.name] = len(packed)
+        entry = {
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+            'sha256': file_digest(path),
+            'minified': minified_size(path, data),
+            'compressed': sizes,
+        }
+        self.entries[path] = entry
+        self.compressed += 1
+        return entry
+
+    def run(self, paths: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Compress every artifact under paths, drop siblings of vanished ones."""
+        artifacts = self.artifacts(paths)
+        live = set(artifacts)
+        for path in artifacts:
+            self.compress(path)
+        roots = [os.path.normpath(p) for p in paths]
+        for path in list(self.entries):
+            under = any(path == root or path.startswith(root + os.sep) for root in roots)
+            if under and path not in live:
+                for encoding in ENCODINGS:
+                    if os.path.exists(path + encoding.suffix):
+                        os.remove(path + encoding.suffix)
+                del self.entries[path]
+                self.removed += 1
+        self.save()
+        return {path: self.entries[path] for path in artifacts}
+
+    def save(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        manifest = {'format': MANIFEST_FORMAT, 'encodings': [e.name for e in ENCODINGS],
+                    'entries': self.entries}
+        write_if_changed(self.manifest_path, json.dumps(manifest, ensure_ascii=False, indent=1,
+                                                        sort_keys=True))
+
+    def write_report(self, artifacts: Dict[str, Dict[str, Any]]) -> str:
+        names = [e.name for e in ENCODINGS]
+        rows = [{'path': path, 'raw': entry['size'], 'minified': entry['minified'],
+                 **{name: entry['compressed'][name] for name in names}}
+                for path, entry in sorted(artifacts.items())]
+        totals = {'raw': sum(row['raw'] for row in rows),
+                  'minified': sum(row['minified'] or row['raw'] for row in rows)}
+        for name in names:
+            totals[name] = sum(row[name] for row in rows)
+        # No timestamp: the report only changes (and is only rewritten) with the sizes
+        report = {
+            'encodings': names,
+            'totals': totals,
+            'artifacts': rows,
+        }
+        write_if_changed(self.report_path, json.dumps(report, ensure_ascii=False, indent=2))
+        return self.report_path
+
+
+def format_report(artifacts: Dict[str, Dict[str, Any]], largest: int = 10) -> str:
+    names = [e.name for e in ENCODINGS]
+    header = f"  {'artifact':<40} {'raw':>9} {'minified':>9}" + ''.join(f" {n:>9}" for n in names)
+    lines = [header]
+    rows = sorted(artifacts.items(), key=lambda item: item[1]['size'], reverse=True)
+    for path, entry in rows[:largest]:
+        minified = entry['minified'] if entry['minified'] is not None else '-'
+        lines.append(f"  {path[-40:]:<40} {entry['size']:>9} {minified:>9}"
+                     + ''.join(f" {entry['compressed'][n]:>9}" for n in names))
+    raw = sum(e['size'] for e in artifacts.values())
+    minified = sum(e['minified'] or e['size'] for e in artifacts.values())
+    lines.append(f"  {f'total ({len(artifacts)} files)':<40} {raw:>9} {minified:>9}"
+                 + ''.join(f" {sum(e['compressed'][n] for e in artifacts.values()):>9}"
+                           for n in names))
+    return '\n'.join(lines)
+
+
+def precompress(paths: List[str], cache_dir: str = DEFAULT_CACHE_DIR,
+                extensions: tuple = DEFAULT_EXTENSIONS, verbose: bool = True) -> Precompressor:
+    """Precompress the artifacts under paths and write the size report."""
+    compressor = Precompressor(cache_dir, extensions)
+    artifacts = compressor.run([p for p in paths if os.path.exists(p)])
+    report_path = compressor.write_report(artifacts)
+    if verbose:
+        print(format_report(artifacts))
+        print(f"✓ Precompressed {compressor.compressed} files "
+              f"({compressor.skipped} unchanged, {compressor.removed} removed); "
+              f"report {report_path}")
+    return compressor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write .gz and .br/.zz siblings of JSON and HTML outputs")
+    parser.add_argument('paths', nargs='*', default=DEFAULT_PATHS,
+                        help="files or directories (default: %(default)s)")
+    parser.add_argument('--ext', action='append',
+                        help=f"extension to compress, repeatable (default: {' '.join(DEFAULT_EXTENSIONS)})")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help="manifest and report directory (default: %(default)s)")
+    args = parser.parse_args()
+    precompress(args.paths, args.cache_dir, tuple(args.ext) if args.ext else DEFAULT_EXTENSIONS)
+
+
+if __name__ == '__main__':
+    main()
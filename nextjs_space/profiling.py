@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+"""
+Per-stage profiling of the LaTeX → JSON converters.
+
+A StageProfiler wraps the functions that make up each stage of a converter
+(file read, comment stripping, macro extraction, body processing, inline
+HTML conversion, reference extraction, JSON write) for the duration of a
+`with` block, and adds up wall time, call counts and bytes processed per
+stage and per file. Optionally it also runs cProfile and tracemalloc (peak
+memory per file). Nothing is patched outside the `with` block, so a run
+without --profile executes exactly the same code as before.
+
+Stage times are inclusive ('body' contains the 'inline' calls made for
+it); the 'self' column subtracts time spent in nested stages.
+
+Converters declare their stages in profile_stages(); the command line
+tools use add_profile_arguments() / profiler_from_args().
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+
+REPORT_FORMAT = 1
+DEFAULT_PROFILE_DIR = '.cache/profile'
+FILE_STAGE = 'parse'   # the stage that handles one whole file
+
+
+class Stage(NamedTuple):
+    name: str
+    owner: Any                  # class or module holding the function
+    attr: str                   # attribute name of the function
+    size: Optional[Callable[[tuple, Any], int]] = None   # (args, result) -> bytes
+
+
+def text_size(value: Any) -> int:
+    """UTF-8 size of a string, a TokenStream (.text) or a LatexDocument (.raw)."""
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    for attr in ('raw', 'text'):   # raw first: LatexDocument.text would strip comments
+        text = getattr(value, attr, None)
+        if isinstance(text, str):
+            return len(text.encode('utf-8'))
+    return 0
+
+
+def args_size(args: tuple, result: Any) -> int:
+    """Size of the first text-like argument (the default for a stage)."""
+    for arg in args:
+        size = text_size(arg)
+        if size:
+            return size
+    return 0
+
+
+def file_arg_size(args: tuple, result: Any) -> int:
+    """Size of the first argument that names an existing file."""
+    for arg in args:
+        if isinstance(arg, (str, os.PathLike)) and os.path.isfile(arg):
+            return os.path.getsize(arg)
+    return 0
+
+
+def result_size(args: tuple, result: Any) -> int:
+    return text_size(result)
+
+
+def last_arg_size(args: tuple, result: Any) -> int:
+    return text_size(args[-1]) if args else 0
+
+
+def written_size(args: tuple, result: Any) -> int:
+    """Size of the file whose path the function returned."""
+    return os.path.getsize(result) if isinstance(result, str) and os.path.isfile(result) else 0
+
+
+def _defining_class(owner: Any, attr: str) -> Any:
+    """The class in owner's MRO that defines attr (owner itself for a module)."""
+    for klass in getattr(owner, '__mro__', (owner,)):
+        if attr in vars(klass):
+            return klass
+    raise AttributeError(f"{owner!r} has no attribute {attr!r}")
+
+
+class _Totals:
+    __slots__ = ('seconds', 'self_seconds', 'calls', 'bytes')
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.self_seconds = 0.0
+        self.calls = 0
+        self.bytes = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {'seconds': round(self.seconds, 6), 'self_seconds': round(self.self_seconds, 6),
+                'calls': self.calls, 'bytes': self.bytes}
+
+
+class StageProfiler:
+    """Collects time, calls and bytes per stage while active (see module docstring)."""
+
+    def __init__(self, stages: List[Stage], name: str = '',
+                 use_cprofile: bool = False, use_tracemalloc: bool = False):
+        self.stages = stages
+        self.name = name
+        self.use_cprofile = use_cprofile
+        self.use_tracemalloc = use_tracemalloc
+        self.totals: Dict[str, _Totals] = {stage.name: _Totals() for stage in stages}
+        self.files: Dict[str, Dict[str, _Totals]] = {}
+        self.file_peaks: Dict[str, int] = {}
+        self.peak_memory: Optional[int] = None
+        self.cprofile: Optional[cProfile.Profile] = None
+        self.seconds = 0.0
+        self._current_file: Optional[str] = None
+        self._stack: List[List[float]] = []     # [start, time in nested stages]
+        self._saved: List[tuple] = []
+        self._started = 0.0
+
+    # -- wrapping ------------------------------------------------------------
+
+    def _wrap(self, stage: Stage, func: Callable) -> Callable:
+        totals = self.totals[stage.name]
+        size = stage.size or args_size
+        is_file_stage = stage.name == FILE_STAGE
+        active = [0]   # recursive calls are counted, but timed once
+
+        def wrapper(*args, **kwargs):
+            totals.calls += 1
+            if active[0]:
+                return func(*args, **kwargs)
+            if is_file_stage:
+                self._current_file = next((a for a in args if isinstance(a, str)), None)
+                if self.use_tracemalloc:
+                    tracemalloc.reset_peak()
+            active[0] += 1
+            frame = [time.perf_counter(), 0.0]
+            self._stack.append(frame)
+            result = None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            finally:
+                elapsed = time.perf_counter() - frame[0]
+                self._stack.pop()
+                active[0] -= 1
+                if self._stack:
+                    self._stack[-1][1] += elapsed
+                nbytes = size(args, result)
+                self._add(totals, elapsed, elapsed - frame[1], nbytes)
+                path = self._current_file
+                if path is not None:
+                    per_file = self.files.setdefault(path, {})
+                    self._add(per_file.setdefault(stage.name, _Totals()),
+                              elapsed, elapsed - frame[1], nbytes, calls=1)
+                if is_file_stage:
+                    if self.use_tracemalloc and path is not None:
+                        self.file_peaks[path] = tracemalloc.get_traced_memory()[1]
+                    self._current_file = None
+        return wrapper
+
+    @staticmethod
+    def _add(totals: _Totals, seconds: float, self_seconds: float, nbytes: int, calls: int = 0):
+        totals.seconds += seconds
+        totals.self_seconds += self_seconds
+        totals.bytes += nbytes
+        totals.calls += calls
+
+    def __enter__(self):
+        for stage in self.stages:
+            owner = _defining_class(stage.owner, stage.attr)
+            original = vars(owner)[stage.attr]
+            if isinstance(original, (classmethod, staticmethod)):
+                patched = type(original)(self._wrap(stage, original.__func__))
+            else:
+                patched = self._wrap(stage, original)
+            self._saved.append((owner, stage.attr, original))
+            setattr(owner, stage.attr, patched)
+        if self.use_tracemalloc:
+            tracemalloc.start()
+        if self.use_cprofile:
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds += time.perf_counter() - self._started
+        if self.cprofile:
+            self.cprofile.disable()
+        if self.use_tracemalloc:
+            self.peak_memory = max(self.peak_memory or 0, tracemalloc.get_traced_memory()[1],
+                                   *self.file_peaks.values())
+            tracemalloc.stop()
+        for owner, attr, original in reversed(self._saved):
+            setattr(owner, attr, original)
+        self._saved = []
+
+    # -- reporting -----------------------------------------------------------
+
+    def stage_report(self) -> Dict[str, Dict[str, Any]]:
+        return {name: totals.as_dict() for name, totals in self.totals.items()}
+
+    def cprofile_top(self, limit: int = 25) -> List[Dict[str, Any]]:
+        """Functions with the highest cumulative time under cProfile."""
+        if not self.cprofile:
+            return []
+        stats = pstats.Stats(self.cprofile, stream=io.StringIO())
+        rows = []
+        for (filename, line, func), (_, calls, own, cumulative, _) in stats.stats.items():
+            rows.append({'function': f"{os.path.basename(filename)}:{line}({func})",
+                         'calls': calls, 'self_seconds': round(own, 6),
+                         'seconds': round(cumulative, 6)})
+        rows.sort(key=lambda row: row['seconds'], reverse=True)
+        return rows[:limit]
+
+    def report(self) -> Dict[str, Any]:
+        files = {}
+        for path, stages in sorted(self.files.items()):
+            entry = {'stages': {name: t.as_dict() for name, t in stages.items()}}
+            if path in self.file_peaks:
+                entry['peak_memory_bytes'] = self.file_peaks[path]
+            files[path] = entry
+        return {
+            'format': REPORT_FORMAT,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'converter': self.name,
+            'seconds': round(self.seconds, 6),
+            'peak_memory_bytes': self.peak_memory,
+            'stages': self.stage_report(),
+            'files': files,
+            'cprofile': self.cprofile_top(),
+        }
+
+    def summary(self, slowest: int = 5) -> str:
+        """Stage table plus the slowest files, for printing."""
+        lines = [f"Profile ({self.name}, {self.seconds:.3f}s total; times include nested stages)",
+                 f"  {'stage':<8} {'calls':>8} {'total s':>9} {'self s':>9} {'MB':>9} {'MB/s':>8}"]
+        for name, t in self.totals.items():
+            rate = t.bytes / 1e6 / t.seconds if t.seconds and t.bytes else 0.0
+            lines.append(f"  {name:<8} {t.calls:>8} {t.seconds:>9.3f} {t.self_seconds:>9.3f} "
+                         f"{t.bytes / 1e6:>9.3f} {rate:>8.2f}")
+        if self.peak_memory is not None:
+            lines.append(f"  peak memory {self.peak_memory / 1e6:.1f} MB")
+        timed = [(stages[FILE_STAGE].seconds, path) for path, stages in self.files.items()
+                 if FILE_STAGE in stages]
+        if timed:
+            lines.append("Slowest files:")
+            for seconds, path in sorted(timed, reverse=True)[:slowest]:
+                parts = ', '.join(f"{name} {t.self_seconds:.3f}s"
+                                  for name, t in self.files[path].items() if name != FILE_STAGE)
+                memory = ''
+                if path in self.file_peaks:
+                    memory = f", peak {self.file_peaks[path] / 1e6:.1f} MB"
+                lines.append(f"  {os.path.basename(path):<16} {seconds:.3f}s ({parts}{memory})")
+        if self.cprofile:
+            lines.append("Top functions (cProfile, cumulative):")
+            for row in self.cprofile_top(10):
+                lines.append(f"  {row['seconds']:>9.3f}s {row['calls']:>8}  {row['function']}")
+        return '\n'.join(lines)
+
+    def write_report(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+        if self.cprofile:
+            self.cprofile.dump_stats(os.path.splitext(path)[0] + '.prof')
+        return path
+
+
+def add_profile_arguments(parser):
+    parser.add_argument('--profile', action='store_true',
+                        help="time each conversion stage and print a report "
+                             "(runs serially; add --no-cache to profile every file)")
+    parser.add_argument('--profile-output',
+                        help=f"JSON profile report (default: {DEFAULT_PROFILE_DIR}/<converter>.json)")
+    parser.add_argument('--profile-cprofile', action='store_true',
+                        help="with --profile: also run cProfile (.prof file next to the report)")
+    parser.add_argument('--profile-memory', action='store_true',
+                        help="with --profile: also track peak memory per file (tracemalloc)")
+
+
+def profiler_from_args(args, converter) -> Optional[StageProfiler]:
+    """A profiler for converter if --profile was given, else None."""
+    if not args.profile:
+        return None
+    return StageProfiler(converter.profile_stages(), type(converter).__name__,
+                         use_cprofile=args.profile_cprofile,
+                         use_tracemalloc=args.profile_memory)
+
+
+def finish_profile(profiler: StageProfiler, output: Optional[str] = None):
+    """Print the summary and write the JSON report."""
+    print()
+    print(profiler.summary())
+    path = profiler.write_report(output or os.path.join(DEFAULT_PROFILE_DIR, f"{profiler.name}.json"))
+    print(f"✓ Profile report {path}")
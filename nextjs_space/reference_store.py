@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Shared store of bibliography entries.
+
+Many days cite the same \\bibitem. Instead of repeating the converted text
+in every day file, the converter can collect all entries in one
+public/data/references.json:
+
+    {
+      "Baez2002": {"3f1c0a9b": "J. C. Baez, ..."},
+      "Haag1996": {"07be55d1": "R. Haag, ...", "c2a4e8f0": "R. Haag, Local ..."},
+      ...
+    }
+
+Entries are keyed by bibitem key and by the hash of their text, stored
+exactly as the converter rendered it, so resolving a day gives the same
+references as inlining them. A day then carries only the ids "key#hash"
+of its references, in citation order.
+
+The same key with two texts is kept as two entries; it is reported as a
+conflict only if the texts still differ after normalize_text (whitespace,
+HTML tags, braces and LaTeX font switches dropped), so a stray space or
+\\newblock does not count.
+"""
+
+import hashlib
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+
+HASH_LENGTH = 8
+
+_MARKUP_RE = re.compile(r'<[^>]*>|\\(?:newblock|em|it|bf|tt|sl|sc|rm)(?![A-Za-z])|[{}\s]')
+
+
+def normalize_text(text: str) -> str:
+    """A reference text reduced to what tells two references apart (for conflicts)."""
+    return _MARKUP_RE.sub('', text)
+
+
+def text_hash(text: str) -> str:
+    """Hash of a reference text."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:HASH_LENGTH]
+
+
+def split_id(ref_id: str) -> Tuple[str, str]:
+    key, _, digest = ref_id.rpartition('#')
+    return key, digest
+
+
+class ReferenceStore:
+    """Reference texts of all days (key -> hash -> text) and who cites which."""
+
+    def __init__(self):
+        self.texts: Dict[str, Dict[str, str]] = {}
+        self.citations: Dict[int, List[str]] = {}   # day -> reference ids
+        self._cited: Optional[Dict[str, Dict[str, List[int]]]] = None   # cited(), until a change
+
+    @classmethod
+    def load(cls, data_dir: str) -> 'ReferenceStore':
+        """Store of an existing output directory (references.json and days/)."""
+        store = cls()
+        try:
+            with open(os.path.join(data_dir, 'references.json'), 'r', encoding='utf-8') as f:
+                store.texts = json.load(f)
+        except (OSError, ValueError):
+            return store
+        days_dir = os.path.join(data_dir, 'days')
+        for name in sorted(os.listdir(days_dir)) if os.path.isdir(days_dir) else []:
+            try:
+                with open(os.path.join(days_dir, name), 'r', encoding='utf-8') as f:
+                    day_data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            refs = day_data.get('references', [])
+            if all(isinstance(ref, str) for ref in refs):
+                store.citations[day_data['day']] = refs
+        return store
+
+    def add(self, day: int, reference: Dict[str, str]) -> str:
+        """Record one reference of day; returns the id that replaces it."""
+        key = reference['key']
+        digest = text_hash(reference['text'])
+        self.texts.setdefault(key, {})[digest] = reference['text']
+        ref_id = f"{key}#{digest}"
+        self.citations.setdefault(day, []).append(ref_id)
+        self._cited = None
+        return ref_id
+
+    def forget_day(self, day: int):
+        self.citations.pop(day, None)
+        self._cited = None
+
+    def detach(self, day_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of day_data whose references are ids into the store."""
+        day = day_data['day']
+        self.forget_day(day)
+        self.citations[day] = []
+        detached = dict(day_data)
+        detached['references'] = [self.add(day, ref) for ref in day_data.get('references', [])]
+        return detached
+
+    def resolve(self, day_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Inverse of detach: day_data with the reference texts filled in again."""
+        resolved = dict(day_data)
+        refs = []
+        for ref_id in day_data.get('references', []):
+            key, digest = split_id(ref_id)
+            refs.append({'key': key, 'text': self.texts[key][digest]})
+        resolved['references'] = refs
+        return resolved
+
+    def cited(self) -> Dict[str, Dict[str, List[int]]]:
+        """key -> hash -> days citing that text, for every cited reference."""
+        if self._cited is not None:
+            return self._cited
+        cited: Dict[str, Dict[str, List[int]]] = {}
+        for day in sorted(self.citations):
+            for ref_id in self.citations[day]:
+                key, digest = split_id(ref_id)
+                days = cited.setdefault(key, {}).setdefault(digest, [])
+                # Days come in order, so a repeated citation is the last one
+                if not days or days[-1] != day:
+                    days.append(day)
+        self._cited = cited
+        return cited
+
+    def conflicts(self) -> Dict[str, List[List[int]]]:
+        """Keys cited with texts that differ after normalize_text: key -> the citing days of each text."""
+        conflicts = {}
+        for key, variants in sorted(self.cited().items()):
+            if len(variants) < 2:
+                continue
+            by_text: Dict[str, List[int]] = {}
+            for digest, days in variants.items():
+                by_text.setdefault(normalize_text(self.texts[key][digest]), []).extend(days)
+            if len(by_text) > 1:
+                conflicts[key] = [sorted(set(days)) for days in by_text.values()]
+        return conflicts
+
+    def as_dict(self) -> Dict[str, Dict[str, str]]:
+        """Cited entries sorted by key and hash, so the file only changes with its content."""
+        cited = self.cited()
+        return {key: {digest: self.texts[key][digest] for digest in sorted(cited[key])}
+                for key in sorted(cited)}
+
+    @property
+    def count(self) -> int:
+        return sum(len(variants) for variants in self.cited().values())
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Inverted full-text index of the converted days, built at conversion time.
+
+The converter (with --search-index) adds the plain text of every section
+of a day to its record, taken from the parsed tree with
+PlainTextRenderer(math=False), so there is no markup or math to strip:
+section 0 is the heading part (title, subtitle, key insight, intro),
+sections 1..n are the body split before every top-level section (the
+contentChunks of a chunked day), and the closing is the last one.
+DayShardWriter feeds that text to a SearchIndexBuilder and writes
+
+    public/data/search/meta.json     {"format": 1, "prefixLength": 2,
+                                      "sections": <number of sections>,
+                                      "days": {<day>: <its sections>, ...},
+                                      "shards": [<shard names>]}
+    public/data/search/<shard>.json  {"format": 1, "terms": {term: postings}}
+
+Terms are the runs of letters and digits of the text after NFKD
+normalization, with accents dropped and case folded (tokenize). A term is
+in the shard named after its first prefixLength characters (shard_name), so
+a query fetches only the shards of its own terms. The postings of a term
+are one flat list of integers, one group per section it occurs in, sorted
+by day and section:
+
+    day delta, section (delta within the same day), count, position deltas...
+
+Positions count the terms of a section from 0, for phrase queries.
+
+SearchIndex answers queries from these files: words must all occur in a
+section, "quoted words" must occur in this order. Only the shards of the
+query terms are read.
+
+Usage:
+    python3 search_index.py 'matrix mechanics'
+    python3 search_index.py '"exceptional jordan algebra"' --dir public/data/search
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import time
+import unicodedata
+from typing import Dict, List, NamedTuple, Tuple
+
+
+INDEX_FORMAT = 1
+PREFIX_LENGTH = 2
+SEARCH_DIR = 'search'
+META_FILE = 'meta.json'
+
+_TERM_RE = re.compile(r'[^\W_]+')
+_PHRASE_RE = re.compile(r'"([^"]*)"?')
+_ASCII_SHARD_RE = re.compile(r'[a-z0-9]+')
+
+Posting = Tuple[int, int, List[int]]   # day, section, positions
+
+
+def tokenize(text: str) -> List[str]:
+    """The normalized terms of text, in order."""
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return _TERM_RE.findall(text.casefold())
+
+
+def shard_name(term: str, prefix_length: int = PREFIX_LENGTH) -> str:
+    """File name (without .json) of the shard holding term."""
+    prefix = term[:prefix_length]
+    if _ASCII_SHARD_RE.fullmatch(prefix):
+        return prefix
+    return 'u' + prefix.encode('utf-8').hex()
+
+
+def encode_postings(postings: List[Posting]) -> List[int]:
+    encoded: List[int] = []
+    prev_day = prev_section = 0
+    for day, section, positions in postings:
+        if day != prev_day:
+            prev_section = 0
+        encoded += [day - prev_day, section - prev_section, len(positions)]
+        prev = 0
+        for position in positions:
+            encoded.append(position - prev)
+            prev = position
+        prev_day, prev_section = day, section
+    return encoded
+
+
+def decode_postings(encoded: List[int]) -> List[Posting]:
+    postings: List[Posting] = []
+    day = section = i = 0
+    while i < len(encoded):
+        day_delta, section_delta, count = encoded[i:i + 3]
+        if day_delta:
+            day += day_delta
+            section = 0
+        section += section_delta
+        positions = []
+        position = 0
+        for delta in encoded[i + 3:i + 3 + count]:
+            position += delta
+            positions.append(position)
+        postings.append((day, section, positions))
+        i += 3 + count
+    return postings
+
+
+class SearchIndexBuilder:
+    """The terms of every section of every day, turned into index shards."""
+
+    def __init__(self, prefix_length: int = PREFIX_LENGTH):
+        self.prefix_length = prefix_length
+        self.days: Dict[int, List[List[str]]] = {}   # day -> terms of each section
+
+    @classmethod
+    def load(cls, directory: str) -> 'SearchIndexBuilder':
+        """Builder holding the index written to directory (e.g. public/data/search)."""
+        try:
+            with open(os.path.join(directory, META_FILE), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        if meta.get('format') != INDEX_FORMAT:
+            return cls()
+        builder = cls(meta['prefixLength'])
+        # Sections without terms are in no shard; they count for the idf all the same
+        for day, count in meta.get('days', {}).items():
+            builder.days[int(day)] = [[] for _ in range(count)]
+        sections: Dict[Tuple[int, int], Dict[int, str]] = {}
+        for name in meta['shards']:
+            with open(os.path.join(directory, name + '.json'), 'r', encoding='utf-8') as f:
+                shard = json.load(f)
+            for term, encoded in shard['terms'].items():
+                for day, section, positions in decode_postings(encoded):
+                    terms = sections.setdefault((day, section), {})
+                    for position in positions:
+                        terms[position] = term
+        for (day, section), terms in sorted(sections.items()):
+            day_sections = builder.days.setdefault(day, [])
+            day_sections.extend([] for _ in range(section + 1 - len(day_sections)))
+            day_sections[section] = [terms[p] for p in sorted(terms)]
+        return builder
+
+    def add_day(self, day: int, sections: List[Dict[str, str]]):
+        """Index (or re-index) one day from its {'title', 'text'} sections."""
+        self.days[day] = [tokenize(section['text']) for section in sections]
+
+    def remove_day(self, day: int):
+        self.days.pop(day, None)
+
+    @property
+    def section_count(self) -> int:
+        return sum(len(sections) for sections in self.days.values())
+
+    def postings(self) -> Dict[str, List[Posting]]:
+        """term -> its postings, sorted by day and section."""
+        index: Dict[str, List[Posting]] = {}
+        for day in sorted(self.days):
+            for section, terms in enumerate(self.days[day]):
+                positions: Dict[str, List[int]] = {}
+                for position, term in enumerate(terms):
+                    positions.setdefault(term, []).append(position)
+                for term, found in positions.items():
+                    index.setdefault(term, []).append((day, section, found))
+        return index
+
+    def files(self) -> Dict[str, str]:
+        """File name -> content of meta.json and every shard."""
+        shards: Dict[str, Dict[str, List[int]]] = {}
+        for term, postings in sorted(self.postings().items()):
+            shards.setdefault(shard_name(term, self.prefix_length), {})[term] = encode_postings(postings)
+        compact = {'ensure_ascii': False, 'separators': (',', ':')}
+        files = {f"{name}.json": json.dumps({'format': INDEX_FORMAT, 'terms': terms}, **compact)
+                 for name, terms in sorted(shards.items())}
+        files[META_FILE] = json.dumps({'format': INDEX_FORMAT, 'prefixLength': self.prefix_length,
+                                       'sections': self.section_count,
+                                       'days': {str(day): len(self.days[day]) for day in sorted(self.days)},
+                                       'shards': sorted(shards)},
+                                      **compact)
+        return files
+
+
+class SearchHit(NamedTuple):
+    day: int
+    section: int
+    score: float
+    matches: int     # occurrences of the query's words and phrases
+
+
+def parse_query(query: str) -> List[List[str]]:
+    """The phrases of a query: each quoted part, and every other word on its own."""
+    phrases = []
+    for m in _PHRASE_RE.finditer(query):
+        terms = tokenize(m.group(1))
+        if terms:
+            phrases.append(terms)
+    phrases.extend([term] for term in tokenize(_PHRASE_RE.sub(' ', query)))
+    return phrases
+
+
+class SearchIndex:
+    """Queries against a written index; each shard is read on first use."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, META_FILE), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('format') != INDEX_FORMAT:
+            raise ValueError(f"{directory}: unsupported search index format {meta.get('format')}")
+        self.prefix_length = meta['prefixLength']
+        self.section_count = meta['sections']
+        self._shards: Dict[str, Dict[str, List[int]]] = {}
+
+    @property
+    def shards_loaded(self) -> int:
+        return len(self._shards)
+
+    def _shard(self, name: str) -> Dict[str, List[int]]:
+        shard = self._shards.get(name)
+        if shard is None:
+            try:
+                with open(os.path.join(self.directory, name + '.json'), 'r', encoding='utf-8') as f:
+                    shard = json.load(f)['terms']
+            except FileNotFoundError:
+                shard = {}
+            self._shards[name] = shard
+        return shard
+
+    def postings(self, term: str) -> List[Posting]:
+        """Postings of one normalized term."""
+        encoded = self._shard(shard_name(term, self.prefix_length)).get(term)
+        return decode_postings(encoded) if encoded else []
+
+    def _phrase(self, terms: List[str]) -> Dict[Tuple[int, int], int]:
+        """(day, section) -> number of occurrences of the phrase."""
+        found = None
+        for offset, term in enumerate(terms):
+            starts = {(day, section): {p - offset for p in positions}
+                      for day, section, positions in self.postings(term)}
+            if found is None:
+                found = starts
+            else:
+                found = {key: found[key] & starts[key] for key in found.keys() & starts.keys()}
+            found = {key: positions for key, positions in found.items() if positions}
+            if not found:
+                return {}
+        return {key: len(positions) for key, positions in found.items()}
+
+    def search(self, query: str, limit: int = 20) -> List[SearchHit]:
+        """Sections containing every word and phrase of query, best first."""
+        phrases = parse_query(query)
+        if not phrases:
+            return []
+        scores: Dict[Tuple[int, int], float] = {}
+        matches: Dict[Tuple[int, int], int] = {}
+        for i, phrase in enumerate(phrases):
+            counts = self._phrase(phrase)
+            if i:
+                counts = {key: n for key, n in counts.items() if key in scores}
+            if not counts:
+                return []
+            idf = math.log(1 + self.section_count / len(counts))
+            scores = {key: (scores[key] if i else 0.0) + (1 + math.log(n)) * idf
+                      for key, n in counts.items()}
+            matches = {key: (matches[key] if i else 0) + n for key, n in counts.items()}
+        ranked = sorted(scores, key=lambda key: (-scores[key], key))
+        return [SearchHit(day, section, round(scores[(day, section)], 4), matches[(day, section)])
+                for day, section in ranked[:limit]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the search index written by the converter")
+    parser.add_argument('query', help='words, and "phrases" in double quotes')
+    parser.add_argument('--dir', default=os.path.join('public/data', SEARCH_DIR),
+                        help="index directory (default: %(default)s)")
+    parser.add_argument('--limit', '-n', type=int, default=10, help="hits to show (default: %(default)s)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    index = SearchIndex(args.dir)
+    hits = index.search(args.query, args.limit)
+    elapsed = (time.perf_counter() - started) * 1000
+    for hit in hits:
+        print(f"  day {hit.day:>3}  section {hit.section:>2}  score {hit.score:7.3f}  ({hit.matches}×)")
+    print(f"{len(hits)} hits in {elapsed:.1f} ms, {index.shards_loaded} of the shards read")
+
+
+if __name__ == '__main__':
+    main()
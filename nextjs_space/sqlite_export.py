@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+SQLite export of the converted days, with an FTS5 full-text index.
+
+With --sqlite FILE the converter loads every day it writes into one SQLite
+database, next to the JSON files, for server-side consumers that should
+not load and scan advent_data.json:
+
+    days        one row per (year, day): the summary fields, the HTML
+                fields and the whole day record as JSON (data)
+    sections    the plain text of each section of a day (the searchText of
+                the record, see RobustLatexConverter.search_sections)
+    formulas    the LaTeX source of every formula, by day and section
+    citations   the references of each day, in citation order
+    section_search
+                FTS5 index over sections.title and sections.text, kept in
+                sync by triggers
+
+Days are keyed by year and day, so the archives of several years share
+one database; dates are indexed for lookups by date. A full run replaces
+the rows of its year in one transaction, so readers see either the old or
+the new calendar; the watcher updates one day per transaction. The file
+is in WAL mode, so readers are not blocked while it is written.
+
+sqlite_query.py is the read side.
+"""
+
+import json
+import os
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS days (
+    year INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    date_display TEXT,
+    title TEXT,
+    subtitle TEXT,
+    type TEXT,
+    special TEXT,
+    key_insight TEXT,
+    central_formula TEXT,
+    intro TEXT,
+    content TEXT,
+    closing TEXT,
+    is_locked INTEGER,
+    data TEXT NOT NULL,
+    PRIMARY KEY (year, day)
+);
+CREATE INDEX IF NOT EXISTS days_date ON days (date);
+
+CREATE TABLE IF NOT EXISTS sections (
+    id INTEGER PRIMARY KEY,
+    year INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    section INTEGER NOT NULL,
+    title TEXT,
+    text TEXT,
+    UNIQUE (year, day, section)
+);
+
+CREATE TABLE IF NOT EXISTS formulas (
+    year INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    section INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    display INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    PRIMARY KEY (year, day, section, position)
+);
+
+CREATE TABLE IF NOT EXISTS citations (
+    year INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    text TEXT,
+    PRIMARY KEY (year, day, position)
+);
+CREATE INDEX IF NOT EXISTS citations_key ON citations (key);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS section_search USING fts5(
+    title, text, content='sections', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS sections_insert AFTER INSERT ON sections BEGIN
+    INSERT INTO section_search (rowid, title, text) VALUES (new.id, new.title, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS sections_delete AFTER DELETE ON sections BEGIN
+    INSERT INTO section_search (section_search, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+END;
+"""
+
+# Tables with rows per day, in the order they are cleared
+_DAY_TABLES = ('formulas', 'citations', 'sections', 'days')
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Connection with the schema in place (autocommit; transactions are explicit)."""
+    db = sqlite3.connect(path, isolation_level=None)
+    db.execute('PRAGMA journal_mode=WAL')
+    version = db.execute('PRAGMA user_version').fetchone()[0]
+    if version not in (0, SCHEMA_VERSION):
+        db.close()
+        raise ValueError(f"{path}: schema version {version}, expected {SCHEMA_VERSION}")
+    db.executescript(SCHEMA)
+    db.execute(f'PRAGMA user_version={SCHEMA_VERSION}')
+    return db
+
+
+class SqliteExport:
+    """Loads day records into the database; replace clears the year first."""
+
+    def __init__(self, path: str, year: int, replace: bool = True):
+        self.path = path
+        self.year = year
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self.db = connect(path)
+        self.days = 0
+        if replace:
+            self._begin()
+            for table in _DAY_TABLES:
+                self.db.execute(f'DELETE FROM {table} WHERE year = ?', (year,))
+
+    def _begin(self):
+        if not self.db.in_transaction:
+            self.db.execute('BEGIN')
+
+    def remove_day(self, day: int):
+        self._begin()
+        for table in _DAY_TABLES:
+            self.db.execute(f'DELETE FROM {table} WHERE year = ? AND day = ?', (self.year, day))
+
+    def add_day(self, day_data: Dict[str, Any]):
+        """Insert (or replace) one day record, with inlined references."""
+        day = day_data['day']
+        self.remove_day(day)
+        record = {k: v for k, v in day_data.items() if k != 'searchText'}
+        self.db.execute(
+            'INSERT INTO days VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (self.year, day, day_data['date'], day_data.get('dateDisplay'), day_data.get('title'),
+             day_data.get('subtitle'), day_data.get('type'), day_data.get('special'),
+             day_data.get('keyInsight'), day_data.get('centralFormula'), day_data.get('intro'),
+             day_data.get('content'), day_data.get('closing'), int(day_data.get('isLocked', False)),
+             json.dumps(record, ensure_ascii=False)))
+        sections: List[Dict[str, Any]] = day_data.get('searchText', [])
+        self.db.executemany(
+            'INSERT INTO sections (year, day, section, title, text) VALUES (?, ?, ?, ?, ?)',
+            [(self.year, day, k, section['title'], section['text'])
+             for k, section in enumerate(sections)])
+        self.db.executemany(
+            'INSERT INTO formulas VALUES (?, ?, ?, ?, ?, ?)',
+            [(self.year, day, k, i, int(display), source)
+             for k, section in enumerate(sections)
+             for i, (source, display) in enumerate(section.get('formulas', []))])
+        self.db.executemany(
+            'INSERT INTO citations VALUES (?, ?, ?, ?, ?)',
+            [(self.year, day, i, ref['key'], ref['text'])
+             for i, ref in enumerate(day_data.get('references', []))])
+        self.days += 1
+
+    def commit(self):
+        if self.db.in_transaction:
+            self.db.execute('COMMIT')
+
+    def close(self) -> Optional[str]:
+        """Commit, compact the full-text index and close; returns the path."""
+        if self.db is None:
+            return None
+        self.commit()
+        self.db.execute("INSERT INTO section_search (section_search) VALUES ('optimize')")
+        self.db.execute('PRAGMA optimize')
+        self.db.close()
+        self.db = None
+        return self.path
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Read side of the SQLite export (sqlite_export.py).
+
+AdventDatabase opens the database read-only; lookups of a day, a date or
+a citation key go through the primary key or an index, and search() is an
+FTS5 query ranked with bm25, so neither loads more than the rows it
+returns.
+
+Query words must all occur in a section, "quoted words" in this order
+(the same syntax as search_index.py); the words are quoted for FTS5, so
+user input cannot produce an FTS5 syntax error.
+
+Usage:
+    python3 sqlite_query.py public/advent.sqlite 'matrix mechanics'
+    python3 sqlite_query.py public/advent.sqlite --day 5
+    python3 sqlite_query.py public/advent.sqlite --date 2025-12-05
+"""
+
+import argparse
+import json
+import sqlite3
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from search_index import parse_query
+
+
+class SectionHit(NamedTuple):
+    year: int
+    day: int
+    section: int
+    title: str
+    snippet: str
+    score: float     # bm25: lower is better
+
+
+def fts_query(query: str) -> str:
+    """The FTS5 MATCH expression for a search_index-style query ('' if it has no words)."""
+    return ' '.join('"' + ' '.join(phrase) + '"' for phrase in parse_query(query))
+
+
+class AdventDatabase:
+    """Queries against an exported database."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.db = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+        self.db.row_factory = sqlite3.Row
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self) -> 'AdventDatabase':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _year(self, year: Optional[int]) -> int:
+        if year is not None:
+            return year
+        return self.db.execute('SELECT max(year) FROM days').fetchone()[0]
+
+    def day(self, day: int, year: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """The day record as the converter wrote it (references inlined)."""
+        row = self.db.execute('SELECT data FROM days WHERE year = ? AND day = ?',
+                              (self._year(year), day)).fetchone()
+        return json.loads(row['data']) if row else None
+
+    def day_by_date(self, date: str) -> Optional[Dict[str, Any]]:
+        """The day record for an ISO date (e.g. '2025-12-05')."""
+        row = self.db.execute('SELECT data FROM days WHERE date = ?', (date,)).fetchone()
+        return json.loads(row['data']) if row else None
+
+    def days(self, year: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Summary fields of every day of a year (default: the latest), in day order."""
+        rows = self.db.execute(
+            'SELECT year, day, date, date_display, title, subtitle, type, special, is_locked '
+            'FROM days WHERE year = ? ORDER BY day', (self._year(year),))
+        return [dict(row) for row in rows]
+
+    def sections(self, day: int, year: Optional[int] = None) -> List[Dict[str, Any]]:
+        rows = self.db.execute(
+            'SELECT section, title, text FROM sections WHERE year = ? AND day = ? ORDER BY section',
+            (self._year(year), day))
+        return [dict(row) for row in rows]
+
+    def formulas(self, day: int, year: Optional[int] = None) -> List[Dict[str, Any]]:
+        rows = self.db.execute(
+            'SELECT section, position, display, source FROM formulas '
+            'WHERE year = ? AND day = ? ORDER BY section, position', (self._year(year), day))
+        return [dict(row, display=bool(row['display'])) for row in rows]
+
+    def citing_days(self, key: str) -> List[Dict[str, Any]]:
+        """(year, day, position) of every citation of a bibliography key."""
+        rows = self.db.execute(
+            'SELECT year, day, position FROM citations WHERE key = ? ORDER BY year, day, position',
+            (key,))
+        return [dict(row) for row in rows]
+
+    def search(self, query: str, limit: int = 20) -> List[SectionHit]:
+        """Sections matching query, best first, with a highlighted snippet."""
+        match = fts_query(query)
+        if not match:
+            return []
+        rows = self.db.execute(
+            "SELECT s.year, s.day, s.section, s.title, "
+            "snippet(section_search, 1, '[', ']', '…', 12) AS snippet, "
+            "bm25(section_search) AS score "
+            "FROM section_search JOIN sections s ON s.id = section_search.rowid "
+            "WHERE section_search MATCH ? ORDER BY score LIMIT ?", (match, limit))
+        return [SectionHit(*row) for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the SQLite export of the converter")
+    parser.add_argument('database', help="database file (e.g. public/advent.sqlite)")
+    parser.add_argument('query', nargs='?', help='words, and "phrases" in double quotes')
+    parser.add_argument('--day', type=int, help="print this day's record")
+    parser.add_argument('--date', help="print the record of this date (YYYY-MM-DD)")
+    parser.add_argument('--limit', '-n', type=int, default=10, help="hits to show (default: %(default)s)")
+    args = parser.parse_args()
+
+    with AdventDatabase(args.database) as db:
+        if args.day is not None or args.date:
+            record = db.day(args.day) if args.day is not None else db.day_by_date(args.date)
+            print(json.dumps(record, ensure_ascii=False, indent=2) if record else "✗ No such day")
+            return
+        if not args.query:
+            for day in db.days():
+                print(f"  {day['year']} day {day['day']:>3}  {day['date']}  {day['title']}")
+            return
+        started = time.perf_counter()
+        hits = db.search(args.query, args.limit)
+        elapsed = (time.perf_counter() - started) * 1000
+        for hit in hits:
+            print(f"  {hit.year} day {hit.day:>3} section {hit.section:>2}  {hit.snippet}")
+        print(f"{len(hits)} hits in {elapsed:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reproducible generator of synthetic advent*.tex files.
+
+Every file has the same shape as the real ones (preamble, \\input{advent-layout},
+\\AdventSheetTwoCol with seven commented arguments, a thebibliography block
+inside the body), but its size and structure are set by a CorpusSpec:
+number of days, sections and paragraphs per day, list sizes, nesting depth
+of lists and \\textbf/\\emph groups, density of inline math and number of
+bibliography entries. The same spec and seed always produce the same bytes.
+
+Usage:
+    python3 synthetic_corpus.py /tmp/corpus                # 'real' preset
+    python3 synthetic_corpus.py /tmp/corpus --preset long  # ~16 MB
+    python3 synthetic_corpus.py /tmp/corpus --days 2000 --sections 1
+"""
+
+import argparse
+import os
+import random
+from typing import Dict, List, NamedTuple
+
+
+class CorpusSpec(NamedTuple):
+    days: int = 27
+    sections: int = 4           # \section* blocks per day
+    paragraphs: int = 3         # paragraphs per section
+    list_items: int = 4         # items per itemize/enumerate
+    nesting: int = 2            # depth of nested lists and formatting groups
+    math_density: float = 0.1   # chance of inline math per word
+    bib_entries: int = 4        # \bibitem entries per day
+    seed: int = 2025
+
+
+PRESETS: Dict[str, CorpusSpec] = {
+    # Roughly the size and mix of the real 27 files
+    'real': CorpusSpec(),
+    # Few days with very long bodies (about 16 MB in total)
+    'long': CorpusSpec(days=27, sections=120, paragraphs=8),
+    # Many small days
+    'many': CorpusSpec(days=2000, sections=2, paragraphs=2, bib_entries=2),
+    # Deep lists and groups, large lists
+    'deep': CorpusSpec(days=27, nesting=6, list_items=30),
+    # Formula-heavy text
+    'math': CorpusSpec(days=27, sections=8, math_density=0.5),
+    # Large bibliographies
+    'bib': CorpusSpec(days=27, sections=2, bib_entries=400),
+    # Long bodies and many days (about 55 MB in total)
+    'huge': CorpusSpec(days=500, sections=30, paragraphs=6, bib_entries=20),
+}
+
+WORDS = ('octonion', 'heptagon', 'operator', 'spectrum', 'radius', 'scale',
+         'invariant', 'geometry', 'symmetry', 'algebra', 'triality', 'field',
+         'mass', 'coupling', 'structure', 'direction', 'projection', 'energy',
+         'the', 'of', 'and', 'a', 'to', 'in', 'is', 'with', 'from', 'as', 'which')
+
+SYMBOLS = ('\\alpha', '\\beta', '\\gamma', 'H_7', 'R', 'G_2', '\\mathbb{O}',
+           'a_0', 'b_0', 'c_0', 'x^2', '\\lambda_{1}', 'E_8', '\\pi')
+
+PREAMBLE = r"""%% advent%(day)02d.tex
+%% Synthetic day %(day)d (seed %(seed)d)
+
+\documentclass[a4paper,10pt]{article}
+
+\usepackage[utf8]{inputenc}
+\usepackage{amsmath,amssymb,amsfonts}
+
+\input{advent-layout}
+
+\begin{document}
+
+\AdventPageBackground
+\AdventAuthor
+
+"""
+
+LAYOUT = "% Synthetic advent-layout.tex (the converters only hash it)\n"
+
+
+class CorpusGenerator:
+    """Builds the text of synthetic advent*.tex files from a CorpusSpec."""
+
+    def __init__(self, spec: CorpusSpec):
+        self.spec = spec
+
+    def _words(self, rng: random.Random, count: int, depth: int = 0) -> str:
+        parts = []
+        for _ in range(count):
+            roll = rng.random()
+            if roll < self.spec.math_density:
+                parts.append('$' + rng.choice(SYMBOLS) + '$')
+            elif roll < self.spec.math_density + 0.04 and depth < self.spec.nesting:
+                command = rng.choice(('textbf', 'emph'))
+                parts.append(f"\\{command}{{{self._words(rng, 3, depth + 1)}}}")
+            elif roll < self.spec.math_density + 0.05:
+                parts.append(rng.choice(('--', "``quoted''", '10\\%', 'G$_2$', '\\"o')))
+            else:
+                parts.append(rng.choice(WORDS))
+        return ' '.join(parts)
+
+    def _paragraph(self, rng: random.Random) -> str:
+        lines = []
+        for _ in range(rng.randint(3, 6)):
+            sentence = self._words(rng, rng.randint(8, 16))
+            lines.append(sentence[0].upper() + sentence[1:] + '.')
+        return '\n'.join(lines)
+
+    def _list(self, rng: random.Random, depth: int) -> str:
+        env = rng.choice(('itemize', 'enumerate'))
+        indent = '  ' * depth
+        lines = [f"{indent}\\begin{{{env}}}"]
+        for i in range(self.spec.list_items):
+            lines.append(f"{indent}  \\item {self._words(rng, rng.randint(5, 12))}")
+            if depth + 1 < self.spec.nesting and i == 0:
+                lines.append(self._list(rng, depth + 1))
+        lines.append(f"{indent}\\end{{{env}}}")
+        return '\n'.join(lines)
+
+    def _display(self, rng: random.Random) -> str:
+        formula = ' + '.join(rng.choice(SYMBOLS) for _ in range(rng.randint(2, 5)))
+        if rng.random() < 0.5:
+            return f"\\[\n  {formula}\n\\]"
+        return f"$$ {formula} $$"
+
+    def _bibliography(self, rng: random.Random) -> str:
+        lines = ["\\small", f"\\begin{{thebibliography}}{{{self.spec.bib_entries}}}", ""]
+        for i in range(self.spec.bib_entries):
+            year = 1950 + rng.randint(0, 75)
+            lines.append(f"\\bibitem{{Author{i}{year}}}")
+            lines.append(f"A.~B.~Author{i},")
+            lines.append(f"\\newblock ``{self._words(rng, 5).capitalize()},''")
+            lines.append(f"\\newblock {{\\em J.\\ Synth.\\ Phys.}} \\textbf{{{i + 1}}}, "
+                         f"{rng.randint(1, 500)}--{rng.randint(501, 999)} ({year}).")
+            lines.append("")
+        lines.append("\\end{thebibliography}")
+        lines.append("\\normalsize")
+        return '\n'.join(lines)
+
+    def _body(self, rng: random.Random) -> str:
+        blocks = []
+        for s in range(self.spec.sections):
+            blocks.append(f"\\section*{{{self._words(rng, 3).capitalize()}}}")
+            for p in range(self.spec.paragraphs):
+                paragraph = self._paragraph(rng)
+                if s == 0 and p == 0:
+                    paragraph = f"\\AdventInitial{{S}}{{ynthetic}} {paragraph}"
+                blocks.append(paragraph)
+                kind = (s + p) % 4
+                if kind == 1:
+                    blocks.append(self._list(rng, 0))
+                elif kind == 2:
+                    blocks.append(self._display(rng))
+                elif kind == 3 and p == 0:
+                    blocks.append(f"\\begin{{quote}}\n{self._paragraph(rng)}\n\\end{{quote}}")
+        blocks.append(self._bibliography(rng))
+        return '\n\n'.join(blocks)
+
+    def day_source(self, day: int) -> str:
+        """Full text of the synthetic advent file for one day."""
+        rng = random.Random(self.spec.seed * 100003 + day)
+        args = [
+            (f"December {day}, 2025", '#1 Date'),
+            ('', '#2 unused'),
+            (self._words(rng, 5).capitalize(), '#3 Main title'),
+            (self._words(rng, 8).capitalize(), '#4 Subtitle'),
+            (self._paragraph(rng), '#5 Key Insight'),
+            ('\n' + self._body(rng) + '\n', '#6 body (two columns)'),
+            (self._paragraph(rng), '#7 Closing'),
+        ]
+        macro = '\n'.join(f"  {{{text}}} % {comment}" for text, comment in args)
+        return (PREAMBLE % {'day': day, 'seed': self.spec.seed}
+                + "\\AdventSheetTwoCol\n" + macro + "\n\n\\end{document}\n")
+
+    def write(self, directory: str) -> List[str]:
+        """Write advent-layout.tex and advent01.tex ... into directory."""
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, 'advent-layout.tex'), 'w', encoding='utf-8') as f:
+            f.write(LAYOUT)
+        paths = []
+        for day in range(1, self.spec.days + 1):
+            path = os.path.join(directory, f"advent{day:02d}.tex")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self.day_source(day))
+            paths.append(path)
+        return paths
+
+
+def write_corpus(spec: CorpusSpec, directory: str) -> List[str]:
+    """Generate the corpus for spec into directory; returns the day files."""
+    return CorpusGenerator(spec).write(directory)
+
+
+def add_spec_arguments(parser: argparse.ArgumentParser):
+    """--preset plus one override option per CorpusSpec field."""
+    parser.add_argument('--preset', default='real', choices=sorted(PRESETS),
+                        help="base corpus shape (default: %(default)s)")
+    for field, default in CorpusSpec._field_defaults.items():
+        parser.add_argument('--' + field.replace('_', '-'), type=type(default), default=None,
+                            help=f"override the preset's {field}")
+
+
+def spec_from_args(args: argparse.Namespace, preset: str) -> CorpusSpec:
+    overrides = {field: getattr(args, field) for field in CorpusSpec._fields
+                 if getattr(args, field) is not None}
+    return PRESETS[preset]._replace(**overrides)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic advent*.tex corpus")
+    parser.add_argument('directory', help="output directory")
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+
+    spec = spec_from_args(args, args.preset)
+    paths = write_corpus(spec, args.directory)
+    total = sum(os.path.getsize(p) for p in paths)
+    print(f"✓ Wrote {len(paths)} files ({total / 1e6:.2f} MB) to {args.directory}")
+    print(f"  {spec}")
+
+
+if __name__ == '__main__':
+    main()
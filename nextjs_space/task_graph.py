@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""
+Make-style task graph with content-hash staleness.
+
+A Task declares the files it reads (inputs) and writes (outputs); a task
+that reads another task's output runs after it. A task is rebuilt when
+  - it never ran, or its signature (command, converter version, ...) changed,
+  - an input's SHA-256 differs from the one recorded at its last build,
+  - an output is missing or was changed by something else.
+Everything else is up to date, decided with one stat() per file (see
+build_cache.FileDigests). Independent tasks run concurrently in a thread
+pool; tasks that name the same resource never run at the same time (e.g.
+two tasks sharing one converter instance). A failed task blocks only its
+dependents.
+
+The recorded digests and file stats are kept in one JSON state file
+(e.g. .cache/pipeline/state.json) between runs.
+"""
+
+import fnmatch
+import json
+import os
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set
+
+from build_cache import FileDigests
+from output_writer import write_if_changed
+
+
+STATE_FORMAT = 1
+
+
+class Task(NamedTuple):
+    name: str
+    action: Callable[[], Any]
+    inputs: Sequence[str] = ()
+    outputs: Sequence[str] = ()
+    signature: str = ''              # anything besides the inputs that affects the outputs
+    resource: Optional[str] = None   # tasks with the same resource run one at a time
+
+
+class TaskResult(NamedTuple):
+    name: str
+    status: str                 # 'built', 'up-to-date', 'stale' (dry run), 'failed', 'blocked'
+    reason: Optional[str]       # why it was (or would be) rebuilt, or why it failed
+    seconds: float = 0.0
+
+
+class TaskGraph:
+    """A set of tasks, their dependencies and their build state."""
+
+    def __init__(self, state_path: Optional[str] = None):
+        self.state_path = state_path
+        self.tasks: Dict[str, Task] = {}
+        self._producers: Dict[str, str] = {}
+        state = self._load()
+        self.digests = FileDigests(state['files'])
+        self.records: Dict[str, Dict[str, Any]] = state['tasks']
+
+    def _load(self) -> Dict[str, Any]:
+        empty = {'format': STATE_FORMAT, 'files': {}, 'tasks': {}}
+        if not self.state_path:
+            return empty
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return empty
+        return state if state.get('format') == STATE_FORMAT else empty
+
+    def save(self):
+        if not self.state_path:
+            return
+        os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+        state = {'format': STATE_FORMAT, 'files': self.digests.files, 'tasks': self.records}
+        write_if_changed(self.state_path, json.dumps(state, ensure_ascii=False, indent=1,
+                                                     sort_keys=True))
+
+    # -- graph ---------------------------------------------------------------
+
+    def add(self, task: Task) -> Task:
+        if task.name in self.tasks:
+            raise ValueError(f"Duplicate task {task.name}")
+        task = task._replace(inputs=[os.path.normpath(p) for p in task.inputs],
+                             outputs=[os.path.normpath(p) for p in task.outputs])
+        for path in task.outputs:
+            if path in self._producers:
+                raise ValueError(f"{path} is an output of both {self._producers[path]} and {task.name}")
+            self._producers[path] = task.name
+        self.tasks[task.name] = task
+        return task
+
+    def dependencies(self, name: str) -> Set[str]:
+        """Tasks that write an input of the named task."""
+        return {self._producers[path] for path in self.tasks[name].inputs
+                if path in self._producers}
+
+    def order(self, names: Optional[Iterable[str]] = None) -> List[str]:
+        """The named tasks and everything they depend on, dependencies first."""
+        ordered: List[str] = []
+        visiting: Set[str] = set()
+
+        def visit(name: str):
+            if name in ordered:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle through {name}")
+            visiting.add(name)
+            for dep in sorted(self.dependencies(name)):
+                visit(dep)
+            visiting.discard(name)
+            ordered.append(name)
+
+        for name in (self.tasks if names is None else names):
+            visit(name)
+        return ordered
+
+    def select(self, patterns: Iterable[str]) -> List[str]:
+        """Task names matching shell-style patterns (e.g. 'pdf:*'), in definition order."""
+        patterns = list(patterns)
+        selected = [name for name in self.tasks
+                    if any(fnmatch.fnmatchcase(name, p) for p in patterns)]
+        unknown = [p for p in patterns if not any(fnmatch.fnmatchcase(n, p) for n in self.tasks)]
+        if unknown:
+            raise KeyError(f"No task matches {', '.join(unknown)}")
+        return selected
+
+    # -- staleness -----------------------------------------------------------
+
+    def _input_digests(self, task: Task) -> Dict[str, str]:
+        missing = [path for path in task.inputs if not os.path.exists(path)]
+        if missing:
+            raise FileNotFoundError(f"missing input {missing[0]}")
+        return {path: self.digests.digest(path) for path in task.inputs}
+
+    def stale(self, name: str, inputs: Dict[str, str]) -> Optional[str]:
+        """Why the task must be rebuilt given its input digests, or None."""
+        task = self.tasks[name]
+        record = self.records.get(name)
+        if record is None:
+            return "never built"
+        if record['signature'] != task.signature:
+            return "signature changed"
+        old_inputs = record['inputs']
+        for path, digest in inputs.items():
+            if old_inputs.get(path) != digest:
+                return f"{path} changed"
+        if set(old_inputs) != set(inputs):
+            return "inputs changed"
+        for path in task.outputs:
+            if not os.path.exists(path):
+                return f"{path} missing"
+            if record['outputs'].get(path) != self.digests.digest(path):
+                return f"{path} modified"
+        return None
+
+    def _record(self, task: Task, inputs: Dict[str, str]):
+        missing = [path for path in task.outputs if not os.path.exists(path)]
+        if missing:
+            raise FileNotFoundError(f"{task.name} did not write {missing[0]}")
+        self.records[task.name] = {
+            'signature': task.signature,
+            'inputs': inputs,
+            'outputs': {path: self.digests.digest(path, fresh=True) for path in task.outputs},
+        }
+
+    # -- running -------------------------------------------------------------
+
+    def run(self, targets: Optional[Iterable[str]] = None, jobs: int = 0, force: bool = False,
+            dry_run: bool = False,
+            report: Optional[Callable[[TaskResult], None]] = None) -> List[TaskResult]:
+        """
+        Bring targets (default: all tasks) and their dependencies up to date.
+
+        jobs = 0 runs up to one task per CPU at a time; force rebuilds every
+        selected task; dry_run only reports what would be rebuilt. report is
+        called with each result as it is known.
+        """
+        targets = list(targets) if targets is not None else None
+        pending = self.order(targets)
+        results: Dict[str, TaskResult] = {}
+        running: Dict[Any, tuple] = {}
+        busy: Set[str] = set()
+        workers = jobs if jobs > 0 else (os.cpu_count() or 1)
+
+        def finish(result: TaskResult):
+            results[result.name] = result
+            if report:
+                report(result)
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                while pending or running:
+                    for name in list(pending):
+                        task = self.tasks[name]
+                        deps = self.dependencies(name)
+                        if any(dep not in results for dep in deps):
+                            continue
+                        if task.resource and task.resource in busy:
+                            continue
+                        if len(running) >= workers:
+                            break
+                        pending.remove(name)
+                        failed = [dep for dep in sorted(deps)
+                                  if results[dep].status in ('failed', 'blocked')]
+                        if failed:
+                            finish(TaskResult(name, 'blocked', f"{failed[0]} failed"))
+                            continue
+                        try:
+                            inputs = self._input_digests(task)
+                        except FileNotFoundError as e:
+                            if dry_run and any(results[d].status == 'stale' for d in deps):
+                                finish(TaskResult(name, 'stale', "dependency out of date"))
+                            else:
+                                finish(TaskResult(name, 'failed', str(e)))
+                            continue
+                        reason = "forced" if force else self.stale(name, inputs)
+                        if reason is None and dry_run:
+                            stale_deps = [d for d in sorted(deps) if results[d].status == 'stale']
+                            if stale_deps:
+                                reason = f"{stale_deps[0]} out of date"
+                        if reason is None:
+                            finish(TaskResult(name, 'up-to-date', None))
+                        elif dry_run:
+                            finish(TaskResult(name, 'stale', reason))
+                        else:
+                            if task.resource:
+                                busy.add(task.resource)
+                            future = pool.submit(task.action)
+                            running[future] = (name, inputs, reason, time.perf_counter())
+                    if not running:
+                        continue
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name, inputs, reason, started = running.pop(future)
+                        task = self.tasks[name]
+                        busy.discard(task.resource)
+                        seconds = time.perf_counter() - started
+                        try:
+                            future.result()
+                            self._record(task, inputs)
+                        except Exception as e:
+                            self.records.pop(name, None)
+                            # Expected failures (a compiler error, a missing file) need no traceback
+                            if isinstance(e, (OSError, RuntimeError)):
+                                detail = str(e)
+                            else:
+                                detail = ''.join(traceback.format_exception(e))
+                            finish(TaskResult(name, 'failed', detail.strip(), seconds))
+                        else:
+                            finish(TaskResult(name, 'built', reason, seconds))
+        finally:
+            if not dry_run:
+                self.digests.prune()
+                self.save()
+        return [results[name] for name in self.order(targets)]
+
+
+def format_result(result: TaskResult) -> str:
+    if result.status == 'built':
+        return f"  ✓ {result.name} ({result.seconds:.1f} s; {result.reason})"
+    if result.status == 'up-to-date':
+        return f"  · {result.name} up to date"
+    if result.status == 'stale':
+        return f"  • {result.name} would be rebuilt ({result.reason})"
+    return f"  ✗ {result.name} {result.status}: {result.reason}"
+
+
+def summarize(results: List[TaskResult]) -> str:
+    """One line with the number of tasks per status."""
+    counts: Dict[str, int] = {}
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+    order = ['built', 'stale', 'up-to-date', 'failed', 'blocked']
+    return ', '.join(f"{counts[status]} {status}" for status in order if status in counts) or "no tasks"
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""Hashed names: manifest.json follows the files as hashed names are switched on and off."""
+
+import json
+import os
+
+from asset_manifest import MANIFEST_FILE, hashed_path
+from build_pdfs import PdfCompiler
+from output_writer import DayShardWriter
+
+
+def day(n, title=None):
+    return {'day': n, 'date': f'2025-12-{n:02d}', 'title': title or f'Day {n}',
+            'content': f'<p>{n}</p>'}
+
+
+def run(data_dir, days, hashed_names):
+    writer = DayShardWriter(data_dir, hashed_names=hashed_names)
+    writer.write_metadata({'year': 2025}, {})
+    for data in days:
+        writer.write_day(data)
+    writer.close()
+
+
+def manifest(root):
+    path = os.path.join(root, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['files']
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_hashed_copies_match_their_files(tmp_path):
+    root = str(tmp_path)
+    run(os.path.join(root, 'data'), [day(1), day(2)], hashed_names=True)
+    files = manifest(root)
+    assert set(files) == {'data/metadata.json', 'data/index.json',
+                          'data/days/day01.json', 'data/days/day02.json'}
+    for name, hashed in files.items():
+        data = read(os.path.join(root, name))
+        assert read(os.path.join(root, hashed)) == data
+        assert hashed == hashed_path(name, data)
+
+
+def test_run_without_hashed_names_removes_the_manifest(tmp_path):
+    root = str(tmp_path)
+    data_dir = os.path.join(root, 'data')
+    run(data_dir, [day(1), day(2)], hashed_names=True)
+    hashed = os.path.join(root, manifest(root)['data/days/day01.json'])
+    run(data_dir, [day(1), day(2)], hashed_names=False)
+    assert manifest(root) is None
+    assert not os.path.exists(hashed)
+
+
+def test_watch_edit_without_hashed_names_drops_the_entry(tmp_path):
+    root = str(tmp_path)
+    data_dir = os.path.join(root, 'data')
+    run(data_dir, [day(1), day(2)], hashed_names=True)
+    old = manifest(root)
+    DayShardWriter(data_dir).replace_day(day(1, 'Edited'))
+    files = manifest(root)
+    # The edited day and the files of all days are served by their plain names
+    assert 'data/days/day01.json' not in files
+    assert 'data/index.json' not in files
+    assert not os.path.exists(os.path.join(root, old['data/days/day01.json']))
+    assert files['data/days/day02.json'] == old['data/days/day02.json']
+
+
+def test_pdf_published_without_hashed_names_drops_the_entry(tmp_path):
+    root = str(tmp_path)
+    data_dir = os.path.join(root, 'data')
+    pdf_dir = os.path.join(root, 'pdfs')
+    run(data_dir, [day(1)], hashed_names=True)
+    PdfCompiler(output_dir=pdf_dir, hashed_names=True).publish('advent01.tex', b'%PDF-1 a')
+    hashed = manifest(root)['pdfs/advent01.pdf']
+    assert 'data/days/day01.json' in manifest(root)
+    PdfCompiler(output_dir=pdf_dir).publish('advent01.tex', b'%PDF-1 b')
+    assert 'pdfs/advent01.pdf' not in manifest(root)
+    assert 'data/days/day01.json' in manifest(root)
+    assert not os.path.exists(os.path.join(root, hashed))
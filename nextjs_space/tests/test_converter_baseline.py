@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+The v2 converter against the original one, on the advent*.tex files.
+
+data/v2_baseline.json holds SHA-256 digests of every field of every day
+as the original convert_tex_to_json_v2.py produced it, after
+dumpster/clean_json_files.py. Only the contents of days 18 and 21 differ:
+their nested itemize lists used to leak a literal \\begin{itemize}.
+"""
+
+import hashlib
+import json
+import os
+import re
+
+import pytest
+
+from convert_tex_to_json_v2 import RobustLatexConverter
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(TESTS)
+CHANGED = {('18', 'content'), ('21', 'content')}
+
+
+def digest(value):
+    text = json.dumps(value, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+@pytest.fixture(scope='module')
+def records():
+    cwd = os.getcwd()
+    os.chdir(ROOT)
+    try:
+        converter = RobustLatexConverter()
+        sources = sorted(f for f in os.listdir('.') if re.match(r'advent\d+\.tex$', f))
+        return converter, [converter.parse_tex_file(f) for f in sources]
+    finally:
+        os.chdir(cwd)
+
+
+def test_output_matches_the_baseline(records):
+    converter, days = records
+    with open(os.path.join(TESTS, 'data', 'v2_baseline.json'), encoding='utf-8') as f:
+        baseline = json.load(f)
+    assert digest(converter.metadata) == baseline['metadata']
+    assert digest(converter.color_scheme) == baseline['colorScheme']
+    assert sorted(str(day['day']) for day in days) == sorted(baseline['days'])
+    differing = {(str(day['day']), field)
+                 for day in days
+                 for field in set(day) | set(baseline['days'][str(day['day'])])
+                 if field not in day or digest(day[field]) != baseline['days'][str(day['day'])].get(field)}
+    assert differing == CHANGED
+
+
+def test_nested_lists_are_rendered(records):
+    _, days = records
+    for day in days:
+        if day['day'] in (18, 21):
+            assert '\\begin{itemize}' not in day['content']
+            assert re.search(r'<li>[^<]*\s*<ul>', day['content'])
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""FragmentCache: LRU bounded by the UTF-8 size of the cached text."""
+
+from fragment_cache import FragmentCache
+
+
+def test_limit_counts_utf8_bytes(tmp_path):
+    cache = FragmentCache(max_bytes=12, path=str(tmp_path / 'f.pickle'))
+    assert cache.get('äöü', len) == 3     # 6 bytes
+    assert cache.get('ßß', len) == 2      # 4 bytes
+    assert cache.size == 10 and len(cache) == 2
+    cache.get('ab', len)                  # 12 bytes in all
+    cache.get('x', len)                   # evicts 'äöü'
+    assert (len(cache), cache.size, cache.evictions) == (3, 7, 1)
+    cache.get('€' * 5, len)               # 15 bytes: never cached
+    assert len(cache) == 3
+
+    cache.save()
+    reloaded = FragmentCache(max_bytes=12, path=cache.path)
+    assert reloaded.size == 7
+    assert reloaded.get('ßß', lambda text: None) == 2
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""html_cleanup.clean_html against the clean_json_files.py step it replaces."""
+
+import os
+import random
+import sys
+
+import pytest
+
+from html_cleanup import clean_html
+
+DUMPSTER = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                        'dumpster')
+sys.path.insert(0, DUMPSTER)
+clean_json_files = pytest.importorskip('clean_json_files')
+
+ATOMS = ['<p>', '</p>', ' ', '\n', '<h3>', '</h3>', '<ul>', '</ul>', '<li>', '</li>', '<ol>', '</ol>',
+         '<dl>', '</dl>', '<dt>', '</dd>', '<blockquote>', '</blockquote>', '``', "''",
+         'thebibliography', 'Heisenberg1925', 'Abc12345', 'Ab1234', '%--', '%---x', 'X', 'a', 't']
+
+
+@pytest.mark.parametrize('html', [
+    '<p> <h3>Title</h3>\n</p><p>text</p></p>\n</p>',
+    "``quoted'' and ``more''\n\n\n\nend",
+    'Heisenberg1925\nW.~Heisenberg, Z. Phys.\n thebibliography \n',
+    '%-- a comment %-- kept %---',
+    '<p><ul><li>a</li></ul></p><p>\n<blockquote>q</blockquote> </p>',
+])
+def test_examples(html):
+    assert clean_html(html) == clean_json_files.clean_html_content(html)
+
+
+def test_random_fragments():
+    rng = random.Random(2)
+    for _ in range(20000):
+        html = ''.join(rng.choice(ATOMS) for _ in range(rng.randint(1, 12)))
+        assert clean_html(html) == clean_json_files.clean_html_content(html), repr(html)
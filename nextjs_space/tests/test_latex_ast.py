@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""Renderers: block HTML, and deeply nested groups without recursion."""
+
+import sys
+
+from latex_ast import (DisplayMath, HtmlRenderer, ItemList, ListItem, Paragraph,
+                       PlainTextRenderer, Section, Text, walk)
+from latex_inline import convert_inline, parse_inline
+
+DEPTH = sys.getrecursionlimit() + 500
+
+
+def test_blocks():
+    blocks = [Section([Text('S')]),
+              ItemList(False, [ListItem([Paragraph([Text('a')]), DisplayMath('x')]),
+                               ListItem([])]),
+              ItemList(True, [])]
+    assert HtmlRenderer().render_blocks(blocks) == (
+        '<h3>S</h3>\n<ul>\n  <li>a\n<p>\\[x\\]</p></li>\n  <li></li>\n</ul>\n<ol>\n</ol>')
+    assert PlainTextRenderer().render_blocks(blocks) == 'S\n\na\n\nx\n\n\n'
+
+
+def test_deeply_nested_groups():
+    text = '{' * DEPTH + 'a' + '}' * DEPTH
+    assert convert_inline(text) == text
+    nodes = parse_inline(text)
+    assert PlainTextRenderer().render(nodes) == 'a'
+    assert sum(1 for _ in walk(nodes)) == DEPTH + 1
+
+
+def test_deeply_nested_commands():
+    text = r'\textbf{' * DEPTH + 'a' + '}' * DEPTH
+    assert convert_inline(text) == '<strong>' * DEPTH + 'a' + '</strong>' * DEPTH
+    text = r'\textsuperscript{' * DEPTH + '1' + '}' * DEPTH
+    assert convert_inline(text) == '¹'
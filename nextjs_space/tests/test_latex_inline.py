@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""Inline parser: $$...$$ inside a fragment, unclosed groups, and linear scaling."""
+
+import time
+
+from katex_prerender import KatexHtmlRenderer
+from latex_ast import HtmlRenderer, InlineMath, PlainTextRenderer, Text
+from latex_inline import convert_inline, parse_inline
+
+# Day 21's key insight ends in a display formula
+KEY_INSIGHT = (r"the electroweak scale $Y_S$ as a true equilibrium quantity: "
+               r"$$Y_S^2 = -\frac{\mu^2}{2(\lambda+\kappa c)}.$$")
+FORMULA = r"Y_S^2 = -\frac{\mu^2}{2(\lambda+\kappa c)}."
+
+
+class RecordingKatex:
+    """Stands in for KatexRenderer: remembers what it was asked to render."""
+
+    def __init__(self):
+        self.calls = []
+
+    def get(self, tex, display):
+        self.calls.append((tex, display))
+        return f'<katex display={display}>{tex}</katex>'
+
+
+def test_double_dollars_are_display_math():
+    nodes = parse_inline(KEY_INSIGHT)
+    math = [node for node in nodes if isinstance(node, InlineMath)]
+    assert [node.display for node in math] == [False, True]
+    assert HtmlRenderer().render(math[1].children) == FORMULA
+    # the HTML keeps the source for the browser, as before
+    assert convert_inline(KEY_INSIGHT) == KEY_INSIGHT
+    assert PlainTextRenderer(math=False).render(nodes).strip().endswith('quantity:')
+
+
+def test_katex_renders_double_dollars_in_display_mode():
+    katex = RecordingKatex()
+    html = KatexHtmlRenderer(katex).render(parse_inline(KEY_INSIGHT))
+    assert katex.calls == [('Y_S', False), (FORMULA, True)]
+    assert html.endswith(f'<katex display=True>{FORMULA}</katex>')
+    assert '$' not in html
+
+
+def test_unclosed_and_adjacent_dollars():
+    assert convert_inline('a $$x') == 'a $$x'
+    nodes = parse_inline('$a$$b$')
+    assert [(type(n), n.display) for n in nodes] == [(InlineMath, False), (InlineMath, False)]
+    assert convert_inline('{$$x}') == '{$$x}'
+    assert isinstance(parse_inline('$$')[0], Text)
+
+
+def test_unclosed_groups_stay_as_written():
+    assert convert_inline(r'x \textsuperscript{-1} {y \textsuperscript{--{$z') == \
+        r'x ⁻¹ {y \textsuperscript{–{$z'
+    # held-back hyphens of a closed superscript inside stay minus signs
+    assert convert_inline(r'\textsuperscript{a--\textbf{b---}\textsuperscript{--}c') == \
+        r'\textsuperscript{a–<strong>b—</strong>⁻⁻c'
+
+
+def _seconds(text):
+    best = float('inf')
+    for _ in range(3):
+        started = time.perf_counter()
+        convert_inline(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def test_unclosed_groups_scale_linearly():
+    # Every unclosed level used to copy everything inside it into its parent;
+    # 4x the input must take nowhere near 16x the time
+    for unit in ('{a', r'\textsuperscript{a', r'\textsuperscript{--', '{$'):
+        small, large = _seconds(unit * 5_000), _seconds(unit * 20_000)
+        assert large < 8 * small + 0.01
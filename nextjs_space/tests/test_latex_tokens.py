@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""Tokenizer: the tokens it finds, and that it stays linear in the input length."""
+
+import time
+
+from latex_tokens import (BEGIN, BGROUP, COMMENT, CONTROL, EGROUP, END, ESCAPE,
+                          MATH_DISPLAY, MATH_INLINE, TokenStream, tokenize)
+
+
+def kinds(text):
+    return [(t.kind, text[t.start:t.end]) for t in tokenize(text)]
+
+
+def test_tokens():
+    text = 'a \\emph{b} % c\n\\begin{x}$y$ $$z$$\\%\\end{x}'
+    assert kinds(text) == [
+        (CONTROL, '\\emph'), (BGROUP, '{'), (EGROUP, '}'), (COMMENT, '% c'),
+        (BEGIN, '\\begin{x}'), (MATH_INLINE, '$'), (MATH_INLINE, '$'),
+        (MATH_DISPLAY, '$$'), (MATH_DISPLAY, '$$'), (ESCAPE, '\\%'), (END, '\\end{x}'),
+    ]
+
+
+def test_lone_backslash_and_trailing_text():
+    assert kinds('a\\') == []
+    assert kinds('\\\n{x') == [(BGROUP, '{')]
+    assert kinds('{' + 'a' * 10) == [(BGROUP, '{')]
+
+
+def test_block_pairs():
+    stream = TokenStream('\\begin{a}\\begin{b}\\begin{a}\\end{a}\\begin{c}\\end{a}\\end{b}$$x$$\\[y\\]')
+    names = [(t.kind, t.name) for t in stream.tokens]
+    assert names[:7] == [(BEGIN, 'a'), (BEGIN, 'b'), (BEGIN, 'a'), (END, 'a'),
+                         (BEGIN, 'c'), (END, 'a'), (END, 'b')]
+    # the second \end{a} closes the outer a, leaving b and c unclosed
+    assert stream.block_pairs() == {2: 3, 0: 5, 7: 8, 9: 10}
+
+
+def test_block_pairs_scales_linearly():
+    # \end tokens without an open environment of their name
+    n = 20_000
+    stream = TokenStream('\\begin{a}' * n + '\\end{b}' * n)
+    started = time.perf_counter()
+    assert stream.block_pairs() == {}
+    assert time.perf_counter() - started < 1.0
+
+
+def _seconds(text):
+    best = float('inf')
+    for _ in range(3):
+        started = time.perf_counter()
+        tokenize(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def test_scales_linearly():
+    # Trailing plain text and lone backslashes used to be rescanned from
+    # every offset; 4x the input must take nowhere near 16x the time
+    for make in (lambda n: '{' + 'a' * n, lambda n: 'x\\\n' * n, lambda n: 'a' * n + '\\'):
+        small, large = _seconds(make(50_000)), _seconds(make(200_000))
+        assert large < 8 * small + 0.01
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""DayShardWriter: the files of a run, and what it leaves of earlier runs."""
+
+import json
+import os
+
+from output_writer import DayShardWriter, OutputFiles, write_if_changed
+
+
+METADATA = {'year': 2025, 'title': 'Advent'}
+
+
+def day(n, chunks=None):
+    data = {'day': n, 'date': f'2025-12-{n:02d}', 'title': f'Day {n}', 'content': f'<p>{n}</p>'}
+    if chunks:
+        data['contentChunks'] = [{'title': title, 'size': len(html), 'html': html}
+                                 for title, html in chunks]
+    return data
+
+
+def run(data_dir, days, **options):
+    writer = DayShardWriter(data_dir, **options)
+    writer.write_metadata(METADATA, {})
+    for data in days:
+        writer.write_day(data)
+    writer.close()
+    return writer
+
+
+def files(directory):
+    return sorted(os.listdir(directory))
+
+
+def test_chunks_of_an_earlier_run_are_removed(tmp_path):
+    data_dir = str(tmp_path / 'data')
+    run(data_dir, [day(1, [('', '<p>1</p>'), ('A', '<p>a</p>'), ('B', '<p>b</p>')]), day(2)])
+    assert files(os.path.join(data_dir, 'days')) == ['day01-1.html', 'day01-2.html',
+                                                     'day01.json', 'day02.json']
+    run(data_dir, [day(1, [('', '<p>1</p>'), ('A', '<p>a</p>')]), day(2)])
+    assert files(os.path.join(data_dir, 'days')) == ['day01-1.html', 'day01.json', 'day02.json']
+    run(data_dir, [day(1), day(2)])
+    assert files(os.path.join(data_dir, 'days')) == ['day01.json', 'day02.json']
+
+
+def test_combined_file_holds_unchunked_content(tmp_path):
+    data_dir = str(tmp_path / 'public' / 'data')
+    combined = str(tmp_path / 'public' / 'advent_data.json')
+    run(data_dir, [day(1, [('', '<p>1</p>'), ('A', '<p>a</p>'), ('B', '<p>b</p>')]), day(2)],
+        combined_path=combined)
+    with open(combined, encoding='utf-8') as f:
+        days = json.load(f)['days']
+    assert days == [dict(day(1), content='<p>1</p>\n<p>a</p>\n<p>b</p>'), day(2)]
+
+
+def test_day_written_twice_keeps_the_last(tmp_path):
+    data_dir = str(tmp_path / 'data')
+    writer = run(data_dir, [day(1), dict(day(1), title='Again'), day(2)])
+    assert writer.day_count == 2
+    with open(os.path.join(data_dir, 'index.json'), encoding='utf-8') as f:
+        index = json.load(f)
+    assert [d['title'] for d in index['days']] == ['Again', 'Day 2']
+
+
+def test_watch_mode_writes_the_shared_files_at_flush(tmp_path):
+    data_dir = str(tmp_path / 'data')
+    run(data_dir, [day(1), day(2)])
+    index_path = os.path.join(data_dir, 'index.json')
+    before = os.stat(index_path).st_mtime_ns
+
+    writer = DayShardWriter(data_dir)
+    writer.replace_day(dict(day(1), title='New'), flush=False)
+    writer.remove_day(2, flush=False)
+    writer.replace_day(day(3), flush=False)
+    assert os.stat(index_path).st_mtime_ns == before
+    writer.flush()
+    with open(index_path, encoding='utf-8') as f:
+        index = json.load(f)
+    assert [(d['day'], d['title']) for d in index['days']] == [(1, 'New'), (3, 'Day 3')]
+    assert files(os.path.join(data_dir, 'days')) == ['day01.json', 'day03.json']
+
+
+def test_write_if_changed(tmp_path):
+    path = str(tmp_path / 'a.json')
+    assert write_if_changed(path, '{"a": 1}')
+    os.utime(path, ns=(1, 1))
+    assert not write_if_changed(path, '{"a": 1}')
+    assert not write_if_changed(path, b'{"a": 1}')
+    assert os.stat(path).st_mtime_ns == 1
+    assert write_if_changed(path, '{"a": 2}')
+    assert os.stat(path).st_mtime_ns != 1
+
+
+def test_output_files_counts_and_streams(tmp_path):
+    path = str(tmp_path / 'big.json')
+    output = OutputFiles()
+    for _ in range(2):
+        with output.open(path) as f:
+            f.write('[1,\n')
+            f.write('2]')
+    output.write(path, '[1,\n2]')
+    assert (output.written, output.skipped) == (1, 2)
+    with output.open(path) as f:
+        f.write('[3]')
+    assert (output.written, output.skipped) == (2, 2)
+    assert files(str(tmp_path)) == ['big.json']
+    with open(path, encoding='utf-8') as f:
+        assert f.read() == '[3]'
+
+
+def test_unchanged_run_writes_nothing(tmp_path):
+    data_dir = str(tmp_path / 'data')
+    days = [day(1, [('', '<p>1</p>'), ('A', '<p>a</p>')]), day(2)]
+    first = DayShardWriter(data_dir, combined_path=str(tmp_path / 'all.json'), bundle=True)
+    first.write_metadata(METADATA, {})
+    for data in days:
+        first.write_day(data)
+    first.close()
+    second = DayShardWriter(data_dir, combined_path=str(tmp_path / 'all.json'), bundle=True)
+    second.write_metadata(METADATA, {})
+    for data in days:
+        second.write_day(data)
+    second.close()
+    assert first.output.written == second.output.skipped > 0
+    assert second.output.written == 0
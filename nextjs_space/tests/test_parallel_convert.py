@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""Process pool: results in input order, and files that crash their worker."""
+
+import os
+
+from parallel_convert import parse_files
+
+
+class CrashingConverter:
+    """Parses a file to its contents, and kills its process on 'crash'."""
+
+    def parse_tex_file(self, path):
+        with open(path, encoding='utf-8') as f:
+            text = f.read()
+        if text == 'crash':
+            os._exit(1)
+        if text == 'fail':
+            raise ValueError(path)
+        print('parsed', os.path.basename(path))
+        return {'text': text}
+
+
+def test_crashing_file_is_reported_not_fatal(tmp_path):
+    paths = []
+    for i, text in enumerate(['a', 'crash', 'b', 'fail', 'c' * 10]):
+        path = tmp_path / f'advent{i:02d}.tex'
+        path.write_text(text, encoding='utf-8')
+        paths.append(str(path))
+
+    results = parse_files(CrashingConverter(), paths, jobs=2)
+
+    assert [r.path for r in results] == paths
+    assert [r.record and r.record['text'] for r in results] == ['a', None, 'b', None, 'c' * 10]
+    assert 'BrokenProcessPool' in results[1].error
+    assert 'ValueError' in results[3].error
+    assert results[0].output == 'parsed advent00.tex\n'
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""ReferenceStore: shared references resolve to the inlined ones, conflicts ignore markup."""
+
+from reference_store import ReferenceStore
+
+
+def day(n, *refs):
+    return {'day': n, 'references': [{'key': key, 'text': text} for key, text in refs]}
+
+
+BAEZ = 'J.~C.~Baez, "The octonions,"  Bull.\\ Amer.\\ Math.\\ Soc. 39 (2002).'
+BAEZ_MARKUP = 'J.~C.~Baez, \\newblock "The octonions," \\newblock {\\em Bull.\\ Amer.\\ Math.\\ Soc.} <strong>39</strong> (2002).'
+
+
+def test_resolve_gives_the_inlined_references():
+    store = ReferenceStore()
+    days = [day(1, ('Baez2002', BAEZ), ('Haag1996', 'R.~Haag,\n  Local Quantum Physics')),
+            day(2, ('Baez2002', BAEZ_MARKUP))]
+    for data in days:
+        assert store.resolve(store.detach(data)) == data
+    assert store.count == 3
+
+
+def test_conflicts_ignore_whitespace_and_markup():
+    store = ReferenceStore()
+    store.detach(day(1, ('Baez2002', BAEZ), ('Haag1996', 'R.~Haag, {\\em Local Quantum Physics}')))
+    store.detach(day(2, ('Baez2002', BAEZ_MARKUP), ('Haag1996', 'R.~Haag, Local Quantum Physics')))
+    store.detach(day(3, ('Baez2002', BAEZ.replace('  ', ' '))))
+    assert store.conflicts() == {}
+    store.detach(day(4, ('Haag1996', 'R.~Haag, Local Quantum Physics: Fields, Particles, Algebras')))
+    assert store.conflicts() == {'Haag1996': [[1, 2], [4]]}
+
+
+def test_cited_follows_changes():
+    store = ReferenceStore()
+    a = store.detach(day(1, ('A', 'a'), ('A', 'a')))['references'][0]
+    b = store.detach(day(2, ('A', 'a'), ('B', 'b')))['references'][1]
+    assert store.cited() == {'A': {a.split('#')[1]: [1, 2]}, 'B': {b.split('#')[1]: [2]}}
+    store.forget_day(2)
+    assert list(store.cited()) == ['A']
+    assert store.count == 1
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""Search index: encoding, round trip through the files, and queries against a brute-force scan."""
+
+import os
+import random
+
+from search_index import (SearchIndex, SearchIndexBuilder, decode_postings, encode_postings,
+                          parse_query, shard_name, tokenize)
+
+
+WORDS = ['octonion', 'jordan', 'algebra', 'matrix', 'mechanics', 'Schrödinger', 'rotor',
+         'Σ-model', 'spin', 'heisenberg']
+
+
+def corpus(seed=1, days=12):
+    rng = random.Random(seed)
+    return {day: [{'title': f'S{k}', 'text': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(0, 40)))}
+                  for k in range(rng.randint(1, 5))]
+            for day in rng.sample(range(32), days)}
+
+
+def write(builder, directory):
+    os.makedirs(directory, exist_ok=True)
+    for name, text in builder.files().items():
+        with open(os.path.join(directory, name), 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+def brute_force(days, query):
+    hits = set()
+    for day, sections in days.items():
+        for section, entry in enumerate(sections):
+            terms = tokenize(entry['text'])
+            if all(any(terms[i:i + len(phrase)] == phrase for i in range(len(terms)))
+                   for phrase in parse_query(query)):
+                hits.add((day, section))
+    return hits
+
+
+def test_tokenize_and_shards():
+    assert tokenize('Schrödinger’s ÉQUATION, x_1') == ['schrodinger', 's', 'equation', 'x', '1']
+    assert shard_name('octonion') == 'oc'
+    assert shard_name('σmodel') == 'u' + 'σm'.encode('utf-8').hex()
+    assert parse_query('"Jordan algebra" spin') == [['jordan', 'algebra'], ['spin']]
+
+
+def test_postings_round_trip():
+    postings = [(0, 0, [0, 4]), (0, 3, [2]), (5, 1, [1, 2, 9]), (31, 0, [7])]
+    assert decode_postings(encode_postings(postings)) == postings
+
+
+def test_queries_match_a_scan(tmp_path):
+    days = corpus()
+    builder = SearchIndexBuilder()
+    for day, sections in days.items():
+        builder.add_day(day, sections)
+    write(builder, str(tmp_path))
+    index = SearchIndex(str(tmp_path))
+    for query in ['octonion', 'jordan algebra', '"jordan algebra"', '"matrix mechanics" spin',
+                  'Σ model', 'schrodinger', '"rotor rotor"', 'nothing']:
+        hits = index.search(query, limit=1000)
+        assert {(hit.day, hit.section) for hit in hits} == brute_force(days, query), query
+        assert [hit.score for hit in hits] == sorted((hit.score for hit in hits), reverse=True)
+
+
+def test_load_and_update(tmp_path):
+    days = corpus(seed=2)
+    builder = SearchIndexBuilder()
+    for day, sections in days.items():
+        builder.add_day(day, sections)
+    write(builder, str(tmp_path))
+    loaded = SearchIndexBuilder.load(str(tmp_path))
+    assert loaded.files() == builder.files()
+
+    removed = sorted(days)[0]
+    loaded.remove_day(removed)
+    loaded.add_day(99, [{'title': '', 'text': 'octonion rotor'}])
+    del days[removed]
+    days[99] = [{'title': '', 'text': 'octonion rotor'}]
+    write(loaded, str(tmp_path / 'updated'))
+    index = SearchIndex(str(tmp_path / 'updated'))
+    assert {(h.day, h.section) for h in index.search('octonion', 1000)} == brute_force(days, 'octonion')
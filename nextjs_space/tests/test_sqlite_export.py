@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""SQLite export: what the converter loads, and the read side's lookups and FTS5 search."""
+
+import sqlite3
+
+import pytest
+
+from sqlite_export import SqliteExport
+from sqlite_query import AdventDatabase, fts_query
+
+
+def _has_fts5():
+    db = sqlite3.connect(':memory:')
+    try:
+        db.execute('CREATE VIRTUAL TABLE t USING fts5(x)')
+        return True
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        db.close()
+
+
+pytestmark = pytest.mark.skipif(not _has_fts5(), reason="SQLite without FTS5")
+
+
+def day(n, sections, refs=()):
+    return {
+        'day': n, 'date': f'2025-12-{n:02d}', 'dateDisplay': f'{n}. Dezember', 'title': f'Day {n}',
+        'content': '<p>…</p>', 'isLocked': False,
+        'references': [{'key': key, 'text': f'{key} text'} for key in refs],
+        'searchText': [{'title': title, 'text': text, 'formulas': formulas}
+                       for title, text, formulas in sections],
+    }
+
+
+DAYS = [
+    day(1, [('', 'The octonions and the Jordan algebra', [['x^2', False]]),
+            ('Rotors', 'rotor algebra of the octonions', [['R = e^{B}', True], ['B', False]])],
+        refs=['Baez2002']),
+    day(2, [('', 'Matrix mechanics after Heisenberg', []),
+            ('Algebra', 'the exceptional Jordan algebra, again', [])],
+        refs=['Heisenberg1925', 'Baez2002']),
+    day(3, [('', 'Nothing to see', [])]),
+]
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / 'advent.sqlite')
+    export = SqliteExport(path, 2025)
+    for data in DAYS:
+        export.add_day(data)
+    export.close()
+    return path
+
+
+def test_lookups(database):
+    with AdventDatabase(database) as db:
+        record = db.day(2)
+        assert record['title'] == 'Day 2' and 'searchText' not in record
+        assert db.day_by_date('2025-12-03')['day'] == 3
+        assert db.day(7) is None
+        assert [d['day'] for d in db.days()] == [1, 2, 3]
+        assert [s['title'] for s in db.sections(1)] == ['', 'Rotors']
+        assert [(f['section'], f['source'], f['display']) for f in db.formulas(1)] == [
+            (0, 'x^2', False), (1, 'R = e^{B}', True), (1, 'B', False)]
+        assert [(c['day'], c['position']) for c in db.citing_days('Baez2002')] == [(1, 0), (2, 1)]
+
+
+def test_search(database):
+    with AdventDatabase(database) as db:
+        def hits(query):
+            return {(hit.day, hit.section) for hit in db.search(query)}
+        assert hits('octonions') == {(1, 0), (1, 1)}
+        assert hits('jordan algebra') == {(1, 0), (2, 1)}
+        assert hits('"jordan algebra"') == {(1, 0), (2, 1)}
+        assert hits('"algebra jordan"') == set()
+        assert hits('"exceptional jordan" again') == {(2, 1)}
+        assert hits('rotors') == {(1, 1)}           # section titles are indexed too
+        assert hits('"unbalanced') == set()
+        assert db.search('') == []
+        hit = db.search('heisenberg')[0]
+        assert '[Heisenberg]' in hit.snippet
+
+
+def test_fts_query_quotes_every_word():
+    assert fts_query('jordan "exceptional AND algebra" OR') == '"exceptional and algebra" "jordan" "or"'
+
+
+def test_replace_and_remove(database):
+    export = SqliteExport(database, 2025, replace=False)
+    export.add_day(day(2, [('', 'replaced text', [])]))
+    export.remove_day(3)
+    export.close()
+    with AdventDatabase(database) as db:
+        assert [d['day'] for d in db.days()] == [1, 2]
+        assert {(h.day, h.section) for h in db.search('heisenberg')} == set()
+        assert {(h.day, h.section) for h in db.search('replaced')} == {(2, 0)}
+        assert [c['day'] for c in db.citing_days('Baez2002')] == [1]
+
+    SqliteExport(database, 2025).close()
+    with AdventDatabase(database) as db:
+        assert db.days(2025) == []
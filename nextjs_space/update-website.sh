@@ -27,88 +27,44 @@ PROJECT_DIR="/home/ubuntu/advent_project/website"
 cd "$PROJECT_DIR"
 
 # =============================================================================
-# Step 1: Convert LaTeX → JSON
+# Step 1: Convert LaTeX → JSON and PDF
 # =============================================================================
 echo -e "${COLOR_GREEN}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━${COLOR_RESET}"
-echo -e "${COLOR_GREEN}Step 1/4: Converting LaTeX to JSON${COLOR_RESET}"
+echo -e "${COLOR_GREEN}Step 1/3: Converting LaTeX to JSON and PDF${COLOR_RESET}"
 echo -e "${COLOR_GREEN}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━${COLOR_RESET}"
 echo
 
-if [ ! -f "convert_tex_to_json.py" ]; then
-    echo -e "${COLOR_RED}ERROR: convert_tex_to_json.py not found!${COLOR_RESET}"
+if [ ! -f "build_pipeline.py" ]; then
+    echo -e "${COLOR_RED}ERROR: build_pipeline.py not found!${COLOR_RESET}"
     exit 1
 fi
 
-python3 convert_tex_to_json.py
+# One task graph for the v2 converter (advent_data.json and public/data)
+# and the PDFs (public/pdfs), run side by side; only the days whose
+# sources changed since the last run are converted and compiled again
+if python3 build_pipeline.py; then
+    echo -e "${COLOR_GREEN}✓ JSON conversion and PDF compilation complete!${COLOR_RESET}"
+else
+    # Failed JSON tasks stop the build; failed PDFs only warn. Tasks that
+    # succeeded are up to date, so this reruns just the failed JSON ones
+    if ! python3 build_pipeline.py 'json:*'; then
+        echo -e "${COLOR_RED}ERROR: LaTeX to JSON conversion failed (see above)${COLOR_RESET}"
+        exit 1
+    fi
+    echo -e "${COLOR_YELLOW}WARNING: some PDFs could not be compiled (see above)${COLOR_RESET}"
+fi
 
 if [ ! -f "public/advent_data.json" ]; then
     echo -e "${COLOR_RED}ERROR: public/advent_data.json was not created!${COLOR_RESET}"
     exit 1
 fi
-
-echo -e "${COLOR_GREEN}✓ JSON conversion complete!${COLOR_RESET}"
 echo
 
 # =============================================================================
-# Step 2: Compile LaTeX → PDF
-# =============================================================================
-echo -e "${COLOR_GREEN}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━${COLOR_RESET}"
-echo -e "${COLOR_GREEN}Step 2/4: Compiling LaTeX to PDF${COLOR_RESET}"
-echo -e "${COLOR_GREEN}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━${COLOR_RESET}"
-echo
-
-# Check if pdflatex is available
-if ! command -v pdflatex &> /dev/null; then
-    echo -e "${COLOR_YELLOW}WARNING: pdflatex not found. Skipping PDF compilation.${COLOR_RESET}"
-    echo -e "${COLOR_YELLOW}Install TeX Live to compile PDFs locally.${COLOR_RESET}"
-    echo
-else
-    # Create output directory
-    mkdir -p public/pdfs
-    
-    # Array of all advent files
-    FILES=("advent00" "advent01" "advent02" "advent03" "advent04" "advent05" "advent06" "advent07" "advent08" "advent09" "advent10" "advent11" "advent12" "advent13" "advent14" "advent15" "advent16" "advent17" "advent18" "advent19" "advent20" "advent21" "advent22" "advent23" "advent24" "advent25" "advent31")
-    
-    SUCCESS_COUNT=0
-    TOTAL_COUNT=${#FILES[@]}
-    
-    # Compile each file twice (for proper indexing)
-    for file in "${FILES[@]}"; do
-        if [ -f "${file}.tex" ]; then
-            echo -e "${COLOR_BLUE}Compiling ${file}.tex...${COLOR_RESET}"
-            
-            # Pass 1
-            pdflatex -interaction=nonstopmode "${file}.tex" > /dev/null 2>&1 || echo "  (pass 1 had warnings)"
-            
-            # Pass 2 (for indices)
-            pdflatex -interaction=nonstopmode "${file}.tex" > /dev/null 2>&1 || echo "  (pass 2 had warnings)"
-            
-            # Copy PDF to public directory
-            if [ -f "${file}.pdf" ]; then
-                cp "${file}.pdf" "public/pdfs/"
-                echo -e "  ${COLOR_GREEN}✓ ${file}.pdf${COLOR_RESET}"
-                ((SUCCESS_COUNT++))
-            else
-                echo -e "  ${COLOR_RED}✗ ${file}.pdf (compilation failed)${COLOR_RESET}"
-            fi
-        else
-            echo -e "  ${COLOR_YELLOW}⊘ ${file}.tex not found${COLOR_RESET}"
-        fi
-    done
-    
-    # Clean up auxiliary files
-    rm -f *.aux *.log *.out *.toc *.synctex.gz
-    
-    echo
-    echo -e "${COLOR_GREEN}✓ PDF compilation complete: ${SUCCESS_COUNT}/${TOTAL_COUNT} PDFs created${COLOR_RESET}"
-    echo
-fi
-
-# =============================================================================
-# Step 3: Build Next.js
+# Step 2: Build Next.js
 # =============================================================================
 echo -e "${COLOR_GREEN}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━${COLOR_RESET}"
-echo -e "${COLOR_GREEN}Step 3/4: Building Next.js${COLOR_RESET}"
+echo -e "${COLOR_GREEN}Step 2/3: Building Next.js${COLOR_RESET}"
 echo -e "${COLOR_GREEN}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━${COLOR_RESET}"
 echo
 
@@ -132,11 +88,16 @@ yarn build
 # Add .nojekyll
 touch out/.nojekyll
 
+# Precompressed .gz/.br siblings for servers that serve them directly
+if [ -f "precompress_outputs.py" ]; then
+    python3 precompress_outputs.py out
+fi
+
 echo -e "${COLOR_GREEN}✓ Next.js build complete!${COLOR_RESET}"
 echo
 
 # =============================================================================
-# Step 4: Summary & Next Steps
+# Step 3: Summary & Next Steps
 # =============================================================================
 echo -e "${COLOR_GREEN}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━${COLOR_RESET}"
 echo -e "${COLOR_GREEN}Build Complete! ✅${COLOR_RESET}"
@@ -144,6 +105,7 @@ echo -e "${COLOR_GREEN}━━━━━━━━━━━━━━━━━━━
 echo
 echo "Generated files:"
 echo "  • public/advent_data.json ($(wc -l < public/advent_data.json) lines)"
+echo "  • public/data/ ($(ls -1 public/data/days/day*.json 2>/dev/null | wc -l) days)"
 echo "  • public/pdfs/ ($(ls -1 public/pdfs/*.pdf 2>/dev/null | wc -l) PDFs)"
 echo "  • out/ ($(du -sh out | cut -f1) total)"
 echo
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Watch mode for the LaTeX → JSON conversion.
+
+Polls the advent*.tex files and advent-layout.tex (mtime first, then a
+content hash, so a plain `touch` does nothing) and, on every save,
+reconverts only the affected day and atomically replaces only its
+public/data/days/dayNN.json. A change to the layout file reconverts every
+day. The build cache is updated as well, so the next full run stays warm.
+references.json, index.json, days.bundle, the search index and the manifest
+are kept in step with the days, written once per change however many days
+it touched.
+
+Usage:
+    python3 watch_tex.py                  # full (cached) convert, then watch
+    python3 watch_tex.py --interval 0.1   # poll every 100 ms
+    python3 watch_tex.py --skip-initial   # only react to changes
+
+Stop with Ctrl+C.
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from build_cache import BuildCache, file_digest
+from convert_tex_to_json_v2 import DEFAULT_CACHE_DIR, DEFAULT_DATA_DIR, RobustLatexConverter
+from katex_prerender import CACHE_FILE as KATEX_CACHE_FILE, KatexSettings, KatexUnavailable
+from output_writer import DayShardWriter
+from reference_store import ReferenceStore
+from search_index import SEARCH_DIR, SearchIndexBuilder
+from sqlite_export import SqliteExport
+
+
+DAY_FILE_RE = re.compile(r'advent\d+\.tex$')
+LAYOUT_FILE = 'advent-layout.tex'
+
+
+class WatchEvent(NamedTuple):
+    path: str
+    action: str                  # 'converted', 'failed' or 'removed'
+    output: Optional[str]        # day file written or removed
+    seconds: float               # detection → day file replaced
+    since_save: Optional[float]  # file mtime → day file replaced
+
+
+class TexWatcher:
+    """Polling watcher that keeps public/data/days in sync with the sources."""
+
+    def __init__(self, converter: RobustLatexConverter, directory: str = '.',
+                 data_dir: str = DEFAULT_DATA_DIR,
+                 cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                 layout: str = LAYOUT_FILE, inline_references: bool = False,
+                 bundle: bool = True, hashed_names: bool = False):
+        self.converter = converter
+        self.directory = directory
+        self.cache_dir = cache_dir
+        self.layout_path = os.path.join(directory, layout)
+        references = None
+        if not inline_references:
+            references = ReferenceStore.load(data_dir)
+        search = None
+        if converter.search_index:
+            search = SearchIndexBuilder.load(os.path.join(data_dir, SEARCH_DIR))
+        sqlite = None
+        if converter.sqlite_path:
+            sqlite = SqliteExport(converter.sqlite_path, converter.metadata['year'], replace=False)
+        self.writer = DayShardWriter(data_dir, references=references, bundle=bundle,
+                                     hashed_names=hashed_names, search=search, sqlite=sqlite)
+        self._stats: Dict[str, Tuple[int, int]] = {}
+        self._hashes: Dict[str, str] = {}
+        self._day_of: Dict[str, int] = {}
+        self._stats, _ = self._changes()
+
+    # -- polling -----------------------------------------------------------
+
+    def watched_files(self) -> List[str]:
+        paths = [os.path.join(self.directory, entry.name)
+                 for entry in os.scandir(self.directory)
+                 if entry.is_file() and DAY_FILE_RE.match(entry.name)]
+        if os.path.exists(self.layout_path):
+            paths.append(self.layout_path)
+        return sorted(paths)
+
+    def _changes(self) -> Tuple[Dict[str, Tuple[int, int]], List[str]]:
+        """Current stats, plus the files whose content actually changed."""
+        stats = {}
+        changed = []
+        for path in self.watched_files():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            stats[path] = (st.st_mtime_ns, st.st_size)
+            if self._stats.get(path) == stats[path]:
+                continue
+            digest = file_digest(path)
+            if self._hashes.get(path) != digest:
+                self._hashes[path] = digest
+                changed.append(path)
+        return stats, changed
+
+    def poll(self) -> List[WatchEvent]:
+        """Check once for changes and bring the affected day files up to date."""
+        detected = time.perf_counter()
+        stats, changed = self._changes()
+        removed = [p for p in self._stats if p not in stats]
+        self._stats = stats
+        if not changed and not removed:
+            return []
+
+        if self.layout_path in changed:
+            targets = [p for p in stats if p != self.layout_path]
+        else:
+            targets = changed
+        events = [self._remove(path, detected) for path in removed if path != self.layout_path]
+        if targets:
+            cache = BuildCache(self.cache_dir, self.converter.cache_version()) if self.cache_dir else None
+            trigger = self.layout_path if self.layout_path in changed else None
+            events.extend(self._convert(path, detected, cache, trigger or path) for path in targets)
+            if cache:
+                cache.save()
+            if self.converter.katex:
+                self.converter.math_html.katex.save()
+        # The files of all days are written once per poll, not once per day
+        self.writer.flush()
+        return events
+
+    # -- actions -----------------------------------------------------------
+
+    def _convert(self, path: str, detected: float, cache: Optional[BuildCache],
+                 trigger: str) -> WatchEvent:
+        try:
+            day_data = self.converter.parse_tex_file(path)
+        except Exception as e:
+            print(f"  ✗ {path}: {type(e).__name__}: {e}")
+            day_data = None
+        if not day_data:
+            return WatchEvent(path, 'failed', None, time.perf_counter() - detected, None)
+        output = self.writer.replace_day(day_data, flush=False)
+        self._day_of[path] = day_data['day']
+        finished = time.perf_counter()
+        if cache:
+            cache.store(path, day_data)
+        since_save = None
+        if trigger in self._stats:
+            since_save = time.time() - self._stats[trigger][0] / 1e9
+        return WatchEvent(path, 'converted', output, finished - detected, since_save)
+
+    def _remove(self, path: str, detected: float) -> WatchEvent:
+        self._hashes.pop(path, None)
+        day = self._day_of.pop(path, None)
+        if day is None:
+            day = self.converter.get_day_number(os.path.basename(path))
+        output = self.writer.remove_day(day, flush=False)
+        return WatchEvent(path, 'removed', output, time.perf_counter() - detected, None)
+
+    # -- loop --------------------------------------------------------------
+
+    def run(self, interval: float = 0.25):
+        print(f"Watching {len(self._stats)} files in {os.path.abspath(self.directory)} "
+              f"(every {interval * 1000:.0f} ms, Ctrl+C to stop)")
+        try:
+            while True:
+                for event in self.poll():
+                    print(format_event(event))
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            print("\nStopped watching.")
+
+
+def format_event(event: WatchEvent) -> str:
+    name = os.path.basename(event.path)
+    if event.action == 'removed':
+        return f"  − {name} removed → deleted {event.output}"
+    if event.action == 'failed':
+        return f"  ✗ {name} could not be converted ({event.seconds * 1000:.1f} ms)"
+    line = f"  ✓ {name} → {event.output} in {event.seconds * 1000:.1f} ms"
+    if event.since_save is not None:
+        line += f" (save → write {event.since_save * 1000:.0f} ms)"
+    return line
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconvert advent*.tex files on save")
+    parser.add_argument('--interval', type=float, default=0.25,
+                        help="polling interval in seconds (default: %(default)s)")
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR,
+                        help="metadata.json and days/dayNN.json go here (default: %(default)s)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="do not read or update the build cache")
+    parser.add_argument('--inline-references', action='store_true',
+                        help="copy reference texts into every day instead of references.json")
+    parser.add_argument('--no-bundle', action='store_true',
+                        help="do not write the packed days.bundle")
+    parser.add_argument('--hashed-names', action='store_true',
+                        help="also write the files under content-hashed names, with manifest.json")
+    parser.add_argument('--chunk-sections', action='store_true',
+                        help="split day contents at their sections, as convert_tex_to_json_v2.py does")
+    parser.add_argument('--search-index', action='store_true',
+                        help="keep the full-text search index in DATA_DIR/search up to date")
+    parser.add_argument('--sqlite', metavar='FILE',
+                        help="keep the days in this SQLite database up to date")
+    parser.add_argument('--katex', action='store_true',
+                        help="pre-render math with the KaTeX from node_modules")
+    parser.add_argument('--katex-fallback', action='store_true',
+                        help="with --katex, keep the LaTeX source if node or KaTeX is missing")
+    parser.add_argument('--katex-options', type=json.loads, default={},
+                        help="KaTeX options as JSON, e.g. '{\"output\": \"html\"}'")
+    parser.add_argument('--skip-initial', action='store_true',
+                        help="do not run a full conversion before watching")
+    args = parser.parse_args()
+
+    converter = RobustLatexConverter()
+    converter.chunk_sections = args.chunk_sections
+    converter.search_index = args.search_index
+    converter.sqlite_path = args.sqlite
+    cache_dir = None if args.no_cache else DEFAULT_CACHE_DIR
+    if args.katex:
+        katex_cache = os.path.join(cache_dir, KATEX_CACHE_FILE) if cache_dir else None
+        converter.katex = KatexSettings(katex_cache, args.katex_options, args.katex_fallback)
+    try:
+        if not args.skip_initial:
+            converter.convert_all(None, cache_dir=cache_dir, data_dir=args.data_dir,
+                                  inline_references=args.inline_references,
+                                  bundle=not args.no_bundle, hashed_names=args.hashed_names)
+            print()
+        TexWatcher(converter, data_dir=args.data_dir, cache_dir=cache_dir,
+                   inline_references=args.inline_references,
+                   bundle=not args.no_bundle, hashed_names=args.hashed_names).run(args.interval)
+    except KatexUnavailable as e:
+        raise SystemExit(f"✗ {e} (run yarn install, or add --katex-fallback)")
+    finally:
+        converter.close()
+
+
+if __name__ == '__main__':
+    main()